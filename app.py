@@ -4,24 +4,19 @@ A Streamlit app that generates themed, differentiated, dual-coded worksheets
 for Primary School subjects (Year 1-6) using Claude AI.
 """
 
-import io
-import zipfile
+import os
+import queue
+import threading
 import streamlit as st
 
+from content import has_local_engine
 from curriculum import SUBJECT_REGISTRY, WORKSHEET_TYPE_DISPLAY, WORKSHEET_TYPE_KEY_MAP
-from generators.styles import THEMES, DIFF_LEVELS, YEAR_AGES
-from llm.client import generate_worksheet_content
-from llm.prompts import get_prompt
-from generators.cloze import generate_cloze_worksheet
-from generators.word_bank import generate_word_bank_worksheet
-from generators.matching import generate_matching_worksheet
-from generators.sentence_builder import generate_sentence_builder_worksheet
-from generators.reading_comprehension import generate_reading_comprehension_worksheet
-from generators.problem_solving import generate_problem_solving_worksheet
-from generators.calculation_practice import generate_calculation_practice_worksheet
-from generators.investigation import generate_investigation_worksheet
-from generators.fraction_practice import generate_fraction_practice_worksheet
-from generators.times_tables import generate_times_tables_worksheet
+from curriculum.search import closest_objectives, get_index, search_curriculum
+from generators.styles import THEMES, DIFF_LEVELS
+from llm.scheduler import get_scheduler_stats
+from llm.streaming import apply_stream_element
+from pipeline import build_documents, build_zip, generate_contents, make_params, pack_filename
+from telemetry import span, start_metrics_server_from_env
 
 
 # ─── Page Configuration ────────────────────────────────────────────────────────
@@ -33,6 +28,18 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# Prometheus metrics on /metrics when WORKSHEET_METRICS_PORT is set (started once per process)
+start_metrics_server_from_env()
+
+
+@st.cache_resource
+def _warm_curriculum_index():
+    """Build the curriculum search index in the background, once per server process."""
+    threading.Thread(target=get_index, name="curriculum-index", daemon=True).start()
+
+
+_warm_curriculum_index()
+
 # ─── Session State Initialisation ─────────────────────────────────────────────
 
 if 'generated_content' not in st.session_state:
@@ -44,448 +51,181 @@ if 'preview_ready' not in st.session_state:
 if 'regenerate_requested' not in st.session_state:
     st.session_state.regenerate_requested = False
 
-# ─── Custom CSS ────────────────────────────────────────────────────────────────
+# ─── Static Assets ─────────────────────────────────────────────────────────────
 
-# Layer 1: Google Fonts — loaded via <link> (not @import) so it works mid-document
-st.markdown(
-    '<link href="https://fonts.googleapis.com/css2?family=DM+Sans:ital,opsz,wght@0,9..40,300;0,9..40,400;0,9..40,500;0,9..40,600;0,9..40,700;0,9..40,800&display=swap" rel="stylesheet">',
-    unsafe_allow_html=True,
-)
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 
-# Layer 2 + 3: Streamlit DOM overrides + custom components
-st.markdown("""
-<style>
-    /* ═══════════════════════════════════════════════════════════════════
-       LAYER 1: DESIGN TOKENS (CSS Custom Properties)
-       ═══════════════════════════════════════════════════════════════════ */
-    :root {
-        --font: 'DM Sans', -apple-system, BlinkMacSystemFont, sans-serif;
-        --primary: #1565C0;
-        --primary-dark: #0D2137;
-        --primary-light: #E3F2FD;
-        --success: #2E7D32;
-        --success-light: #E8F5E9;
-        --warning: #E65100;
-        --warning-light: #FFF3E0;
-        --text-primary: #1F2937;
-        --text-secondary: #6B7280;
-        --text-muted: #9CA3AF;
-        --border: #E5E7EB;
-        --surface: #F8FAFC;
-        --shadow-sm: 0 1px 3px rgba(0,0,0,0.08);
-        --shadow-md: 0 4px 12px rgba(0,0,0,0.1);
-        --shadow-lg: 0 8px 24px rgba(0,0,0,0.12);
-        --radius-sm: 8px;
-        --radius-md: 12px;
-        --radius-lg: 16px;
-    }
-
-    /* ═══════════════════════════════════════════════════════════════════
-       LAYER 2: STREAMLIT DOM OVERRIDES
-       ═══════════════════════════════════════════════════════════════════ */
-
-    /* ── Global Typography ────────────────────────────────────────────── */
-    html, body, .stApp, [data-testid="stAppViewContainer"],
-    .stMarkdown, .stMarkdown p, .stMarkdown li, .stMarkdown h1,
-    .stMarkdown h2, .stMarkdown h3, .stMarkdown h4,
-    .stSelectbox label, .stTextInput label, .stTextArea label,
-    .stCheckbox label, .stRadio label,
-    div.stButton > button, .stDownloadButton > button,
-    .stCaption, [data-testid="stSidebar"] p {
-        font-family: var(--font) !important;
-    }
 
-    /* ── Main Container ──────────────────────────────────────────────── */
-    .block-container {
-        padding-top: 1rem !important;
-        padding-bottom: 1rem !important;
-        max-width: 1100px !important;
-    }
+@st.cache_resource
+def _load_stylesheet():
+    """Read the app's stylesheet once per server process."""
+    with open(os.path.join(ASSETS_DIR, "app.css"), encoding="utf-8") as f:
+        return f"<style>{f.read()}</style>"
 
-    /* ── Hide Streamlit Chrome ────────────────────────────────────────── */
-    header[data-testid="stHeader"] {
-        background: transparent !important;
-        backdrop-filter: none !important;
-    }
-    #MainMenu, footer, [data-testid="stDecoration"] {
-        display: none !important;
-    }
 
-    /* ── Sidebar ─────────────────────────────────────────────────────── */
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #F0F4F8 0%, #E2E8F0 100%) !important;
-    }
-    [data-testid="stSidebar"] > div:first-child {
-        padding-top: 1.25rem !important;
-    }
-    [data-testid="stSidebar"] hr {
-        margin: 0.5rem 0 !important;
-        border-color: rgba(21,101,192,0.1) !important;
-    }
-    [data-testid="stSidebar"] h2 {
-        font-family: var(--font) !important;
-        color: var(--primary-dark) !important;
-        font-size: 1.3rem !important;
-        font-weight: 700 !important;
-        letter-spacing: -0.02em !important;
-    }
-    [data-testid="stSidebar"] h3 {
-        font-family: var(--font) !important;
-        color: var(--primary-dark) !important;
-        font-size: 0.8rem !important;
-        font-weight: 600 !important;
-        text-transform: uppercase !important;
-        letter-spacing: 0.06em !important;
-        margin-bottom: 0.25rem !important;
-        padding-bottom: 0.35rem !important;
-        border-bottom: 2px solid rgba(21,101,192,0.15) !important;
-    }
-    /* Sidebar inputs — rounded corners, subtle borders, blue focus */
-    [data-testid="stSidebar"] .stSelectbox > div > div,
-    [data-testid="stSidebar"] .stTextInput > div > div > input,
-    [data-testid="stSidebar"] .stTextArea > div > div > textarea {
-        font-family: var(--font) !important;
-        border-radius: var(--radius-sm) !important;
-        border-color: #CBD5E1 !important;
-        font-size: 0.9rem !important;
-    }
-    [data-testid="stSidebar"] .stSelectbox > div > div:focus-within,
-    [data-testid="stSidebar"] .stTextInput > div > div > input:focus,
-    [data-testid="stSidebar"] .stTextArea > div > div > textarea:focus {
-        border-color: var(--primary) !important;
-        box-shadow: 0 0 0 3px rgba(21,101,192,0.12) !important;
-    }
-    /* Sidebar generate button */
-    [data-testid="stSidebar"] .stButton > button[kind="primary"] {
-        font-family: var(--font) !important;
-        font-size: 1rem !important;
-        font-weight: 700 !important;
-        padding: 0.7rem 1rem !important;
-        border-radius: 10px !important;
-        letter-spacing: 0.02em !important;
-        box-shadow: 0 3px 12px rgba(21,101,192,0.35) !important;
-        transition: all 0.2s ease !important;
-    }
-    [data-testid="stSidebar"] .stButton > button[kind="primary"]:hover {
-        box-shadow: 0 5px 18px rgba(21,101,192,0.45) !important;
-        transform: translateY(-1px) !important;
-    }
-    /* Sidebar caption text */
-    [data-testid="stSidebar"] .stCaption, [data-testid="stSidebar"] small {
-        font-family: var(--font) !important;
-        color: var(--text-secondary) !important;
-    }
+# Only sent on full app runs: widgets inside the fragments below rerun just
+# their fragment, so changing a setting does not re-send any of this.
 
-    /* ── Buttons (main area) ─────────────────────────────────────────── */
-    .stButton > button, .stDownloadButton > button {
-        font-family: var(--font) !important;
-        border-radius: var(--radius-sm) !important;
-        font-weight: 600 !important;
-        padding: 0.5rem 1.25rem !important;
-        transition: all 0.15s ease !important;
-    }
-    .stButton > button[kind="primary"],
-    .stDownloadButton > button[kind="primary"] {
-        box-shadow: 0 2px 8px rgba(21,101,192,0.3) !important;
-    }
-    .stButton > button[kind="primary"]:hover,
-    .stDownloadButton > button[kind="primary"]:hover {
-        box-shadow: 0 4px 16px rgba(21,101,192,0.4) !important;
-        transform: translateY(-1px) !important;
-    }
-
-    /* ── Expanders ───────────────────────────────────────────────────── */
-    details[data-testid="stExpander"] {
-        border: 1px solid var(--border) !important;
-        border-radius: var(--radius-md) !important;
-        box-shadow: var(--shadow-sm) !important;
-        margin-bottom: 0.5rem !important;
-        overflow: hidden !important;
-    }
-    details[data-testid="stExpander"] summary {
-        font-family: var(--font) !important;
-        font-weight: 600 !important;
-        color: var(--primary-dark) !important;
-        padding: 0.75rem 1rem !important;
-    }
+# Layer 1: Google Fonts — loaded via <link> (not @import) so it works mid-document
+st.markdown(
+    '<link href="https://fonts.googleapis.com/css2?family=DM+Sans:ital,opsz,wght@0,9..40,300;0,9..40,400;0,9..40,500;0,9..40,600;0,9..40,700;0,9..40,800&display=swap" rel="stylesheet">',
+    unsafe_allow_html=True,
+)
+# Layer 2 + 3: Streamlit DOM overrides + custom components (assets/app.css; style-only HTML takes no space)
+st.html(_load_stylesheet())
 
-    /* ── Progress bar ────────────────────────────────────────────────── */
-    .stProgress > div > div > div {
-        background: linear-gradient(90deg, #1565C0, #42A5F5) !important;
-        border-radius: var(--radius-sm) !important;
-    }
 
-    /* ── Streamlit alerts (st.info, st.success, st.error) ────────────── */
-    .stAlert {
-        border-radius: var(--radius-sm) !important;
-        font-family: var(--font) !important;
-    }
+# ─── Lesson Summary ────────────────────────────────────────────────────────────
 
-    /* ═══════════════════════════════════════════════════════════════════
-       LAYER 3: CUSTOM COMPONENTS
-       ═══════════════════════════════════════════════════════════════════ */
-
-    /* ── Professional Header Banner ──────────────────────────────────── */
-    .app-header {
-        font-family: var(--font);
-        background: linear-gradient(135deg, #0D2137 0%, #1565C0 60%, #1E88E5 100%);
-        padding: 2.5rem 2.5rem 2rem;
-        border-radius: var(--radius-lg);
-        margin: -0.5rem 0 1.5rem;
-        color: white;
-        box-shadow: 0 4px 24px rgba(13,33,55,0.3);
-        position: relative;
-        overflow: hidden;
-    }
-    .app-header::before {
-        content: '';
-        position: absolute;
-        top: -60%; right: -15%;
-        width: 500px; height: 500px;
-        background: radial-gradient(circle, rgba(255,255,255,0.07) 0%, transparent 65%);
-        border-radius: 50%;
-    }
-    .app-header::after {
-        content: '';
-        position: absolute;
-        bottom: -40%; left: -10%;
-        width: 300px; height: 300px;
-        background: radial-gradient(circle, rgba(30,136,229,0.15) 0%, transparent 70%);
-        border-radius: 50%;
-    }
-    .app-header h1 {
-        font-family: var(--font) !important;
-        color: white !important;
-        font-size: 2rem !important;
-        font-weight: 800 !important;
-        margin: 0 !important;
-        line-height: 1.3 !important;
-        position: relative;
-        text-shadow: 0 2px 4px rgba(0,0,0,0.15);
-        letter-spacing: -0.02em !important;
-    }
-    .app-header p {
-        font-family: var(--font) !important;
-        color: rgba(255,255,255,0.8) !important;
-        font-size: 1.05rem !important;
-        margin: 0.5rem 0 0 !important;
-        position: relative;
-        font-weight: 400;
-    }
-
-    /* ── Stat Cards ──────────────────────────────────────────────────── */
-    .stat-card {
-        font-family: var(--font);
-        background: #FFFFFF;
-        border: 1px solid var(--border);
-        border-radius: var(--radius-md);
-        padding: 1rem 1.25rem;
-        border-left: 4px solid var(--primary);
-        box-shadow: var(--shadow-sm);
-        transition: box-shadow 0.2s ease, transform 0.2s ease;
-    }
-    .stat-card:hover {
-        box-shadow: var(--shadow-md);
-        transform: translateY(-1px);
-    }
-    .stat-card-green { border-left-color: var(--success) !important; }
-    .stat-card-amber { border-left-color: var(--warning) !important; }
-    .stat-card-label {
-        font-family: var(--font);
-        font-size: 0.65rem;
-        color: var(--text-muted);
-        text-transform: uppercase;
-        letter-spacing: 0.08em;
-        font-weight: 600;
-        margin-bottom: 0.3rem;
-    }
-    .stat-card-value {
-        font-family: var(--font);
-        font-size: 1.05rem;
-        font-weight: 700;
-        color: var(--text-primary);
-        line-height: 1.4;
-    }
+def render_header(theme):
+    """Render the gradient banner at the top of the page."""
+    st.markdown(
+        f'<div class="app-header">'
+        f'<h1>{theme["icon"]} UK National Curriculum Worksheet Generator</h1>'
+        f'<p>Generate creative, differentiated, dual-coded worksheets powered by AI</p>'
+        f'</div>',
+        unsafe_allow_html=True,
+    )
 
-    /* ── Section Cards ───────────────────────────────────────────────── */
-    .section-card {
-        font-family: var(--font);
-        background: #FFFFFF;
-        border: 1px solid var(--border);
-        border-radius: var(--radius-md);
-        padding: 1.5rem 1.75rem;
-        box-shadow: var(--shadow-sm);
-        margin-bottom: 0.75rem;
-    }
-    .section-card h4 {
-        font-family: var(--font) !important;
-        color: var(--primary-dark) !important;
-        margin: 0 0 0.75rem !important;
-        font-size: 1.15rem !important;
-        font-weight: 700 !important;
-    }
 
-    /* ── Pill Badges ─────────────────────────────────────────────────── */
-    .badge {
-        font-family: var(--font);
-        display: inline-block;
-        padding: 0.15rem 0.55rem;
-        border-radius: 20px;
-        font-size: 0.7rem;
-        font-weight: 700;
-        letter-spacing: 0.02em;
-        vertical-align: middle;
-    }
-    .badge-blue { background: var(--primary-light); color: var(--primary); }
-    .badge-green { background: var(--success-light); color: var(--success); }
-    .badge-amber { background: var(--warning-light); color: var(--warning); }
-
-    /* ── Theme Cards ─────────────────────────────────────────────────── */
-    .theme-card {
-        font-family: var(--font);
-        padding: 0.75rem 0.5rem;
-        border-radius: var(--radius-md);
-        text-align: center;
-        font-weight: 700;
-        font-size: 0.85rem;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.15);
-        transition: all 0.2s ease;
-    }
-    .theme-card:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 4px 14px rgba(0,0,0,0.2);
-    }
+def render_lesson_summary(lesson):
+    """Render the stat cards, curriculum objectives and theme preview for the sidebar selection."""
+    theme = THEMES[lesson['theme_key']]
+    custom_topic = lesson['custom_topic'].strip()
+    custom_objective = lesson['custom_objective'].strip()
 
-    /* ── Feature Cards (Welcome Page) ────────────────────────────────── */
-    .feature-card {
-        font-family: var(--font);
-        background: linear-gradient(160deg, #FFFFFF, var(--surface));
-        border: 1px solid var(--border);
-        border-top: 3px solid var(--primary);
-        border-radius: var(--radius-md);
-        padding: 1.75rem 1.25rem;
-        text-align: center;
-        height: 100%;
-        box-shadow: var(--shadow-sm);
-        transition: all 0.2s ease;
-    }
-    .feature-card:hover {
-        box-shadow: var(--shadow-md);
-        transform: translateY(-3px);
-        border-top-color: #1E88E5;
-    }
-    .feature-card .fc-icon { font-size: 2.5rem; margin-bottom: 0.5rem; display: block; }
-    .feature-card h4 {
-        font-family: var(--font) !important;
-        color: var(--primary-dark) !important;
-        margin: 0.5rem 0 0.4rem !important;
-        font-size: 1.05rem !important;
-        font-weight: 700 !important;
-    }
-    .feature-card p {
-        font-family: var(--font) !important;
-        color: var(--text-secondary) !important;
-        font-size: 0.85rem !important;
-        margin: 0 !important;
-        line-height: 1.5 !important;
-    }
+    # Stat cards row
+    display_topic = custom_topic if custom_topic else f"{lesson['strand']} \u2192 {lesson['topic']}"
+    topic_card_class = "stat-card stat-card-amber" if custom_topic else "stat-card stat-card-green"
+    topic_badge = '<span class="badge badge-amber">Custom</span> ' if custom_topic else ''
 
-    /* ── Step Indicators ─────────────────────────────────────────────── */
-    .step-row {
-        display: flex;
-        align-items: center;
-        margin-bottom: 0.85rem;
-        padding: 0.4rem 0;
-    }
-    .step-row:last-child { margin-bottom: 0; }
-    .step-number {
-        font-family: var(--font);
-        display: inline-flex;
-        align-items: center;
-        justify-content: center;
-        min-width: 32px; height: 32px;
-        background: linear-gradient(135deg, var(--primary), #1E88E5);
-        color: white;
-        border-radius: 50%;
-        font-weight: 800;
-        font-size: 0.85rem;
-        margin-right: 0.85rem;
-        flex-shrink: 0;
-        box-shadow: 0 2px 8px rgba(21,101,192,0.35);
-    }
-    .step-text {
-        font-family: var(--font);
-        color: var(--text-primary) !important;
-        font-size: 0.95rem;
-        line-height: 1.4;
-    }
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(
+            '<div class="stat-card">'
+            '<div class="stat-card-label">Year Group</div>'
+            f'<div class="stat-card-value">{lesson["year_group"]} &middot; '
+            f'{SUBJECT_REGISTRY[lesson["subject"]]["icon"]} {lesson["subject"]}</div>'
+            '</div>',
+            unsafe_allow_html=True,
+        )
+    with col2:
+        st.markdown(
+            f'<div class="{topic_card_class}">'
+            '<div class="stat-card-label">Topic</div>'
+            f'<div class="stat-card-value">{topic_badge}{display_topic}</div>'
+            '</div>',
+            unsafe_allow_html=True,
+        )
+    with col3:
+        st.markdown(
+            '<div class="stat-card">'
+            '<div class="stat-card-label">Worksheet</div>'
+            f'<div class="stat-card-value">{lesson["worksheet_type"]} '
+            f'<span class="badge badge-blue">{theme["icon"]} {theme["name"]}</span></div>'
+            '</div>',
+            unsafe_allow_html=True,
+        )
 
-    /* ── Generation Status ───────────────────────────────────────────── */
-    .generating {
-        font-family: var(--font);
-        padding: 1rem 1.25rem;
-        background: linear-gradient(90deg, var(--primary-light), #BBDEFB);
-        border-left: 4px solid var(--primary);
-        border-radius: var(--radius-sm);
-        margin: 0.75rem 0;
-        font-weight: 500;
-        animation: pulse 2s ease-in-out infinite;
-    }
-    @keyframes pulse {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.6; }
-    }
+    # Learning Objectives
+    with st.expander("\U0001F4CB Curriculum Objectives", expanded=False):
+        if custom_objective:
+            st.markdown(f"**Custom:** {custom_objective}")
+            st.markdown("---")
+        elif custom_topic:
+            closest = closest_objectives(
+                custom_topic, subject=lesson['subject'], year_group=lesson['year_group'], limit=1,
+            )
+            if closest:
+                st.markdown(f"**Closest to your topic:** {closest[0]['text']}")
+                st.markdown("---")
+        for obj in lesson['objectives']:
+            st.markdown(f"- {obj}")
+
+    # Theme Preview
+    with st.expander(f"{theme['icon']} Theme Preview: {theme['name']}", expanded=False):
+        tc1, tc2, tc3 = st.columns(3)
+        with tc1:
+            st.markdown(
+                f'<div class="theme-card" style="background: #{theme["header"]}; color: white;">'
+                f'{theme["icon"]} {theme["section"]} 1: Header</div>',
+                unsafe_allow_html=True,
+            )
+        with tc2:
+            st.markdown(
+                f'<div class="theme-card" style="background: #{theme["body"]}; color: #{theme["header"]};">'
+                f'{theme["reminder"]}: Tip text here</div>',
+                unsafe_allow_html=True,
+            )
+        with tc3:
+            st.markdown(
+                f'<div class="theme-card" style="background: #E8F5E9; color: #2E7D32;">'
+                f'{theme["icon"]} {theme["criteria"]}</div>',
+                unsafe_allow_html=True,
+            )
 
-    /* ── Download Section ────────────────────────────────────────────── */
-    .download-card {
-        font-family: var(--font);
-        background: linear-gradient(135deg, #E8F5E9 0%, #C8E6C9 100%);
-        border: 2px solid #43A047;
-        border-radius: var(--radius-lg);
-        padding: 1.75rem;
-        text-align: center;
-        margin: 1rem 0;
-        box-shadow: 0 2px 12px rgba(46,125,50,0.15);
-    }
-    .download-card h4 {
-        font-family: var(--font) !important;
-        color: #1B5E20 !important;
-        margin: 0 0 0.4rem !important;
-        font-size: 1.2rem !important;
-        font-weight: 700 !important;
-    }
-    .download-card p {
-        font-family: var(--font) !important;
-        color: var(--success) !important;
-        font-size: 0.9rem !important;
-        margin: 0 !important;
-    }
 
-    /* ── Footer ──────────────────────────────────────────────────────── */
-    .app-footer {
-        font-family: var(--font);
-        text-align: center;
-        color: var(--text-muted);
-        font-size: 0.8rem;
-        padding: 1.25rem 0 0.5rem;
-        border-top: 1px solid var(--border);
-        margin-top: 2rem;
-        letter-spacing: 0.01em;
-    }
-</style>
-""", unsafe_allow_html=True)
+# ─── Sidebar ───────────────────────────────────────────────────────────────────
 
+def _match_label(match):
+    """One line describing a curriculum search result."""
+    icon = SUBJECT_REGISTRY[match['subject']]['icon']
+    if match['kind'] == 'topic':
+        return f"{icon} {match['topic']} \u2014 {match['subject']}, {match['year_group']}"
+    text = match['text'] if len(match['text']) <= 70 else match['text'][:69] + "\u2026"
+    return f"{icon} \u201C{text}\u201D \u2014 {match['subject']}, {match['year_group']}"
 
-# ─── Sidebar ───────────────────────────────────────────────────────────────────
 
-with st.sidebar:
-    st.markdown("## \U0001F3EB Lesson Planner")
-    st.markdown("---")
+def _apply_curriculum_match(matches):
+    """Set the lesson pickers to the search result picked in the sidebar, and clear the search."""
+    choice = st.session_state.get('curriculum_match')
+    if choice is None:
+        return
+    match = matches[choice]
+    strand_data = SUBJECT_REGISTRY[match['subject']]['curriculum'][match['year_group']][match['strand']]
+    st.session_state.lesson_subject = match['subject']
+    st.session_state.lesson_year_group = match['year_group']
+    st.session_state.lesson_strand = match['strand']
+    st.session_state.lesson_topic = match['topic'] or strand_data['topics'][0]
+    st.session_state.curriculum_query = ""
+
+
+@st.fragment(key="lesson_settings")
+def lesson_settings(header_area, summary_area):
+    """Lesson pickers, rerun on their own along with the header and summary they drive.
+
+    Returns the selection as a dict on full app runs. Changing the subject or
+    worksheet type also changes the options and welcome page outside this
+    fragment, so those changes rerun the whole app.
+    """
+    # Curriculum search: picking a match sets the pickers below
+    query = st.text_input(
+        "\U0001F50E Search the curriculum",
+        key="curriculum_query",
+        placeholder="e.g. fractions, Romans, water cycle",
+        help="Search the topics and objectives of every subject and year group",
+    )
+    if query.strip():
+        matches = search_curriculum(query, limit=8)
+        if matches:
+            st.selectbox(
+                "Matching topics and objectives",
+                range(len(matches)),
+                index=None,
+                format_func=lambda i: _match_label(matches[i]),
+                placeholder=f"{len(matches)} matches \u2014 pick one",
+                key="curriculum_match",
+                on_change=_apply_curriculum_match,
+                args=(matches,),
+            )
+        else:
+            st.caption("No topics or objectives match your search.")
 
     # Subject
     subject = st.selectbox(
         "\U0001F4D6 Subject",
         list(SUBJECT_REGISTRY.keys()),
+        key="lesson_subject",
         help="Select the curriculum subject",
     )
     subject_config = SUBJECT_REGISTRY[subject]
@@ -493,11 +233,13 @@ with st.sidebar:
 
     # Year Group (filtered by subject)
     year_groups = subject_config["years"]
-    default_year_idx = min(2, len(year_groups) - 1)
+    # Default to Year 3 (or the nearest), set through session state so a search match can change it
+    if st.session_state.get('lesson_year_group') not in year_groups:
+        st.session_state.lesson_year_group = year_groups[min(2, len(year_groups) - 1)]
     year_group = st.selectbox(
         "\U0001F393 Year Group",
         year_groups,
-        index=default_year_idx,
+        key="lesson_year_group",
         help="Select the year group for this worksheet",
     )
 
@@ -506,6 +248,7 @@ with st.sidebar:
     strand = st.selectbox(
         "\U0001F4CB Strand",
         strands,
+        key="lesson_strand",
         help=f"Select the {subject} strand",
     )
 
@@ -514,12 +257,12 @@ with st.sidebar:
     topic = st.selectbox(
         "\U0001F4CC Topic",
         topics,
+        key="lesson_topic",
         help="Select the specific topic",
     )
 
     # Get objectives for display
     objectives = curriculum_data[year_group][strand]["objectives"]
-    objective_text = objectives[0] if objectives else ""
 
     # Custom Topic Override
     st.markdown("---")
@@ -553,7 +296,6 @@ with st.sidebar:
     )
     # Map display name back to key
     worksheet_type_key = WORKSHEET_TYPE_KEY_MAP.get(worksheet_type_display, "cloze")
-    worksheet_type = worksheet_type_display  # For display purposes
 
     # Theme
     theme_options = {k: f"{v['icon']} {v['name']}" for k, v in THEMES.items()}
@@ -564,13 +306,44 @@ with st.sidebar:
         help="Choose a fun visual theme for the worksheet",
     )
 
-    st.markdown("---")
-
+    layout = (subject, worksheet_type_key)
+    if st.session_state.get('sidebar_layout', layout) != layout:
+        st.session_state.sidebar_layout = layout
+        st.rerun()
+    st.session_state.sidebar_layout = layout
+
+    lesson = {
+        'subject': subject,
+        'year_group': year_group,
+        'strand': strand,
+        'topic': topic,
+        'objectives': objectives,
+        'custom_topic': custom_topic,
+        'custom_objective': custom_objective,
+        'worksheet_type': worksheet_type_display,
+        'worksheet_type_key': worksheet_type_key,
+        'theme_key': theme_key,
+    }
+    with header_area:
+        render_header(THEMES[theme_key])
+    with summary_area:
+        render_lesson_summary(lesson)
+    return lesson
+
+
+@st.fragment(key="worksheet_options")
+def worksheet_options(worksheet_type_key):
+    """Differentiation, accessibility and teacher tool options, rerun on their own.
+
+    Returns the chosen options as a dict on full app runs.
+    """
     # Differentiation
     st.markdown("### Differentiation")
     generate_all = st.checkbox("Generate all 3 levels", value=True)
 
-    if not generate_all:
+    if generate_all:
+        levels = list(DIFF_LEVELS.keys())
+    else:
         level_options = {k: v['label'] for k, v in DIFF_LEVELS.items()}
         selected_level = st.selectbox(
             "Select level",
@@ -578,6 +351,7 @@ with st.sidebar:
             format_func=lambda x: level_options[x],
             index=1,
         )
+        levels = [selected_level]
 
     st.markdown("---")
 
@@ -603,111 +377,46 @@ with st.sidebar:
         value=False,
         help="Generate a filled-in answer key alongside each student worksheet",
     )
+    offline = False
+    if has_local_engine(worksheet_type_key):
+        offline = st.checkbox(
+            "Generate without AI",
+            value=False,
+            help="Work out the content instantly on this computer instead of asking Claude",
+        )
 
-    st.markdown("---")
-
-    # Generate Button
-    generate_btn = st.button(
-        "\U0001F3A8 Generate Worksheets",
-        use_container_width=True,
-        type="primary",
-        key="generate_btn",
-    )
-
+    return {
+        'levels': levels,
+        'extra_spacing': extra_spacing,
+        'eal_glossary': eal_glossary,
+        'include_answer_key': include_answer_key,
+        'offline': offline,
+    }
 
-# ─── Main Content Area ─────────────────────────────────────────────────────────
 
-# Resolve effective topic and objective (custom overrides curriculum)
-effective_topic = custom_topic.strip() if custom_topic.strip() else f"{strand} - {topic}"
-effective_objective = custom_objective.strip() if custom_objective.strip() else objective_text
+# Main-area containers the lesson settings fragment redraws
+header_area = st.container()
+summary_area = st.container()
 
-# Header — professional gradient banner
-theme = THEMES[theme_key]
-st.markdown(
-    f'<div class="app-header">'
-    f'<h1>{theme["icon"]} UK National Curriculum Worksheet Generator</h1>'
-    f'<p>Generate creative, differentiated, dual-coded worksheets powered by AI</p>'
-    f'</div>',
-    unsafe_allow_html=True,
-)
+with st.sidebar:
+    st.markdown("## \U0001F3EB Lesson Planner")
+    st.markdown("---")
 
-# Stat cards row
-display_topic = custom_topic.strip() if custom_topic.strip() else f"{strand} \u2192 {topic}"
-topic_card_class = "stat-card stat-card-amber" if custom_topic.strip() else "stat-card stat-card-green"
-topic_badge = '<span class="badge badge-amber">Custom</span> ' if custom_topic.strip() else ''
+    lesson = lesson_settings(header_area, summary_area)
 
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.markdown(
-        '<div class="stat-card">'
-        '<div class="stat-card-label">Year Group</div>'
-        f'<div class="stat-card-value">{year_group} &middot; {subject_config["icon"]} {subject}</div>'
-        '</div>',
-        unsafe_allow_html=True,
-    )
-with col2:
-    st.markdown(
-        f'<div class="{topic_card_class}">'
-        '<div class="stat-card-label">Topic</div>'
-        f'<div class="stat-card-value">{topic_badge}{display_topic}</div>'
-        '</div>',
-        unsafe_allow_html=True,
-    )
-with col3:
-    st.markdown(
-        '<div class="stat-card">'
-        '<div class="stat-card-label">Worksheet</div>'
-        f'<div class="stat-card-value">{worksheet_type} '
-        f'<span class="badge badge-blue">{theme["icon"]} {theme["name"]}</span></div>'
-        '</div>',
-        unsafe_allow_html=True,
-    )
+    st.markdown("---")
 
-# Learning Objectives
-with st.expander("\U0001F4CB Curriculum Objectives", expanded=False):
-    if custom_objective.strip():
-        st.markdown(f"**Custom:** {custom_objective.strip()}")
-        st.markdown("---")
-    for obj in objectives:
-        st.markdown(f"- {obj}")
-
-# Theme Preview
-with st.expander(f"{theme['icon']} Theme Preview: {theme['name']}", expanded=False):
-    tc1, tc2, tc3 = st.columns(3)
-    with tc1:
-        st.markdown(
-            f'<div class="theme-card" style="background: #{theme["header"]}; color: white;">'
-            f'{theme["icon"]} {theme["section"]} 1: Header</div>',
-            unsafe_allow_html=True,
-        )
-    with tc2:
-        st.markdown(
-            f'<div class="theme-card" style="background: #{theme["body"]}; color: #{theme["header"]};">'
-            f'{theme["reminder"]}: Tip text here</div>',
-            unsafe_allow_html=True,
-        )
-    with tc3:
-        st.markdown(
-            f'<div class="theme-card" style="background: #E8F5E9; color: #2E7D32;">'
-            f'{theme["icon"]} {theme["criteria"]}</div>',
-            unsafe_allow_html=True,
-        )
+    options = worksheet_options(lesson['worksheet_type_key'])
 
-# ─── Maps ─────────────────────────────────────────────────────────────────────
-
-GENERATOR_MAP = {
-    "cloze": generate_cloze_worksheet,
-    "word_bank": generate_word_bank_worksheet,
-    "matching": generate_matching_worksheet,
-    "sentence_builder": generate_sentence_builder_worksheet,
-    "reading_comprehension": generate_reading_comprehension_worksheet,
-    "problem_solving": generate_problem_solving_worksheet,
-    "calculation_practice": generate_calculation_practice_worksheet,
-    "investigation": generate_investigation_worksheet,
-    "fraction_practice": generate_fraction_practice_worksheet,
-    "times_tables": generate_times_tables_worksheet,
-}
+    st.markdown("---")
 
+    # Generate Button (outside the fragments, so it reruns the whole app)
+    generate_btn = st.button(
+        "\U0001F3A8 Generate Worksheets",
+        use_container_width=True,
+        type="primary",
+        key="generate_btn",
+    )
 
 # ─── Preview Helpers ──────────────────────────────────────────────────────────
 
@@ -924,83 +633,27 @@ def render_content_preview(content, ws_type):
             st.markdown(f"- {c}")
 
 
-def generate_for_level(ws_type_key, content, level, theme_key, objective_text,
-                       extra_spacing, eal_glossary, show_answers=False):
-    """Generate a single worksheet for one differentiation level."""
-    generator = GENERATOR_MAP[ws_type_key]
-    return generator(
-        content=content,
-        theme_key=theme_key,
-        level=level,
-        objective=objective_text,
-        extra_spacing=extra_spacing,
-        eal_glossary=eal_glossary,
-        show_answers=show_answers,
-    )
-
-
 def build_and_download(params):
     """Phase 3: Build Word documents from stored content and show download buttons."""
-    generated_files = {}
+    with span("app.build_and_download", worksheet_type=params['ws_type_key']):
+        _build_and_download(params)
 
+
+def _build_and_download(params):
     progress_bar = st.progress(0)
     status_text = st.empty()
-    items = list(st.session_state.generated_content.items())
-    total = len(items) * (2 if params['include_answer_key'] else 1)
-    step = 0
 
-    for level, content in items:
-        level_label = DIFF_LEVELS[level]['label']
-
-        # Build student worksheet
+    def _show_progress(step, total, label):
+        icon = '\U0001F4CB' if label.endswith('Answer Key') else '\U0001F4C4'
         status_text.markdown(
-            f'<div class="generating">\U0001F4C4 Building <b>{level_label}</b> worksheet...</div>',
+            f'<div class="generating">{icon} Built <b>{label}</b> ({step}/{total})</div>',
             unsafe_allow_html=True,
         )
-        step += 1
         progress_bar.progress(step / total)
 
-        doc_buffer = generate_for_level(
-            params['ws_type_key'], content, level,
-            params['theme_key'], params['effective_objective'],
-            params['extra_spacing'], params['eal_glossary'],
-        )
-        if doc_buffer:
-            filename = (
-                f"{params['year_group']}_{params['topic_for_filename']}"
-                f"_{params['worksheet_type']}_{level}.docx"
-            ).replace(" ", "_")
-            generated_files[level] = {
-                'buffer': doc_buffer,
-                'filename': filename,
-                'label': level_label,
-            }
-
-        # Build answer key if requested
-        if params['include_answer_key']:
-            status_text.markdown(
-                f'<div class="generating">\U0001F4CB Building <b>{level_label}</b> answer key...</div>',
-                unsafe_allow_html=True,
-            )
-            step += 1
-            progress_bar.progress(step / total)
-
-            answer_buffer = generate_for_level(
-                params['ws_type_key'], content, level,
-                params['theme_key'], params['effective_objective'],
-                params['extra_spacing'], params['eal_glossary'],
-                show_answers=True,
-            )
-            if answer_buffer:
-                answer_filename = (
-                    f"{params['year_group']}_{params['topic_for_filename']}"
-                    f"_{params['worksheet_type']}_{level}_ANSWER_KEY.docx"
-                ).replace(" ", "_")
-                generated_files[f'{level}_answer'] = {
-                    'buffer': answer_buffer,
-                    'filename': answer_filename,
-                    'label': f'{level_label} - Answer Key',
-                }
+    generated_files = build_documents(
+        params, st.session_state.generated_content, on_progress=_show_progress,
+    )
 
     progress_bar.progress(1.0)
     status_text.empty()
@@ -1018,26 +671,18 @@ def build_and_download(params):
     )
 
     if len(generated_files) > 1:
-        # Create ZIP of all files
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for file_info in generated_files.values():
-                file_info['buffer'].seek(0)
-                zf.writestr(file_info['filename'], file_info['buffer'].read())
-        zip_buffer.seek(0)
-
-        zip_filename = (
-            f"{params['year_group']}_{params['topic_for_filename']}"
-            f"_{params['worksheet_type']}_All.zip"
-        ).replace(" ", "_")
+        # The ZIP of all files is only built if the teacher clicks, when Streamlit
+        # calls ``data`` to serve the download
+        zip_filename = pack_filename(params)
         st.download_button(
             label=f"\U0001F4E6 Download All ({len(generated_files)} documents as ZIP)",
-            data=zip_buffer,
+            data=lambda: build_zip(generated_files).read(),
             file_name=zip_filename,
             mime="application/zip",
             use_container_width=True,
             type="primary",
             key="download_all",
+            on_click="ignore",
         )
 
         st.markdown("**Or download individually:**")
@@ -1064,9 +709,46 @@ def build_and_download(params):
                     file_name=file_info['filename'],
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                     use_container_width=True,
+                    on_click="ignore",
                 )
 
 
+@st.fragment(key="build_actions")
+def build_actions(params):
+    """Regenerate / Build buttons and the downloads, rerun without redrawing the preview."""
+    col_regen, col_build = st.columns(2)
+    with col_regen:
+        if st.button("\U0001F504 Regenerate", use_container_width=True, key="regenerate_btn"):
+            st.session_state.preview_ready = False
+            st.session_state.generated_content = {}
+            st.session_state.regenerate_requested = True
+            st.rerun()
+    with col_build:
+        build_clicked = st.button(
+            "\U0001F4C4 Build Documents", use_container_width=True, type="primary", key="build_btn",
+        )
+    if build_clicked:
+        build_and_download(params)
+
+
+def _generate_levels_in_background(params, events, use_cache):
+    """Generate every level concurrently, posting stream and completion events to ``events``.
+
+    Events are ``('element', level, path, value)`` for each streamed element,
+    ``('done', level, content, error)`` when a level finishes, and a final ``None``.
+    """
+    try:
+        with span("app.generate", worksheet_type=params['ws_type_key']):
+            for level, content, error in generate_contents(
+                params,
+                use_cache=use_cache,
+                on_element=lambda level, path, value: events.put(('element', level, path, value)),
+            ):
+                events.put(('done', level, content, error))
+    finally:
+        events.put(None)
+
+
 # ─── Generation Flow ──────────────────────────────────────────────────────────
 
 # Phase 1: Generate content with LLM (triggered by Generate button or Regenerate)
@@ -1081,33 +763,25 @@ if generate_btn or _regenerating:
         levels_to_generate = params['levels']
     else:
         # Fresh generation — build params from sidebar
-        ws_type_key = worksheet_type_key
-        age_range = YEAR_AGES[year_group]
-
-        if generate_all:
-            levels_to_generate = list(DIFF_LEVELS.keys())
-        else:
-            levels_to_generate = [selected_level]
+        ws_type_key = lesson['worksheet_type_key']
+        levels_to_generate = options['levels']
 
         # Store params for later phases
-        topic_for_filename = custom_topic.strip() if custom_topic.strip() else topic
-        st.session_state.generation_params = {
-            'ws_type_key': ws_type_key,
-            'year_group': year_group,
-            'subject': subject,
-            'effective_topic': effective_topic,
-            'effective_objective': effective_objective,
-            'topic_for_filename': topic_for_filename,
-            'age_range': age_range,
-            'theme_key': theme_key,
-            'theme_name': theme['name'],
-            'theme_icon': theme['icon'],
-            'worksheet_type': worksheet_type,
-            'extra_spacing': extra_spacing,
-            'eal_glossary': eal_glossary,
-            'include_answer_key': include_answer_key,
-            'levels': levels_to_generate,
-        }
+        st.session_state.generation_params = make_params(
+            subject=lesson['subject'],
+            year_group=lesson['year_group'],
+            worksheet_type=ws_type_key,
+            strand=lesson['strand'],
+            topic=lesson['topic'],
+            theme_key=lesson['theme_key'],
+            levels=levels_to_generate,
+            custom_topic=lesson['custom_topic'],
+            custom_objective=lesson['custom_objective'],
+            extra_spacing=options['extra_spacing'],
+            eal_glossary=options['eal_glossary'],
+            include_answer_key=options['include_answer_key'],
+            offline=options['offline'],
+        )
 
     params = st.session_state.generation_params
 
@@ -1119,48 +793,86 @@ if generate_btn or _regenerating:
     status_text = st.empty()
 
     try:
-        for i, level in enumerate(levels_to_generate):
+        level_labels = ', '.join(DIFF_LEVELS[level]['label'] for level in levels_to_generate)
+        status_text.markdown(
+            f'<div class="generating">\U0001F916 Generating content for <b>{level_labels}</b>... '
+            f'({"building" if params.get("offline") else "asking Claude to create"} '
+            f'{params["worksheet_type"].lower()} content)</div>',
+            unsafe_allow_html=True,
+        )
+
+        # All levels are requested in parallel and streamed. Worker threads cannot
+        # touch Streamlit elements, so they post events to a queue that this
+        # script thread drains to update progress and the live previews.
+        events = queue.Queue()
+        threading.Thread(
+            target=_generate_levels_in_background,
+            # Regenerate must bypass the response cache to get fresh content
+            args=(params, events, not _regenerating),
+            daemon=True,
+        ).start()
+
+        live_previews = {}
+        for level in levels_to_generate:
+            with st.expander(f"{DIFF_LEVELS[level]['label']} \u2014 live preview", expanded=True):
+                live_previews[level] = st.empty()
+        partial_content = {level: {} for level in levels_to_generate}
+
+        failed_levels = []
+        done = 0
+        while True:
+            try:
+                event = events.get(timeout=1.0)
+            except queue.Empty:
+                # Nothing yet: say so if the shared scheduler is holding requests back
+                scheduler = get_scheduler_stats()
+                if scheduler['queue_depth'] or scheduler['paused_seconds']:
+                    status_text.markdown(
+                        f'<div class="generating">\u23F3 Claude is busy \u2014 waiting for a free slot '
+                        f'({scheduler["queue_depth"]} request(s) queued)...</div>',
+                        unsafe_allow_html=True,
+                    )
+                continue
+            if event is None:
+                break
+            kind, level = event[0], event[1]
             level_label = DIFF_LEVELS[level]['label']
 
-            status_text.markdown(
-                f'<div class="generating">\U0001F916 Generating content for <b>{level_label}</b>... '
-                f'(asking Claude to create {params["worksheet_type"].lower()} content)</div>',
-                unsafe_allow_html=True,
-            )
-            progress_bar.progress((i + 1) / len(levels_to_generate))
-
-            prompt = get_prompt(
-                worksheet_type=params['ws_type_key'],
-                year_group=params['year_group'],
-                topic=params['effective_topic'],
-                objective=params['effective_objective'],
-                age_range=params['age_range'],
-                theme_name=params['theme_name'],
-                theme_icon=params['theme_icon'],
-                level=level,
-                subject=params.get('subject', 'English'),
-            )
+            if kind == 'element':
+                apply_stream_element(partial_content[level], event[2], event[3])
+                with live_previews[level].container():
+                    render_content_preview(partial_content[level], params['ws_type_key'])
+                continue
 
-            # Longer prompts need more tokens
-            max_tok = 6144 if params['ws_type_key'] in (
-                'reading_comprehension', 'problem_solving', 'investigation'
-            ) else 4096
-            content = generate_worksheet_content(
-                prompt, max_tokens=max_tok,
-                subject=params.get('subject', 'English'),
-            )
+            _, _, content, error = event
+            done += 1
+            progress_bar.progress(done / len(levels_to_generate))
 
             if content:
                 st.session_state.generated_content[level] = content
             else:
-                st.error(f"Failed to generate content for {level_label}. Please try again.")
+                failed_levels.append(level_label)
+                reason = f" ({error})" if error else ""
+                st.error(f"Failed to generate content for {level_label}{reason}. Please try again.")
+
+        # Keep preview order stable regardless of completion order
+        st.session_state.generated_content = {
+            level: st.session_state.generated_content[level]
+            for level in levels_to_generate
+            if level in st.session_state.generated_content
+        }
 
         progress_bar.progress(1.0)
         status_text.empty()
 
-        if st.session_state.generated_content:
+        if st.session_state.generated_content and not failed_levels:
             st.session_state.preview_ready = True
             st.rerun()
+        elif st.session_state.generated_content:
+            # Partial success: keep the finished levels; the errors above stay visible
+            # until the teacher clicks through, which reruns straight into the preview
+            st.session_state.preview_ready = True
+            st.button("\U0001F50D Preview generated levels", key="preview_partial_btn")
         else:
             st.error("No content was generated. Please check your API key and try again.")
 
@@ -1192,17 +904,7 @@ elif st.session_state.preview_ready and st.session_state.generated_content:
         ):
             render_content_preview(content, params['ws_type_key'])
 
-    # Action buttons
-    col_regen, col_build = st.columns(2)
-    with col_regen:
-        if st.button("\U0001F504 Regenerate", use_container_width=True, key="regenerate_btn"):
-            st.session_state.preview_ready = False
-            st.session_state.generated_content = {}
-            st.session_state.regenerate_requested = True
-            st.rerun()
-    with col_build:
-        if st.button("\U0001F4C4 Build Documents", use_container_width=True, type="primary", key="build_btn"):
-            build_and_download(params)
+    build_actions(params)
 
 
 # Welcome state
@@ -1279,7 +981,7 @@ else:
 
     from generators.styles import WORD_TYPES
     # Show word types for the currently selected subject
-    current_wt_keys = subject_config.get("word_types", [])
+    current_wt_keys = SUBJECT_REGISTRY[lesson['subject']].get("word_types", [])
     wt_items = [(k, WORD_TYPES[k]) for k in current_wt_keys if k in WORD_TYPES]
     if not wt_items:
         wt_items = list(WORD_TYPES.items())[:6]
@@ -0,0 +1 @@
+"""Performance benchmarks for worksheet generation. Run each module with ``python -m``."""
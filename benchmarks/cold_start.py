@@ -0,0 +1,163 @@
+"""
+Cold-start profile and budget for the Streamlit app.
+
+Starts a fresh Python process, imports Streamlit, then runs app.py once
+through AppTest: the work a new replica does before it can paint the
+first page. It reports how long that first run of app.py took, which
+modules it imported (from ``python -X importtime``, counting only
+imports made by the app, not by Streamlit itself), and whether any
+module that should only load when first used (the Anthropic SDK,
+python-docx, the generator modules) was imported.
+
+With ``--check`` it exits with status 1 if the median first run is over
+the budget or a deferred module was imported, so it can gate CI or an
+image build.
+
+Usage:
+    python -m benchmarks.cold_start [--runs 5] [--budget-ms 400] [--top 15]
+        [--app app.py] [--check] [--json PATH]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# Median first run of app.py allowed by --check
+DEFAULT_BUDGET_MS = 400.0
+
+# Modules the first page must not import: they load when first used
+DEFERRED_MODULES = (
+    "anthropic", "httpx", "docx", "lxml", "llm.client",
+    *(f"generators.{name}" for name in (
+        "components", "cloze", "word_bank", "matching", "sentence_builder", "reading_comprehension",
+        "problem_solving", "calculation_practice", "investigation", "fraction_practice", "times_tables",
+    )),
+)
+
+MARKER = "--- app first run ---"
+
+# Run in the child process: everything before MARKER is Streamlit's own start-up
+_CHILD = f"""
+import sys, time, json
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+before = set(sys.modules)
+sys.stderr.write({MARKER!r} + "\\n")
+sys.stderr.flush()
+started = time.perf_counter()
+at.run()
+seconds = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": seconds,
+    "imported": sorted(set(sys.modules) - before),
+    "errors": [str(e.value) for e in at.exception],
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Return ``{module: (self_us, cumulative_us)}`` for imports after MARKER.
+
+    Args:
+        stderr: The child's stderr with ``-X importtime`` output.
+    """
+    modules, seen_marker = {}, False
+    for line in stderr.splitlines():
+        if line.strip() == MARKER:
+            seen_marker = True
+            continue
+        if not seen_marker or not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def cold_start(app_path):
+    """
+    Run app.py once in a fresh interpreter.
+
+    Returns:
+        Dictionary with ``seconds`` (first run of the app), ``imported``
+        (modules the run imported), ``profile`` (``parse_importtime``
+        output) and ``errors`` (exceptions shown on the page).
+
+    Raises:
+        RuntimeError: If the child process fails.
+    """
+    env = {**os.environ, "STREAMLIT_LOGGER_LEVEL": "error"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, app_path],
+        capture_output=True, text=True, cwd=os.path.dirname(app_path), env=env, timeout=300,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Cold start failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["profile"] = parse_importtime(proc.stderr)
+    return result
+
+
+def deferred_imports(imported):
+    """Return the entries of DEFERRED_MODULES that ``imported`` loaded, or a submodule of."""
+    return [
+        deferred for deferred in DEFERRED_MODULES
+        if any(name == deferred or name.startswith(deferred + ".") for name in imported)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the app's cold start and check it against a budget.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to start")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Median first run of app.py allowed by --check")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+    parser.add_argument("--app", default=APP_PATH, help="App script to start")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if over budget or a deferred module was imported")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to PATH")
+    args = parser.parse_args(argv)
+
+    runs = [cold_start(os.path.abspath(args.app)) for _ in range(args.runs)]
+    median_ms = statistics.median(r["seconds"] for r in runs) * 1000
+    last = runs[-1]
+    deferred = deferred_imports(last["imported"])
+
+    # Top-level imports made by the app (nested ones are included in their parent's time)
+    profile = last["profile"]
+    top_level = sorted(
+        ((name, cumulative) for name, (_, cumulative) in profile.items() if "." not in name),
+        key=lambda item: item[1], reverse=True,
+    )
+    print(f"First run of {os.path.basename(args.app)} in a fresh process ({args.runs} runs):")
+    print(f"  median {median_ms:.0f} ms, min {min(r['seconds'] for r in runs) * 1000:.0f} ms, "
+          f"max {max(r['seconds'] for r in runs) * 1000:.0f} ms")
+    print(f"  {len(last['imported'])} modules imported, {sum(s for s, _ in profile.values()) / 1000:.0f} ms importing")
+    print(f"\n  {'package':<32} {'cumulative ms':>14}")
+    for name, cumulative in top_level[:args.top]:
+        print(f"  {name:<32} {cumulative / 1000:14.1f}")
+
+    errors = [e for r in runs for e in r["errors"]]
+    for error in errors[:1]:
+        print(f"\nThe app raised: {error}")
+    over = median_ms > args.budget_ms
+    print(f"\nBudget {args.budget_ms:.0f} ms: {'OVER' if over else 'ok'}")
+    print(f"Deferred modules imported: {', '.join(deferred) if deferred else 'none'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "args": vars(args), "median_ms": round(median_ms, 1), "deferred_imported": deferred,
+                "runs_ms": [round(r["seconds"] * 1000, 1) for r in runs],
+                "imports": {name: {"self_us": s, "cumulative_us": c} for name, (s, c) in profile.items()},
+            }, f, indent=2)
+    return 1 if args.check and (over or deferred or errors) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
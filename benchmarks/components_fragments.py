@@ -0,0 +1,134 @@
+"""
+Micro-benchmark for the pre-parsed XML fragments in generators.components.
+
+Builds the 40-fact times tables fixture repeatedly with the current
+helpers and with the previous ones (a ``parse_xml`` per call, python-docx
+property setters and a ``findall`` sweep on every cell and run), and
+reports the per-document time of each.
+
+Usage:
+    python -m benchmarks.components_fragments [--repeat 50]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from contextlib import ExitStack
+from unittest import mock
+
+from docx.shared import Pt
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+from generators import components
+from generators.styles import FONT_NAME
+from generators.times_tables import generate_times_tables_worksheet
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "times_tables.json")
+
+
+# ─── Previous implementations ──────────────────────────────────────────────────
+
+
+def _replace(parent, tag, element, index=None):
+    for e in parent.findall(f'{{{parent.nsmap["w"]}}}{tag}'):
+        parent.remove(e)
+    if index is None:
+        parent.append(element)
+    else:
+        parent.insert(index, element)
+
+
+def legacy_set_run_font(run, font_name=FONT_NAME, size=Pt(14), bold=False, italic=False, colour=None):
+    run.font.name = font_name
+    run.font.size = size
+    run.font.bold = bold
+    run.font.italic = italic
+    if colour:
+        run.font.color.rgb = colour
+    rPr = run._element.get_or_add_rPr()
+    _replace(rPr, 'rFonts', parse_xml(
+        f'<w:rFonts {nsdecls("w")} w:ascii="{font_name}" w:hAnsi="{font_name}" w:cs="{font_name}"/>'
+    ), index=0)
+
+
+def legacy_set_cell_shading(cell, colour_hex):
+    _replace(cell._tc.get_or_add_tcPr(), 'shd', parse_xml(
+        f'<w:shd {nsdecls("w")} w:fill="{colour_hex}" w:val="clear"/>'
+    ))
+
+
+def legacy_set_cell_borders(cell, colour_hex, sz=8):
+    sides = ''.join(
+        f'<w:{side} w:val="single" w:sz="{sz}" w:space="0" w:color="{colour_hex}"/>'
+        for side in ('top', 'left', 'bottom', 'right')
+    )
+    _replace(cell._tc.get_or_add_tcPr(), 'tcBorders', parse_xml(
+        f'<w:tcBorders {nsdecls("w")}>{sides}</w:tcBorders>'
+    ))
+
+
+def legacy_set_cell_padding(cell, top=0, bottom=0, left=0, right=0):
+    _replace(cell._tc.get_or_add_tcPr(), 'tcMar', parse_xml(
+        f'<w:tcMar {nsdecls("w")}><w:top w:w="{top}" w:type="dxa"/><w:left w:w="{left}" w:type="dxa"/>'
+        f'<w:bottom w:w="{bottom}" w:type="dxa"/><w:right w:w="{right}" w:type="dxa"/></w:tcMar>'
+    ))
+
+
+LEGACY = {
+    'set_run_font': legacy_set_run_font,
+    'set_cell_shading': legacy_set_cell_shading,
+    'set_cell_borders': legacy_set_cell_borders,
+    'set_cell_padding': legacy_set_cell_padding,
+    'xml_fragment': parse_xml,
+}
+
+
+def _legacy_helpers(stack):
+    """Patch the previous helpers into every loaded generator module."""
+    for name, module in list(sys.modules.items()):
+        if not name.startswith('generators.'):
+            continue
+        for attr, replacement in LEGACY.items():
+            if hasattr(module, attr):
+                stack.enter_context(mock.patch.object(module, attr, replacement))
+
+
+# ─── Benchmark ─────────────────────────────────────────────────────────────────
+
+
+def _time_builds(content, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        generate_times_tables_worksheet(content=content, level="expected", show_answers=True)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pre-parsed XML fragments.")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        content = json.load(f)
+
+    _time_builds(content, 3)  # warm imports and the fragment cache
+    with ExitStack() as stack:
+        _legacy_helpers(stack)
+        _time_builds(content, 3)
+        before_ms = _time_builds(content, args.repeat)
+    after_ms = _time_builds(content, args.repeat)
+
+    print(f"previous helpers:   {before_ms:7.2f} ms/document (median of {args.repeat})")
+    print(f"cached fragments:   {after_ms:7.2f} ms/document (median of {args.repeat})")
+    print(f"speedup:            {before_ms / after_ms:7.2f}x")
+    print(f"distinct fragments: {components._parsed_fragment.cache_info().currsize}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Benchmark every worksheet generator across levels, options and content sizes.
+
+Each ``GENERATOR_MAP`` entry renders its checked-in fixture (one per
+worksheet type in ``benchmarks/fixtures``) at every differentiation
+level, with and without the answer key, plain and with the accessibility
+options (extra_spacing + eal_glossary), at two sizes:
+
+- ``fixture``: the fixture as a typical Claude response;
+- ``large``: the fixture's lists tiled up to the sizes in LARGE (200 times
+  table facts, 50 matching pairs, ...), to show how a generator scales.
+
+For every case it reports the median wall time, the peak Python heap
+(``tracemalloc``: this includes zlib's buffers while the .docx is
+compressed, which dominate at these sizes, but not lxml's own
+allocations) and the .docx size, and compares them with the stored
+baseline. Timings are machine dependent, so record a baseline on the
+machine you compare on.
+
+Usage:
+    python -m benchmarks.generators [--types cloze,matching] [--sizes fixture,large]
+        [--themes classic|all] [--repeat 3] [--baseline PATH] [--save-baseline]
+        [--tolerance 0.25] [--check]
+"""
+
+import os
+import io
+import sys
+import copy
+import json
+import time
+import argparse
+import itertools
+import statistics
+import tracemalloc
+
+from generators import GENERATOR_MAP
+from generators.styles import DIFF_LEVELS, THEMES
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "generators.json")
+
+OBJECTIVE = "To practise the skills from this half term's lessons."
+
+# Lists tiled for the "large" size: dotted path ("*" = every item) -> total items
+LARGE = {
+    "times_tables": {"sections.*.facts": 200},
+    "matching": {"activities.*.pairs": 50},
+    "calculation_practice": {"sections.*.calculations": 100},
+    "fraction_practice": {"sections.*.exercises": 90},
+    "cloze": {"sections.*.paragraphs": 24},
+    "word_bank": {"categories.*.words": 60, "activities.*.sentences": 30},
+    "sentence_builder": {"exercises": 40},
+    "problem_solving": {"questions": 40, "scenario.data": 30},
+    "reading_comprehension": {"questions": 40, "vocabulary": 20},
+    "investigation": {"equipment": 20, "method": 20},
+}
+
+# Relative growth in any metric that counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+OPTIONS = {
+    "plain": {"extra_spacing": False, "eal_glossary": False},
+    "accessible": {"extra_spacing": True, "eal_glossary": True},
+}
+
+
+# ─── Fixtures ──────────────────────────────────────────────────────────────────
+
+
+def load_fixture(ws_type):
+    """Return the checked-in fixture content for one worksheet type."""
+    with open(os.path.join(FIXTURE_DIR, f"{ws_type}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _lists_at(node, parts):
+    if not parts:
+        return [node] if isinstance(node, list) else []
+    head, rest = parts[0], parts[1:]
+    if head == "*":
+        return [found for item in node for found in _lists_at(item, rest)]
+    if isinstance(node, dict) and head in node:
+        return _lists_at(node[head], rest)
+    return []
+
+
+def scale_content(content, targets):
+    """
+    Return a copy of ``content`` with lists tiled up to the given totals.
+
+    Args:
+        content: Worksheet content.
+        targets: Dotted path to a list (``*`` matches every item of a list)
+            -> total items wanted, shared evenly between every matching list.
+
+    Returns:
+        The scaled copy. Numbered items (``number``) are renumbered.
+    """
+    scaled = copy.deepcopy(content)
+    for path, total in targets.items():
+        lists = [items for items in _lists_at(scaled, path.split(".")) if items]
+        for i, items in enumerate(lists):
+            want = total // len(lists) + (1 if i < total % len(lists) else 0)
+            original = list(items)
+            items[:] = [copy.deepcopy(item) for item in itertools.islice(itertools.cycle(original), want)]
+            for number, item in enumerate(items, start=1):
+                if isinstance(item, dict) and "number" in item:
+                    item["number"] = number
+    return scaled
+
+
+# ─── Measurement ───────────────────────────────────────────────────────────────
+
+
+def _render(ws_type, content, level, theme_key, show_answers, options):
+    return GENERATOR_MAP[ws_type](
+        content=content,
+        theme_key=theme_key,
+        level=level,
+        objective=OBJECTIVE,
+        show_answers=show_answers,
+        **options,
+    )
+
+
+def measure(ws_type, content, level, theme_key, show_answers, options, repeat):
+    """
+    Render one case ``repeat`` times, then once more under tracemalloc.
+
+    Returns:
+        Dictionary with ``ms`` (median wall time), ``peak_kb`` (peak
+        Python heap while rendering) and ``bytes`` (.docx size).
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        buffer = _render(ws_type, content, level, theme_key, show_answers, options)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        _render(ws_type, content, level, theme_key, show_answers, options)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ms": round(statistics.median(timings) * 1000, 2),
+        "peak_kb": round(peak / 1024, 1),
+        "bytes": buffer.getbuffer().nbytes if isinstance(buffer, io.BytesIO) else 0,
+    }
+
+
+def iter_cases(types, sizes, themes):
+    """Yield ``(case_id, ws_type, size, level, theme_key, show_answers, option)`` for the matrix."""
+    for ws_type in types:
+        for size, level, theme_key, show_answers, option in itertools.product(
+            sizes, DIFF_LEVELS, themes, (False, True), OPTIONS,
+        ):
+            answers = "answers" if show_answers else "worksheet"
+            case_id = f"{ws_type}/{size}/{level}/{theme_key}/{answers}/{option}"
+            yield case_id, ws_type, size, level, theme_key, show_answers, option
+
+
+# ─── Baseline ──────────────────────────────────────────────────────────────────
+
+
+def load_baseline(path):
+    """Return the stored results keyed by case id, or an empty dict."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["cases"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results):
+    """Store ``results`` as the new baseline, keeping cases this run did not cover."""
+    cases = load_baseline(path)
+    cases.update(results)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version.split()[0], "cases": dict(sorted(cases.items()))}, f, indent=1)
+        f.write("\n")
+
+
+def compare(result, baseline, tolerance):
+    """Return the names of the metrics in ``result`` that grew by more than ``tolerance``."""
+    if not baseline:
+        return []
+    return [
+        metric for metric in ("ms", "peak_kb", "bytes")
+        if baseline.get(metric) and result[metric] > baseline[metric] * (1 + tolerance)
+    ]
+
+
+# ─── Report ────────────────────────────────────────────────────────────────────
+
+
+def _change(value, before):
+    if not before:
+        return "     new"
+    return f"{(value - before) / before * 100:+7.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the worksheet generators.")
+    parser.add_argument("--types", default=",".join(GENERATOR_MAP), help="Comma-separated worksheet types")
+    parser.add_argument("--sizes", default="fixture,large", help="Comma-separated sizes: fixture, large")
+    parser.add_argument("--themes", default="classic", help="Comma-separated theme keys, or 'all'")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed renders per case")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative growth that counts as a regression")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if anything regressed")
+    args = parser.parse_args(argv)
+
+    types = args.types.split(",")
+    sizes = args.sizes.split(",")
+    themes = list(THEMES) if args.themes == "all" else args.themes.split(",")
+    for name, given, valid in (("worksheet types", types, GENERATOR_MAP), ("sizes", sizes, ("fixture", "large")),
+                               ("themes", themes, THEMES)):
+        unknown = [value for value in given if value not in valid]
+        if unknown:
+            parser.error(f"Unknown {name}: {unknown}. Valid {name} are: {list(valid)}")
+
+    contents = {}
+    for ws_type in types:
+        fixture = load_fixture(ws_type)
+        contents[ws_type] = {"fixture": fixture, "large": scale_content(fixture, LARGE[ws_type])}
+        _render(ws_type, fixture, "expected", "classic", False, OPTIONS["plain"])  # warm caches
+
+    baseline = load_baseline(args.baseline)
+    results, regressions = {}, []
+    print(f"{'case':<72} {'ms':>8} {'change':>8} {'peak KB':>9} {'docx KB':>8}")
+    for case_id, ws_type, size, level, theme_key, show_answers, option in iter_cases(types, sizes, themes):
+        result = measure(
+            ws_type, contents[ws_type][size], level, theme_key, show_answers, OPTIONS[option], args.repeat,
+        )
+        results[case_id] = result
+        before = baseline.get(case_id)
+        worse = compare(result, before, args.tolerance)
+        if worse:
+            regressions.append((case_id, worse))
+        print(
+            f"{case_id:<72} {result['ms']:8.2f} {_change(result['ms'], (before or {}).get('ms')):>8} "
+            f"{result['peak_kb']:9.1f} {result['bytes'] / 1024:8.1f}{'  REGRESSED: ' + ', '.join(worse) if worse else ''}"
+        )
+
+    print(f"\n{len(results)} cases, total {sum(r['ms'] for r in results.values()) / 1000:.2f}s per pass")
+    for ws_type in types:
+        for size in sizes:
+            rows = [r for case_id, r in results.items() if case_id.startswith(f"{ws_type}/{size}/")]
+            print(
+                f"  {ws_type:<22} {size:<8} median {statistics.median(r['ms'] for r in rows):7.2f} ms, "
+                f"max peak {max(r['peak_kb'] for r in rows):8.1f} KB, "
+                f"max docx {max(r['bytes'] for r in rows) / 1024:6.1f} KB"
+            )
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.tolerance:.0%} against {args.baseline}")
+    elif baseline:
+        print(f"\nNo regressions against {args.baseline}")
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
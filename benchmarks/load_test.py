@@ -0,0 +1,360 @@
+"""
+Concurrent-session load test for the Streamlit app.
+
+Drives N virtual teachers through the app at once with Streamlit's
+AppTest, all in this process so they share one set of clients, request
+scheduler, response cache and build pool, as sessions on one server do.
+Each teacher opens the app, picks a subject, year group and worksheet
+type in the sidebar, clicks Generate, then Build Documents. Claude is
+replaced by the mock Messages API (``benchmarks.mock_api``) with a
+configurable latency, so runs are reproducible and need no network.
+
+For each N in ``--sessions`` it reports per-phase latency percentiles,
+journeys and documents per minute, failures, and the CPU and RSS of
+this process plus its build workers, sampled while the sessions run.
+
+Usage:
+    python -m benchmarks.load_test [--sessions 1,2,4,8] [--journeys 1]
+        [--latency lognormal:2,0.4] [--tokens-per-second 150] [--reject 0]
+        [--rpm 50] [--tpm 400000] [--cache] [--seed 1] [--json results.json]
+
+Generate latency includes time queued in the app's request scheduler;
+pass --rpm to model the rate limit of the API key you deploy with.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+PHASES = ("open", "select", "generate", "build")
+
+# Seconds between CPU / RSS samples
+SAMPLE_INTERVAL = 0.5
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+# ─── Resource Sampling ─────────────────────────────────────────────────────────
+
+
+def _process_usage(pid):
+    """Return ``(cpu_seconds, rss_bytes)`` for ``pid`` from /proc, or None if it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    cpu = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+    return cpu, resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class ResourceSampler:
+    """
+    Sample CPU and RSS of this process and its children (the build pool)
+    on a background thread.
+
+    CPU is reported as a percentage of one core, so 250 means two and a
+    half cores busy. Needs Linux's /proc; elsewhere nothing is sampled.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="load-test-sampler")
+        self._cpu = {}
+
+    def _total(self):
+        cpu_delta, rss = 0.0, 0
+        pids = [os.getpid()] + [child.pid for child in multiprocessing.active_children()]
+        for pid in pids:
+            usage = _process_usage(pid)
+            if usage is None:
+                continue
+            cpu_delta += usage[0] - self._cpu.get(pid, usage[0])
+            self._cpu[pid] = usage[0]
+            rss += usage[1]
+        return cpu_delta, rss
+
+    def _run(self):
+        self._total()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            cpu_delta, rss = self._total()
+            now = time.perf_counter()
+            self.samples.append((cpu_delta / (now - last) * 100, rss))
+            last = now
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self):
+        """Return ``{cpu_mean, cpu_max, rss_max_mb}`` over the samples taken."""
+        if not self.samples:
+            return {"cpu_mean": None, "cpu_max": None, "rss_max_mb": None}
+        cpu = [c for c, _ in self.samples]
+        return {
+            "cpu_mean": round(sum(cpu) / len(cpu), 1),
+            "cpu_max": round(max(cpu), 1),
+            "rss_max_mb": round(max(r for _, r in self.samples) / 2 ** 20, 1),
+        }
+
+
+# ─── Virtual Teacher ───────────────────────────────────────────────────────────
+
+
+def share_app_test_runtime():
+    """
+    Let AppTest runs overlap in threads.
+
+    Each ``AppTest.run`` installs its own mock of Streamlit's Runtime
+    singleton and clears it when it finishes, which breaks any other run
+    still in progress. Point ``Runtime.instance`` at one shared mock for
+    the whole load test instead, and keep ``global.appTest`` on
+    throughout rather than toggled per run. Each run also compiles the
+    script afresh, and concurrent compiles can fail inside CPython's AST
+    builder, so compile it once and share the bytecode.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit import config
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    # Setup and worker threads here have no script context by design; Streamlit resets logger
+    # levels when it loads its config, so filter rather than set a level
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        lambda record: record.levelno >= logging.ERROR
+    )
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.dataframe_source_mgr = DataframeSourceManager()
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    components = BidiComponentManager()
+    components.discover_and_register_components(start_file_watching=False)
+    shared.bidi_component_registry = components
+    Runtime.instance = classmethod(lambda cls: shared)
+    Runtime.exists = classmethod(lambda cls: True)
+    config.set_option("global.appTest", True)
+
+    compile_lock, compiled = threading.Lock(), {}
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = shared_bytecode
+
+
+def pick_journey(rng):
+    """Return a random ``(subject, year_group, worksheet type display name, answer_key)``."""
+    from curriculum import SUBJECT_REGISTRY, WORKSHEET_TYPE_DISPLAY
+
+    subject = rng.choice(list(SUBJECT_REGISTRY))
+    config = SUBJECT_REGISTRY[subject]
+    worksheet_types = [WORKSHEET_TYPE_DISPLAY[k] for k in config["worksheet_types"] if k in WORKSHEET_TYPE_DISPLAY]
+    return subject, rng.choice(config["years"]), rng.choice(worksheet_types), rng.random() < 0.5
+
+
+def _selectbox(at, label):
+    return next(box for box in at.sidebar.selectbox if label in box.label)
+
+
+def _errors(at):
+    return [e.value for e in at.error] + [str(e.value) for e in at.exception]
+
+
+def run_journey(journey, timeout):
+    """
+    Drive one teacher through open -> select -> generate -> build.
+
+    Returns:
+        Dictionary with per-phase ``seconds``, ``documents`` offered for
+        download and ``error`` (None on success).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    subject, year_group, worksheet_type, answer_key = journey
+    seconds = {}
+    result = {"journey": list(journey), "seconds": seconds, "documents": 0, "error": None}
+
+    def phase(name, action):
+        started = time.perf_counter()
+        at = action()
+        seconds[name] = time.perf_counter() - started
+        errors = _errors(at)
+        if errors:
+            raise RuntimeError(f"{name}: {errors[0]}")
+        return at
+
+    try:
+        at = phase("open", lambda: AppTest.from_file(APP_PATH, default_timeout=timeout).run())
+
+        def select():
+            _selectbox(at, "Subject").set_value(subject).run()
+            _selectbox(at, "Year Group").set_value(year_group).run()
+            _selectbox(at, "Worksheet Type").set_value(worksheet_type).run()
+            if answer_key:
+                next(c for c in at.sidebar.checkbox if "nswer" in c.label).check().run()
+            return at
+
+        phase("select", select)
+        phase("generate", lambda: at.button(key="generate_btn").click().run())
+        if not at.session_state.generated_content:
+            raise RuntimeError("generate: no content was generated")
+        phase("build", lambda: at.button(key="build_btn").click().run())
+        result["documents"] = len(at.get("download_button"))
+        if not result["documents"]:
+            raise RuntimeError("build: no documents were offered for download")
+    except Exception as e:  # noqa: BLE001 - tallied in the report
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run_level(sessions, journeys, rng, timeout):
+    """Run ``sessions`` teachers at once, each doing ``journeys`` journeys, and summarise."""
+    plans = [[pick_journey(rng) for _ in range(journeys)] for _ in range(sessions)]
+
+    def teacher(plan):
+        return [run_journey(journey, timeout) for journey in plan]
+
+    started = time.perf_counter()
+    with ResourceSampler() as sampler, ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = [r for teacher_results in pool.map(teacher, plans) for r in teacher_results]
+    elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r["error"] is None]
+    phases = {}
+    for name in PHASES:
+        values = [r["seconds"][name] for r in ok if name in r["seconds"]]
+        if values:
+            phases[name] = {
+                "p50": round(_percentile(values, 0.5), 3),
+                "p90": round(_percentile(values, 0.9), 3),
+                "p99": round(_percentile(values, 0.99), 3),
+                "max": round(max(values), 3),
+            }
+    return {
+        "sessions": sessions,
+        "journeys": len(results),
+        "failed": len(results) - len(ok),
+        "errors": sorted({r["error"] for r in results if r["error"]}),
+        "seconds": round(elapsed, 2),
+        "journeys_per_minute": round(len(ok) / elapsed * 60, 2),
+        "documents_per_minute": round(sum(r["documents"] for r in ok) / elapsed * 60, 2),
+        "phases": phases,
+        **sampler.summary(),
+    }
+
+
+# ─── Report ────────────────────────────────────────────────────────────────────
+
+
+def print_level(summary):
+    print(
+        f"\n{summary['sessions']} session(s): {summary['journeys'] - summary['failed']}/{summary['journeys']} "
+        f"journeys ok in {summary['seconds']:.1f}s, {summary['journeys_per_minute']:.1f} journeys/min, "
+        f"{summary['documents_per_minute']:.1f} documents/min"
+    )
+    if summary["cpu_mean"] is not None:
+        print(
+            f"  CPU {summary['cpu_mean']:.0f}% mean / {summary['cpu_max']:.0f}% max of one core, "
+            f"RSS {summary['rss_max_mb']:.0f} MB max (app + build workers)"
+        )
+    print(f"  {'phase':<10} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (seconds)")
+    for name, stats in summary["phases"].items():
+        print(f"  {name:<10} {stats['p50']:8.2f} {stats['p90']:8.2f} {stats['p99']:8.2f} {stats['max']:8.2f}")
+    for error in summary["errors"]:
+        print(f"  error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit app with concurrent sessions.")
+    parser.add_argument("--sessions", default="1,2,4,8", help="Comma-separated concurrent session counts")
+    parser.add_argument("--journeys", type=int, default=1, help="Journeys per session at each level")
+    parser.add_argument("--latency", default="lognormal:2,0.4", help="Mock API latency distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=150, help="Mock API streaming pace")
+    parser.add_argument("--reject", type=float, default=0.0, help="Share of mock API requests answered 429")
+    parser.add_argument("--rpm", type=float, help="Request scheduler requests-per-minute (default: the app's)")
+    parser.add_argument("--tpm", type=float, help="Request scheduler tokens-per-minute (default: the app's)")
+    parser.add_argument("--cache", action="store_true", help="Keep the response and render caches on (off by default)")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed for one app rerun")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to PATH")
+    args = parser.parse_args(argv)
+
+    from benchmarks.mock_api import MockMessagesAPI
+
+    try:
+        server = MockMessagesAPI(
+            recordings=tempfile.mkdtemp(prefix="load-test-"), latency=args.latency,
+            tokens_per_second=args.tokens_per_second, reject=args.reject, seed=args.seed,
+        ).start()
+    except ValueError as e:
+        parser.error(str(e))
+    os.environ["ANTHROPIC_API_KEY"] = "load-test-key"
+    os.environ["ANTHROPIC_BASE_URL"] = server.base_url
+    if not args.cache:
+        os.environ["WORKSHEET_CACHE_DISABLED"] = "1"
+    if args.rpm:
+        os.environ["CLAUDE_REQUESTS_PER_MINUTE"] = str(args.rpm)
+    if args.tpm:
+        os.environ["CLAUDE_TOKENS_PER_MINUTE"] = str(args.tpm)
+    # AppTest runs the script in bare mode, which Streamlit warns about on every run
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    os.chdir(os.path.dirname(APP_PATH))
+    share_app_test_runtime()
+
+    rng = random.Random(args.seed)
+    levels = []
+    try:
+        for sessions in (int(n) for n in args.sessions.split(",")):
+            summary = run_level(sessions, args.journeys, rng, args.timeout)
+            print_level(summary)
+            levels.append(summary)
+    finally:
+        server.shutdown()
+        from pipeline import executor
+        executor.shutdown()
+
+    print(f"\nmock API: {json.dumps(server.counts)}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": levels, "mock_api": server.counts}, f, indent=2)
+    return 1 if any(level["failed"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
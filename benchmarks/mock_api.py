@@ -0,0 +1,455 @@
+"""
+Local record/replay stand-in for the Anthropic Messages API.
+
+Serves ``POST /v1/messages`` on localhost so the app, the pipeline CLI or
+a load test can run end to end with no network and no spend. Point the
+client at it with ANTHROPIC_BASE_URL (the SDK reads it); any API key is
+accepted in replay mode.
+
+Responses are replayed from recordings keyed by a hash of the system
+prompt and the first user message, so a recording still matches when the
+model or the learned max_tokens change. A prompt with no recording is
+answered from ``benchmarks/fixtures`` by worksheet type (read from the
+prompt's opening line), so cache-busting load tests still get valid
+worksheets.
+
+Recording: with ``--record`` the server forwards each request it has no
+recording for to the real API (using the caller's key), stores the
+response, and answers the caller from it. Upstream calls are always made
+without streaming; streaming callers get the recording replayed as
+server-sent events, exactly as a replay would.
+
+Fault injection, all per request and independent:
+- ``--latency``: time to first byte, ``fixed:S``, ``uniform:A,B`` or
+  ``lognormal:MEDIAN,SIGMA`` seconds;
+- ``--tokens-per-second``: pacing of streamed text (0 sends it at once);
+- ``--reject``: share answered 429 with a Retry-After header, and
+  ``--server-rpm`` to also enforce a requests-per-minute limit;
+- ``--overload``: share answered 529 overloaded_error;
+- ``--hang``: share that never answer (the client's timeout fires);
+- ``--truncate``: share cut off halfway with stop_reason "max_tokens".
+  Responses longer than the request's max_tokens are always cut off there.
+
+Assistant prefill continuations are honoured: the reply is the rest of the
+recorded text after the prefill.
+
+Usage:
+    python -m benchmarks.mock_api [--port 8765] [--recordings DIR] [--record]
+        [--latency lognormal:2,0.5] [--tokens-per-second 120] [--reject 0.05]
+        [--overload 0.01] [--hang 0.01] [--truncate 0.05] [--seed 1]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DEFAULT_RECORDINGS = os.path.join(os.path.dirname(__file__), "recordings")
+DEFAULT_UPSTREAM = "https://api.anthropic.com"
+
+# Characters per token used for usage figures and max_tokens truncation
+CHARS_PER_TOKEN = 4
+
+# Characters per streamed text delta
+STREAM_CHUNK_CHARS = 24
+
+# Opening-line phrases of each prompt in llm.prompts -> fixture to answer unrecorded prompts with
+FALLBACK_PHRASES = {
+    "cloze (fill-in-the-blank) worksheet": "cloze",
+    "word bank worksheet": "word_bank",
+    "matching / connecting worksheet": "matching",
+    "sentence building worksheet": "sentence_builder",
+    "reading comprehension worksheet": "reading_comprehension",
+    "problem solving worksheet": "problem_solving",
+    "calculation practice worksheet": "calculation_practice",
+    "fraction practice worksheet": "fraction_practice",
+    "times tables drill worksheet": "times_tables",
+    "investigation planning worksheet": "investigation",
+}
+
+
+def prompt_key(request: dict) -> str:
+    """Return the replay key for a Messages request: a hash of its system and first user prompt."""
+    first = request["messages"][0]["content"]
+    if isinstance(first, list):
+        first = "".join(block.get("text", "") for block in first)
+    system = request.get("system") or ""
+    if isinstance(system, list):
+        system = "".join(block.get("text", "") for block in system)
+    return hashlib.sha256(f"{system}\n\n{first}".encode("utf-8")).hexdigest()[:32]
+
+
+def parse_latency(spec: str):
+    """
+    Parse a latency distribution spec into a zero-argument sampler.
+
+    Raises:
+        ValueError: If the spec is not ``fixed:S``, ``uniform:A,B`` or
+            ``lognormal:MEDIAN,SIGMA``.
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(v) for v in args.split(",")] if args else []
+    except ValueError:
+        values = None
+    if kind == "fixed" and values and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and values and len(values) == 2:
+        return lambda rng: rng.uniform(*values)
+    if kind == "lognormal" and values and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(
+        f"Unknown latency distribution: '{spec}'. Valid distributions are: "
+        "['fixed:S', 'uniform:A,B', 'lognormal:MEDIAN,SIGMA']"
+    )
+
+
+# ─── Recordings ────────────────────────────────────────────────────────────────
+
+
+class Recordings:
+    """
+    Prompt -> response pairs stored one JSON file per prompt key.
+
+    Args:
+        directory: Where recordings are read from and written to.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._fallbacks = {}
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the recorded response message for ``key``, or None."""
+        try:
+            with open(os.path.join(self.directory, f"{key}.json"), encoding="utf-8") as f:
+                return json.load(f)["response"]
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, request: dict, response: dict) -> None:
+        """Store a real response for the request that produced it."""
+        entry = {
+            "key": key,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "model": request.get("model"),
+            "system": request.get("system"),
+            "prompt": request["messages"][0]["content"],
+            "response": response,
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{key}.json")
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(entry, f, indent=1)
+            os.replace(f"{path}.tmp", path)
+
+    def fallback_text(self, request: dict) -> str:
+        """Return fixture JSON for the worksheet type named in the prompt's opening line."""
+        first = request["messages"][0]["content"]
+        opening = (first if isinstance(first, str) else json.dumps(first))[:300].lower()
+        ws_type = next((t for phrase, t in FALLBACK_PHRASES.items() if phrase in opening), "cloze")
+        with self._lock:
+            if ws_type not in self._fallbacks:
+                with open(os.path.join(FIXTURE_DIR, f"{ws_type}.json"), encoding="utf-8") as f:
+                    self._fallbacks[ws_type] = json.dumps(json.load(f), indent=2)
+            return self._fallbacks[ws_type]
+
+
+# ─── Server ────────────────────────────────────────────────────────────────────
+
+
+class MockMessagesAPI(ThreadingHTTPServer):
+    """
+    The mock Messages API server. Start it with ``serve_forever`` (or
+    ``start`` for a daemon thread); ``base_url`` is what ANTHROPIC_BASE_URL
+    should be set to.
+
+    Args:
+        recordings: Directory of recordings.
+        port: Port to listen on (0 picks a free one).
+        record: Forward unrecorded prompts upstream and record the replies.
+        upstream: The real API's base URL for recording.
+        latency: Latency distribution spec (see ``parse_latency``).
+        tokens_per_second: Streamed text pacing; 0 streams it at once.
+        reject: Share of requests answered 429.
+        server_rpm: Requests per minute accepted before answering 429, or 0.
+        retry_after: Retry-After seconds sent with a 429.
+        overload: Share of requests answered 529.
+        hang: Share of requests that never answer.
+        truncate: Share of responses cut off halfway at "max_tokens".
+        seed: Seed for the fault and latency draws.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        recordings: str = DEFAULT_RECORDINGS,
+        port: int = 0,
+        record: bool = False,
+        upstream: str = DEFAULT_UPSTREAM,
+        latency: str = "fixed:0",
+        tokens_per_second: float = 0,
+        reject: float = 0.0,
+        server_rpm: float = 0,
+        retry_after: float = 1.0,
+        overload: float = 0.0,
+        hang: float = 0.0,
+        truncate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.recordings = Recordings(recordings)
+        self.record = record
+        self.upstream = upstream.rstrip("/")
+        self.latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.reject = reject
+        self.interval = 60.0 / server_rpm if server_rpm else 0.0
+        self.retry_after = retry_after
+        self.overload = overload
+        self.hang = hang
+        self.truncate = truncate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.next_allowed = 0.0
+        self.counts = {
+            "requests": 0, "replayed": 0, "recorded": 0, "fallback": 0, "streamed": 0,
+            "rejected": 0, "overloaded": 0, "hung": 0, "truncated": 0,
+        }
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> "MockMessagesAPI":
+        """Serve from a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True, name="mock-messages-api").start()
+        return self
+
+    def shutdown(self) -> None:
+        self.stopping.set()
+        super().shutdown()
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counts[name] += 1
+
+    def draw(self) -> dict:
+        """Decide this request's fate: latency and which faults (if any) apply."""
+        with self.lock:
+            now = time.monotonic()
+            limited = bool(self.interval) and now < self.next_allowed
+            if self.interval and not limited:
+                self.next_allowed = max(now, self.next_allowed) + self.interval
+            return {
+                "latency": max(0.0, self.latency(self.rng)),
+                "reject": limited or self.rng.random() < self.reject,
+                "overload": self.rng.random() < self.overload,
+                "hang": self.rng.random() < self.hang,
+                "truncate": self.rng.random() < self.truncate,
+            }
+
+    def message_text(self, request: dict, api_key: str) -> str:
+        """Return the full response text for ``request``: recorded, freshly recorded or fallback."""
+        key = prompt_key(request)
+        recorded = self.recordings.get(key)
+        if recorded is None and self.record:
+            recorded = self._fetch_upstream(request, api_key)
+            self.recordings.put(key, request, recorded)
+            self.count("recorded")
+        elif recorded is not None:
+            self.count("replayed")
+        if recorded is None:
+            self.count("fallback")
+            return self.recordings.fallback_text(request)
+        return "".join(block.get("text", "") for block in recorded["content"] if block["type"] == "text")
+
+    def _fetch_upstream(self, request: dict, api_key: str) -> dict:
+        import httpx
+
+        # Record the original prompt, not a continuation of it
+        body = {**request, "stream": False, "messages": request["messages"][:1]}
+        response = httpx.post(
+            f"{self.upstream}/v1/messages",
+            json=body,
+            headers={"x-api-key": api_key, "anthropic-version": "2023-06-01"},
+            timeout=600,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, body: dict, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, error_type: str, message: str, headers=()):
+        self._json(status, {"type": "error", "error": {"type": error_type, "message": message}}, headers)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["content-length"])))
+        if self.path.split("?", 1)[0] != "/v1/messages":
+            self._error(404, "not_found_error", f"Unknown path: {self.path}")
+            return
+        server.count("requests")
+        fate = server.draw()
+        if server.stopping.wait(fate["latency"]):
+            return
+
+        if fate["reject"]:
+            server.count("rejected")
+            self._error(429, "rate_limit_error", "Number of requests has exceeded your rate limit.",
+                        [("retry-after", str(server.retry_after))])
+            return
+        if fate["overload"]:
+            server.count("overloaded")
+            self._error(529, "overloaded_error", "Overloaded")
+            return
+        if fate["hang"]:
+            server.count("hung")
+            server.stopping.wait()
+            return
+
+        try:
+            text = server.message_text(request, self.headers.get("x-api-key", ""))
+        except Exception as e:  # noqa: BLE001 - reported to the caller like an API error
+            self._error(502, "api_error", f"Recording failed: {e}")
+            return
+
+        # Continue after an assistant prefill, as the real API does
+        messages = request["messages"]
+        if len(messages) > 1 and messages[-1]["role"] == "assistant":
+            prefill = messages[-1]["content"]
+            text = text[len(prefill):] if text.startswith(prefill) else text
+
+        stop_reason = "end_turn"
+        limit = request.get("max_tokens", 4096) * CHARS_PER_TOKEN
+        if fate["truncate"] and len(text) > 2:
+            limit = min(limit, len(text) // 2)
+        if len(text) > limit:
+            server.count("truncated")
+            text, stop_reason = text[:limit], "max_tokens"
+
+        input_tokens = len(json.dumps(request["messages"])) // CHARS_PER_TOKEN
+        output_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        if request.get("stream"):
+            server.count("streamed")
+            self._stream(request, text, stop_reason, input_tokens, output_tokens)
+        else:
+            self._json(200, _message(request, text, stop_reason, input_tokens, output_tokens))
+
+    def _stream(self, request, text, stop_reason, input_tokens, output_tokens):
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("cache-control", "no-cache")
+        self.send_header("connection", "close")
+        self.end_headers()
+
+        def event(name, data):
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        pace = 0.0
+        if self.server.tokens_per_second:
+            pace = STREAM_CHUNK_CHARS / CHARS_PER_TOKEN / self.server.tokens_per_second
+        start = _message(request, "", None, input_tokens, 1)
+        try:
+            event("message_start", {"type": "message_start", "message": {**start, "content": []}})
+            event("content_block_start", {
+                "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+            })
+            for i in range(0, len(text), STREAM_CHUNK_CHARS):
+                event("content_block_delta", {
+                    "type": "content_block_delta", "index": 0,
+                    "delta": {"type": "text_delta", "text": text[i:i + STREAM_CHUNK_CHARS]},
+                })
+                if pace and self.server.stopping.wait(pace):
+                    return
+            event("content_block_stop", {"type": "content_block_stop", "index": 0})
+            event("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                "usage": {"output_tokens": output_tokens},
+            })
+            event("message_stop", {"type": "message_stop"})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream (e.g. a cancelled hedge)
+            pass
+
+
+def _message(request, text, stop_reason, input_tokens, output_tokens) -> dict:
+    return {
+        "id": f"msg_mock_{random.getrandbits(48):012x}",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model", "mock"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local record/replay Messages API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS, help="Directory of recordings")
+    parser.add_argument("--record", action="store_true", help="Record unrecorded prompts from the real API")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S, uniform:A,B or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="Streamed text pacing (0 = instant)")
+    parser.add_argument("--reject", type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument("--server-rpm", type=float, default=0, help="Requests per minute before answering 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--overload", type=float, default=0.0, help="Share of requests answered 529")
+    parser.add_argument("--hang", type=float, default=0.0, help="Share of requests that never answer")
+    parser.add_argument("--truncate", type=float, default=0.0, help="Share of responses cut off at max_tokens")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        server = MockMessagesAPI(
+            recordings=args.recordings, port=args.port, record=args.record, upstream=args.upstream,
+            latency=args.latency, tokens_per_second=args.tokens_per_second, reject=args.reject,
+            server_rpm=args.server_rpm, retry_after=args.retry_after, overload=args.overload,
+            hang=args.hang, truncate=args.truncate, seed=args.seed,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Mock Messages API on {server.base_url} (recordings: {args.recordings})")
+    print(f"  ANTHROPIC_BASE_URL={server.base_url} streamlit run app.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.counts))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
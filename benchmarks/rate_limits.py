@@ -0,0 +1,73 @@
+"""
+Load check for the request scheduler against a local mock Messages API.
+
+Starts the mock Messages API (``benchmarks.mock_api``) on localhost,
+rejecting a share of requests with 429 and a Retry-After header and
+enforcing its own requests-per-minute limit. Then fires a burst of
+concurrent worksheet requests through ``generate_worksheet_content`` and
+reports how many succeeded, how many 429s were absorbed by retries, and
+the scheduler's queue and wait statistics.
+
+Usage:
+    python -m benchmarks.rate_limits [--requests 30] [--concurrency 12]
+        [--reject 0.1] [--server-rpm 60] [--rpm 50] [--tpm 400000]
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_api import MockMessagesAPI
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exercise the request scheduler against the mock API.")
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--reject", type=float, default=0.1, help="Share of requests answered 429 at random")
+    parser.add_argument("--server-rpm", type=float, default=60, help="Mock API's own requests-per-minute limit")
+    parser.add_argument("--rpm", type=float, default=50, help="Scheduler requests-per-minute budget")
+    parser.add_argument("--tpm", type=float, default=400000, help="Scheduler tokens-per-minute budget")
+    args = parser.parse_args(argv)
+
+    # Unrecorded prompts are answered with the times tables fixture
+    server = MockMessagesAPI(reject=args.reject, server_rpm=args.server_rpm).start()
+
+    os.environ["ANTHROPIC_API_KEY"] = "fake-key"
+    os.environ["ANTHROPIC_BASE_URL"] = server.base_url
+    os.environ["WORKSHEET_CACHE_DISABLED"] = "1"
+    os.environ["CLAUDE_REQUESTS_PER_MINUTE"] = str(args.rpm)
+    os.environ["CLAUDE_TOKENS_PER_MINUTE"] = str(args.tpm)
+
+    # Imported after the environment is set so the shared client and scheduler pick it up
+    from llm.client import generate_worksheet_content
+    from llm.scheduler import get_scheduler_stats
+
+    def one(i):
+        try:
+            generate_worksheet_content(f"Creating a times tables drill worksheet, prompt {i}")
+            return None
+        except Exception as e:  # noqa: BLE001 - tallied below
+            return type(e).__name__
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        failures = [f for f in pool.map(one, range(args.requests)) if f]
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    stats = get_scheduler_stats()
+    print(f"{args.requests - len(failures)}/{args.requests} succeeded in {elapsed:.1f}s; failures: {failures or 'none'}")
+    print(
+        f"mock API: {server.counts['requests'] - server.counts['rejected']} accepted, "
+        f"{server.counts['rejected']} answered 429"
+    )
+    print(
+        f"scheduler: {stats['retries']} retries ({stats['rate_limited']} rate limited), "
+        f"{stats['refused']} refused, mean wait {stats['mean_wait_seconds']:.2f}s, "
+        f"max wait {stats['max_wait_seconds']:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Measure how long the Streamlit app takes to respond to widget interactions.
+
+Every interaction here is one widget change a teacher makes while setting
+up a worksheet (a different topic, theme or option), made on the welcome
+page and again on the content preview, where three levels of generated
+content are on screen. The preview is seeded with the checked-in fixtures
+in ``benchmarks/fixtures``, so no content is generated and Claude is never
+called.
+
+Each interaction is timed as the app rerun it causes: a rerun of just
+the ``st.fragment`` the widget lives in when the app defines one with the
+expected key, otherwise a full rerun of app.py, which is what Streamlit
+does for widgets outside any fragment. Times are for Streamlit's AppTest
+harness, which adds a few milliseconds per rerun to building the
+element tree but no network or browser rendering.
+
+With ``--sessions`` above 1 the sessions interact at the same time from
+separate threads, as concurrent users of one server do.
+
+The "script" columns time the app's own code, from the rerun starting to
+stopping; the others add AppTest's overhead for building the element tree.
+
+Usage:
+    python -m benchmarks.reruns [--sessions 1,4] [--repeat 10] [--app app.py]
+        [--worksheet-type reading_comprehension] [--target-ms 50] [--json PATH]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.load_test import APP_PATH, _percentile, share_app_test_runtime
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Default target for the p90 of every interaction
+DEFAULT_TARGET_MS = 50.0
+
+# Interaction -> (kind, widget label, fragment key of the app's st.fragment holding it)
+INTERACTIONS = {
+    "topic": ("selectbox", "Topic", "lesson_settings"),
+    "theme": ("selectbox", "Theme", "lesson_settings"),
+    "custom topic": ("text_input", "Override with your own topic", "lesson_settings"),
+    "answer key": ("checkbox", "Include Answer Key", "worksheet_options"),
+    "extra spacing": ("checkbox", "Extra-large spacing", "worksheet_options"),
+    "single level": ("checkbox", "Generate all 3 levels", "worksheet_options"),
+}
+
+PAGES = ("welcome", "preview")
+
+_scope = threading.local()
+
+
+# ─── Fragment Reruns ───────────────────────────────────────────────────────────
+
+
+def _patch_script_runner():
+    """
+    Let a thread ask AppTest for a fragment rerun, and time the script itself.
+
+    AppTest always requests a full rerun. While ``_scope.fragment_id`` is
+    set, the rerun request is given that fragment id, which is what the
+    browser sends when a widget inside a fragment changes. Every run also
+    records the time from the script (or fragment) starting to stopping
+    in ``_scope.run["seconds"]``, without AppTest's own per-run overhead.
+    """
+    from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+    from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    stopped = {
+        ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+        ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+        ScriptRunnerEvent.FRAGMENT_STOPPED_WITH_SUCCESS,
+    }
+    request_rerun = LocalScriptRunner.request_rerun
+
+    def scoped_request_rerun(self, rerun_data):
+        fragment_id = getattr(_scope, "fragment_id", None)
+        if fragment_id:
+            rerun_data = dataclasses.replace(rerun_data, fragment_id_queue=[fragment_id])
+            # A new runner starts with a full rerun queued, which would absorb this one
+            self._requests = ScriptRequests()
+        # Events arrive on the script thread, so record into a dict this thread keeps
+        run = _scope.run = {"started": None, "seconds": None}
+
+        def on_event(sender, event, **kwargs):
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                run["started"] = time.perf_counter()
+            elif event in stopped and run["started"] is not None:
+                run["seconds"] = time.perf_counter() - run["started"]
+
+        self.on_event.connect(on_event, weak=False)
+        return request_rerun(self, rerun_data)
+
+    LocalScriptRunner.request_rerun = scoped_request_rerun
+
+
+def _fragment_id(at, key):
+    """Return the id of the app's fragment registered with ``key``, or None."""
+    ids = at._fragment_storage._ids_by_target_key.get(key)
+    return next(iter(ids), None) if ids else None
+
+
+def _timed_run(at, fragment_key):
+    """Rerun ``at`` as the browser would; return ``(round_trip, script, in_fragment)`` seconds."""
+    fragment_id = _fragment_id(at, fragment_key)
+    _scope.fragment_id = fragment_id
+    try:
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+    finally:
+        _scope.fragment_id = None
+    script = _scope.run["seconds"]
+    if fragment_id:
+        # A fragment rerun only returns the fragment's elements; rerun in
+        # full (untimed) so the next interaction can find its widget
+        at.run()
+    return elapsed, script, fragment_id is not None
+
+
+# ─── Session ───────────────────────────────────────────────────────────────────
+
+
+def _seed_preview(at, ws_type):
+    """Put the app on the content preview with the fixture for every level."""
+    from generators.styles import DIFF_LEVELS
+    from pipeline import make_params
+
+    with open(os.path.join(FIXTURE_DIR, f"{ws_type}.json"), encoding="utf-8") as f:
+        content = json.load(f)
+    subject = next(box for box in at.sidebar.selectbox if box.label.endswith("Subject")).value
+    year_group = next(box for box in at.sidebar.selectbox if box.label.endswith("Year Group")).value
+    at.session_state.generation_params = make_params(
+        subject=subject, year_group=year_group, worksheet_type=ws_type, levels=list(DIFF_LEVELS),
+    )
+    at.session_state.generated_content = {level: content for level in DIFF_LEVELS}
+    at.session_state.preview_ready = True
+    at.run()
+
+
+def _change(at, kind, label, step):
+    widgets = getattr(at.sidebar, kind)
+    widget = next(w for w in widgets if w.label.endswith(label))
+    if kind == "selectbox":
+        options = widget.options
+        widget.set_value(options[(options.index(str(widget.value)) + 1) % len(options)]
+                         if str(widget.value) in options else options[0])
+    elif kind == "checkbox":
+        widget.set_value(not widget.value)
+    else:
+        widget.set_value("" if step % 2 else "The Great Fire of London")
+
+
+def run_session(app_path, repeat, ws_type, timeout):
+    """
+    Open the app, then time every interaction ``repeat`` times on each page.
+
+    Returns:
+        ``{(page, interaction): {"seconds": [...], "script": [...], "fragment": bool}}``
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=timeout).run()
+    results = {}
+    for page in PAGES:
+        if page == "preview":
+            _seed_preview(at, ws_type)
+        for name, (kind, label, fragment_key) in INTERACTIONS.items():
+            timings, scripts = [], []
+            for step in range(repeat):
+                _change(at, kind, label, step)
+                seconds, script, in_fragment = _timed_run(at, fragment_key)
+                timings.append(seconds)
+                scripts.append(script)
+            results[(page, name)] = {"seconds": timings, "script": scripts, "fragment": in_fragment}
+            errors = [e.value for e in at.error] + [str(e.value) for e in at.exception]
+            if errors:
+                raise RuntimeError(f"{page}/{name}: {errors[0]}")
+    return results
+
+
+def run_level(app_path, sessions, repeat, ws_type, timeout):
+    """Run ``sessions`` sessions at once and pool their timings per interaction."""
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        session_results = list(pool.map(
+            lambda _: run_session(app_path, repeat, ws_type, timeout), range(sessions),
+        ))
+
+    summary = {}
+    for key in session_results[0]:
+        values = [s for results in session_results for s in results[key]["seconds"]]
+        scripts = [s for results in session_results for s in results[key]["script"] if s is not None]
+        summary[key] = {
+            "fragment": session_results[0][key]["fragment"],
+            "p50_ms": round(_percentile(values, 0.5) * 1000, 1),
+            "p90_ms": round(_percentile(values, 0.9) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+            "script_p50_ms": round(_percentile(scripts, 0.5) * 1000, 1) if scripts else None,
+            "script_p90_ms": round(_percentile(scripts, 0.9) * 1000, 1) if scripts else None,
+        }
+    return summary
+
+
+# ─── Report ────────────────────────────────────────────────────────────────────
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the app's rerun for each sidebar interaction.")
+    parser.add_argument("--sessions", default="1,4", help="Comma-separated concurrent session counts")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed changes per interaction and page")
+    parser.add_argument("--worksheet-type", default="reading_comprehension",
+                        help="Fixture shown on the preview page")
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS,
+                        help="p90 an interaction should stay under")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds allowed for one rerun")
+    parser.add_argument("--app", default=APP_PATH,
+                        help="App script to measure, e.g. an older app.py saved beside it to compare with")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to PATH")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    os.chdir(os.path.dirname(APP_PATH))
+    share_app_test_runtime()
+    _patch_script_runner()
+
+    levels, over = [], 0
+    for sessions in (int(n) for n in args.sessions.split(",")):
+        summary = run_level(os.path.abspath(args.app), sessions, args.repeat, args.worksheet_type, args.timeout)
+        print(f"\n{sessions} session(s)")
+        print(
+            f"  {'page':<8} {'interaction':<14} {'rerun':<9} {'p50':>8} {'p90':>8} {'max':>8}"
+            f" {'script p50':>11} {'script p90':>11}  (ms)"
+        )
+        for (page, name), stats in summary.items():
+            slow = stats["p90_ms"] > args.target_ms
+            over += slow
+            print(
+                f"  {page:<8} {name:<14} {'fragment' if stats['fragment'] else 'full':<9} "
+                f"{stats['p50_ms']:8.1f} {stats['p90_ms']:8.1f} {stats['max_ms']:8.1f}"
+                f" {stats['script_p50_ms'] or 0:11.1f} {stats['script_p90_ms'] or 0:11.1f}"
+                f"{'  over target' if slow else ''}"
+            )
+        levels.append({
+            "sessions": sessions,
+            "interactions": [{"page": page, "interaction": name, **stats} for (page, name), stats in summary.items()],
+        })
+
+    print(f"\n{over} interaction(s) over the {args.target_ms:.0f} ms p90 target")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": levels}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
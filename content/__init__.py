@@ -0,0 +1,43 @@
+"""
+Local content engines for the UK National Curriculum worksheet generator.
+
+Maps worksheet type keys to functions that build worksheet content
+without calling Claude. Each engine returns the same dict schema as the
+LLM prompt for that type, so its output goes straight to GENERATOR_MAP.
+
+Every engine takes ``year_group``, ``level``, ``topic``, ``theme_key``
+and ``seed`` keyword arguments. ``verify_content`` rechecks the answers
+in maths content that did come from Claude.
+"""
+
+from content.calculation_practice import generate_calculation_practice_content
+from content.fraction_practice import generate_fraction_practice_content
+from content.times_tables import generate_times_tables_content
+from content.verify import verify_content
+
+
+LOCAL_ENGINES = {
+    "calculation_practice": generate_calculation_practice_content,
+    "fraction_practice": generate_fraction_practice_content,
+    "times_tables": generate_times_tables_content,
+}
+
+
+def has_local_engine(worksheet_type: str) -> bool:
+    """Return True if ``worksheet_type`` can be generated without Claude."""
+    return worksheet_type in LOCAL_ENGINES
+
+
+def generate_local_content(worksheet_type: str, year_group: str, level: str, **kwargs) -> dict:
+    """
+    Build content for one level with the local engine for ``worksheet_type``.
+
+    Raises:
+        ValueError: If the worksheet type has no local engine.
+    """
+    if worksheet_type not in LOCAL_ENGINES:
+        raise ValueError(
+            f"No local engine for worksheet type '{worksheet_type}'. "
+            f"Available: {list(LOCAL_ENGINES)}"
+        )
+    return LOCAL_ENGINES[worksheet_type](year_group=year_group, level=level, **kwargs)
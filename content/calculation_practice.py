@@ -0,0 +1,314 @@
+"""
+Local calculation practice content engine.
+
+Builds the ``{title, sections, challenge, success_criteria}`` dict that
+Claude returns for the calculation_practice worksheet type. Skills are
+chosen from the curriculum strand the topic belongs to, numbers are sized
+to the year group, and every answer is computed with integer or
+``fractions.Fraction`` arithmetic.
+"""
+
+import random
+from typing import Dict, Iterable, List, Optional
+
+from content.fraction_practice import make_exercise as make_fraction_exercise
+from curriculum.maths import MATHS_CURRICULUM
+from generators.styles import DIFF_LEVELS, THEMES
+
+# Largest number used in addition and subtraction for each year group
+YEAR_ADD_LIMIT = {
+    'Year 1': 20,
+    'Year 2': 100,
+    'Year 3': 1000,
+    'Year 4': 10000,
+    'Year 5': 100000,
+    'Year 6': 1000000,
+}
+
+# (largest multiplicand, largest multiplier or divisor) for each year group
+YEAR_MULTIPLY_LIMIT = {
+    'Year 1': (10, 5),
+    'Year 2': (12, 10),
+    'Year 3': (99, 8),
+    'Year 4': (999, 12),
+    'Year 5': (9999, 99),
+    'Year 6': (9999, 99),
+}
+
+# Division with remainders is taught from Year 3 onwards
+REMAINDER_YEARS = ('Year 3', 'Year 4', 'Year 5', 'Year 6')
+LONG_DIVISION_YEARS = ('Year 6',)
+
+LEVEL_SETTINGS = {
+    'developing': {'sections': 2, 'calculations': 5, 'scale': 0.1, 'missing': 0.0, 'challenge': None},
+    'expected': {'sections': 3, 'calculations': 6, 'scale': 1.0, 'missing': 0.0,
+                 'challenge': {'lines': 3}},
+    'greater_depth': {'sections': 4, 'calculations': 8, 'scale': 1.0, 'missing': 0.5,
+                      'challenge': {'lines': 4}},
+}
+
+SKILLS = (
+    'addition', 'subtraction', 'multiplication', 'division',
+    'powers_of_ten', 'order_of_operations', 'fractions',
+)
+
+# Curriculum strand keywords and the skills they practise
+STRAND_SKILLS = [
+    ('Addition & Subtraction', ['addition', 'subtraction']),
+    ('Multiplication & Division', ['multiplication', 'division']),
+    ('Four Operations', ['multiplication', 'division', 'order_of_operations', 'addition']),
+    ('Fractions', ['fractions']),
+    ('Place Value', ['powers_of_ten', 'addition', 'subtraction']),
+]
+DEFAULT_SKILLS = ['addition', 'subtraction', 'multiplication', 'division']
+
+# Topic keywords that pull a skill to the front
+TOPIC_SKILLS = [
+    ('addition', ['addition']),
+    ('adding', ['addition']),
+    ('subtract', ['subtraction']),
+    ('bonds', ['addition', 'subtraction']),
+    ('multipl', ['multiplication']),
+    ('doubling', ['multiplication']),
+    ('division', ['division']),
+    ('divid', ['division']),
+    ('sharing', ['division']),
+    ('remainder', ['division']),
+    ('powers of 10', ['powers_of_ten']),
+    ('10, 100 and 1000', ['powers_of_ten']),
+    ('order of operations', ['order_of_operations']),
+    ('bodmas', ['order_of_operations']),
+    ('mixed operations', ['order_of_operations']),
+    ('fraction', ['fractions']),
+]
+
+SECTION_TEXT = {
+    'addition': ('Addition', 'Work out each addition.'),
+    'subtraction': ('Subtraction', 'Work out each subtraction.'),
+    'multiplication': ('Multiplication', 'Work out each multiplication. Show your working out.'),
+    'division': ('Division', 'Work out each division. Write any remainder with r.'),
+    'powers_of_ten': ('Multiplying and Dividing by 10, 100 and 1000', 'Move the digits to find each answer.'),
+    'order_of_operations': ('Order of Operations', 'Remember: brackets first, then \u00d7 and \u00f7, then + and -.'),
+    'fractions': ('Fraction Calculations', 'Work out each answer. Simplify where you can.'),
+}
+
+SUCCESS_CRITERIA = {
+    'addition': 'I can add numbers accurately.',
+    'subtraction': 'I can subtract numbers accurately.',
+    'multiplication': 'I can multiply using a written or mental method.',
+    'division': 'I can divide and write any remainder.',
+    'powers_of_ten': 'I can multiply and divide by 10, 100 and 1000.',
+    'order_of_operations': 'I can use the order of operations to work out calculations.',
+    'fractions': 'I can calculate with fractions.',
+}
+
+WORKING_HINTS = {
+    'addition': 'Count on from the bigger number, or add the ones first.',
+    'subtraction': 'Count back, or start with the ones column.',
+    'multiplication': 'Use a times table fact you know.',
+    'division': 'How many groups of {b} fit into {a}?',
+    'powers_of_ten': 'Move each digit one place for every zero.',
+    'order_of_operations': 'Do the \u00d7 or \u00f7 part first.',
+    'fractions': 'Look at the denominators first.',
+}
+
+
+def strand_for_topic(year_group: str, topic: str) -> Optional[str]:
+    """
+    Return the MATHS_CURRICULUM strand that lists ``topic`` for the year, if any.
+
+    ``topic`` may be the topic alone or prefixed with its strand, as in the
+    pipeline's "Number - Place Value - Place Value in Four-Digit Numbers".
+    """
+    wanted = (topic or '').strip().lower()
+    for strand, data in MATHS_CURRICULUM.get(year_group, {}).items():
+        prefix = f'{strand.lower()} - '
+        name = wanted[len(prefix):] if wanted.startswith(prefix) else wanted
+        if name in (t.lower() for t in data.get('topics', [])):
+            return strand
+    return None
+
+
+def skills_for(year_group: str, topic: str) -> List[str]:
+    """Return the skills for a topic: those it names first, then its strand's."""
+    lowered = (topic or '').lower()
+    preferred = []
+    for keyword, skills in TOPIC_SKILLS:
+        if keyword in lowered:
+            preferred += [s for s in skills if s not in preferred]
+
+    strand = strand_for_topic(year_group, topic) or ''
+    strand_skills = next((skills for key, skills in STRAND_SKILLS if key in strand), DEFAULT_SKILLS)
+    return preferred + [s for s in strand_skills if s not in preferred]
+
+
+def _limit(value: int, scale: float, floor: int = 10) -> int:
+    return max(floor, int(value * scale))
+
+
+def make_calculation(skill: str, year_group: str, level: str, rng: random.Random) -> dict:
+    """
+    Return one ``{question, answer, working_hint}`` calculation for ``skill``.
+
+    Raises:
+        ValueError: If ``skill`` is not recognised.
+    """
+    settings = LEVEL_SETTINGS[level]
+    scale = settings['scale']
+    missing = rng.random() < settings['missing']
+    hint = None
+
+    if skill in ('addition', 'subtraction'):
+        top = _limit(YEAR_ADD_LIMIT[year_group], scale)
+        a, b = rng.randint(1, top // 2), rng.randint(1, top // 2)
+        if skill == 'addition':
+            total = a + b
+            question = f'{a} + ___ = {total}' if missing else f'{a} + {b} = ___'
+            answer = b if missing else total
+        else:
+            a, b = max(a, b) + min(a, b), min(a, b)
+            question = f'{a} - ___ = {a - b}' if missing else f'{a} - {b} = ___'
+            answer = b if missing else a - b
+
+    elif skill in ('multiplication', 'division'):
+        big, small = YEAR_MULTIPLY_LIMIT[year_group]
+        if skill == 'division' and year_group not in LONG_DIVISION_YEARS:
+            small = min(small, 12)
+        b = rng.randint(2, _limit(small, scale if small > 12 else 1, floor=5))
+        top = _limit(big, scale, floor=10)
+        # Keep the dividend, not the quotient, within the year's range
+        q = rng.randint(2, max(2, top // b if skill == 'division' else top))
+        if skill == 'multiplication':
+            question = f'{q} \u00d7 ___ = {q * b}' if missing else f'{q} \u00d7 {b} = ___'
+            answer = b if missing else q * b
+        else:
+            r = rng.randint(0, b - 1) if year_group in REMAINDER_YEARS and level != 'developing' else 0
+            a = q * b + r
+            if missing and not r:
+                question, answer = f'___ \u00f7 {b} = {q}', a
+            else:
+                question = f'{a} \u00f7 {b} = ___'
+                answer = f'{q} r {r}' if r else q
+            hint = WORKING_HINTS['division'].format(a=a, b=b)
+
+    elif skill == 'powers_of_ten':
+        power = rng.choice([10, 100, 1000])
+        value = rng.randint(1, _limit(YEAR_ADD_LIMIT[year_group] // 100, scale))
+        if rng.random() < 0.5:
+            question, answer = f'{value} \u00d7 {power} = ___', value * power
+        else:
+            question, answer = f'{value * power} \u00f7 {power} = ___', value
+
+    elif skill == 'order_of_operations':
+        a, b, c = rng.randint(2, 20), rng.randint(2, 12), rng.randint(2, 12)
+        form = rng.randrange(3)
+        if form == 0:
+            question, answer = f'{a} + {b} \u00d7 {c} = ___', a + b * c
+        elif form == 1:
+            question, answer = f'({a} + {b}) \u00d7 {c} = ___', (a + b) * c
+        else:
+            question, answer = f'{a * c} \u00f7 {c} - {b} = ___', a - b
+            if answer < 0:
+                question, answer = f'{a * c} \u00f7 {c} + {b} = ___', a + b
+
+    elif skill == 'fractions':
+        kind = rng.choice(['calculate', 'fraction_of'])
+        exercise = make_fraction_exercise(kind, year_group, level, rng)
+        question, answer = exercise['question'], exercise['answer']
+
+    else:
+        raise ValueError(f"Unknown calculation skill: '{skill}'. Valid skills are: {list(SKILLS)}")
+
+    if level == 'developing':
+        hint = hint or WORKING_HINTS[skill]
+    else:
+        hint = None
+    return {'question': question, 'answer': str(answer), 'working_hint': hint}
+
+
+def generate_calculation_practice_content(
+    year_group: str,
+    level: str = 'expected',
+    topic: str = '',
+    theme_key: str = 'classic',
+    skills: Optional[Iterable[str]] = None,
+    calculation_count: Optional[int] = None,
+    seed=None,
+) -> dict:
+    """
+    Build calculation practice content for one level without calling Claude.
+
+    Args:
+        year_group: e.g. "Year 4"; sizes the numbers used.
+        level: Differentiation level; chooses sections, counts and formats.
+        topic: Curriculum topic; its strand and keywords choose the skills.
+        theme_key: Visual theme key, used for the title.
+        skills: Explicit skills to practise, overriding the topic.
+        calculation_count: Calculations per section, overriding the level default.
+        seed: Any hashable seed for repeatable output.
+
+    Returns:
+        Content in the schema ``generate_calculation_practice_worksheet`` consumes.
+
+    Raises:
+        ValueError: If the year group, level or a skill is not recognised.
+    """
+    if year_group not in YEAR_ADD_LIMIT:
+        raise ValueError(f"Unknown year group: '{year_group}'. Valid year groups are: {list(YEAR_ADD_LIMIT)}")
+    if level not in LEVEL_SETTINGS:
+        raise ValueError(f"Unknown level: '{level}'. Valid levels are: {list(DIFF_LEVELS)}")
+
+    settings = LEVEL_SETTINGS[level]
+    rng = random.Random(f'{seed}:{level}' if seed is not None else None)
+    pool = list(skills or skills_for(year_group, topic))
+    count = calculation_count or settings['calculations']
+
+    sections = []
+    for i in range(settings['sections']):
+        skill = pool[i % len(pool)]
+        title, instructions = SECTION_TEXT.get(skill, (skill.title(), ''))
+        if i >= len(pool):
+            title = f'{title}: Next Steps'
+        sections.append({
+            'title': title,
+            'instructions': instructions,
+            'calculations': [make_calculation(skill, year_group, level, rng) for _ in range(count)],
+        })
+
+    challenge = None
+    if settings['challenge']:
+        sample = make_calculation(pool[0], year_group, 'expected', rng)
+        question = sample['question'].replace('___', sample['answer'])
+        challenge = {
+            'title': 'Brain Buster!',
+            'instructions': (
+                f'{question}. Write two more calculations in the same fact family. '
+                f'How can you check your answer using the inverse?'
+                if level == 'expected' else
+                f'{question}. Change one number so the answer goes up by 10. '
+                f'Find as many different ways as you can and explain your reasoning.'
+            ),
+            'lines': settings['challenge']['lines'],
+        }
+
+    criteria = [SUCCESS_CRITERIA[s] for s in dict.fromkeys(pool[:settings['sections']])]
+    criteria.append('I can check my answers.')
+    return {
+        'title': f"{THEMES[theme_key]['name']} Calculations",
+        'sections': sections,
+        'challenge': challenge,
+        'success_criteria': criteria,
+    }
+
+
+def generate_calculation_practice_set(
+    year_group: str,
+    levels: Optional[Iterable[str]] = None,
+    seed=None,
+    **kwargs,
+) -> Dict[str, dict]:
+    """Build content for several levels at once, keyed by level."""
+    return {
+        level: generate_calculation_practice_content(year_group, level, seed=seed, **kwargs)
+        for level in (levels or DIFF_LEVELS)
+    }
@@ -0,0 +1,287 @@
+"""
+Local fraction practice content engine.
+
+Builds the ``{title, sections, challenge, success_criteria}`` dict that
+Claude returns for the fraction_practice worksheet type. Every answer is
+computed with ``fractions.Fraction``, so the answer key is always right.
+Section types follow the prompt's rules for each level and are ordered
+so the ones the curriculum topic asks for come first.
+"""
+
+import random
+from fractions import Fraction
+from typing import Dict, Iterable, List, Optional
+
+from generators.styles import DIFF_LEVELS, THEMES
+
+# Denominators suitable for each year group
+YEAR_DENOMINATORS = {
+    'Year 1': [2, 4],
+    'Year 2': [2, 3, 4],
+    'Year 3': [2, 3, 4, 5, 6, 8, 10],
+    'Year 4': [2, 3, 4, 5, 6, 8, 10, 12],
+    'Year 5': [2, 3, 4, 5, 6, 8, 10, 12],
+    'Year 6': [2, 3, 4, 5, 6, 8, 9, 10, 12],
+}
+
+LEVEL_SETTINGS = {
+    'developing': {
+        'sections': 3, 'exercises': 4,
+        'types': ['shade', 'identify', 'compare'],
+        'challenge': None,
+    },
+    'expected': {
+        'sections': 3, 'exercises': 6,
+        'types': ['equivalent', 'calculate', 'fraction_of', 'compare'],
+        'challenge': {'questions': 1, 'lines': 3},
+    },
+    'greater_depth': {
+        'sections': 4, 'exercises': 8,
+        'types': ['convert', 'calculate', 'order', 'equivalent', 'fraction_of'],
+        'challenge': {'questions': 2, 'lines': 4},
+    },
+}
+
+# Topic keywords that pull a section type to the front
+TOPIC_TYPES = [
+    ('equivalen', ['equivalent']),
+    ('simplif', ['equivalent']),
+    ('adding', ['calculate']),
+    ('subtracting', ['calculate']),
+    ('multiplying', ['calculate']),
+    ('compar', ['compare', 'order']),
+    ('order', ['order', 'compare']),
+    ('mixed number', ['convert']),
+    ('improper', ['convert']),
+    ('quantities', ['fraction_of']),
+    ('amounts', ['fraction_of']),
+    ('shapes', ['shade', 'identify']),
+    ('halves', ['shade', 'identify']),
+    ('quarters', ['shade', 'identify']),
+]
+
+SECTION_TEXT = {
+    'shade': ('Shade the Fraction', 'Shade the shape to show the fraction.'),
+    'identify': ('Name the Fraction', 'What fraction of the shape is shaded?'),
+    'compare': ('Compare the Fractions', 'Write <, > or = in the gap.'),
+    'equivalent': ('Equivalent Fractions', 'Find the missing number to make the fractions equal.'),
+    'calculate': ('Fraction Calculations', 'Work out each answer. Simplify where you can.'),
+    'fraction_of': ('Fractions of Amounts', 'Find the fraction of each amount.'),
+    'convert': ('Mixed Numbers and Improper Fractions', 'Convert each fraction.'),
+    'order': ('Order the Fractions', 'Write the fractions in order, smallest first.'),
+}
+
+SUCCESS_CRITERIA = {
+    'shade': 'I can shade a fraction of a shape.',
+    'identify': 'I can name the fraction of a shape that is shaded.',
+    'compare': 'I can compare two fractions using <, > and =.',
+    'equivalent': 'I can find equivalent fractions.',
+    'calculate': 'I can calculate with fractions.',
+    'fraction_of': 'I can find a fraction of an amount.',
+    'convert': 'I can convert between mixed numbers and improper fractions.',
+    'order': 'I can order fractions from smallest to largest.',
+}
+
+
+def format_fraction(value: Fraction, mixed: bool = False) -> str:
+    """Write a Fraction as "3/4", "5" or, with ``mixed``, "2 1/3"."""
+    if value.denominator == 1:
+        return str(value.numerator)
+    if mixed and abs(value) > 1:
+        whole, rest = divmod(value.numerator, value.denominator)
+        return f'{whole} {rest}/{value.denominator}'
+    return f'{value.numerator}/{value.denominator}'
+
+
+def _pick(rng: random.Random, denominators: List[int], unit: bool = False):
+    """Pick a proper fraction as an unsimplified ``(numerator, denominator)`` pair."""
+    d = rng.choice(denominators)
+    return (1 if unit else rng.randint(1, d - 1)), d
+
+
+def make_exercise(kind: str, year_group: str, level: str, rng: random.Random) -> dict:
+    """
+    Return one ``{question, answer, visual_hint, diagram}`` exercise of ``kind``.
+
+    Fractions in questions are written as picked, not simplified, so
+    "2/8 + 3/8" stays a same-denominator sum.
+
+    Raises:
+        ValueError: If ``kind`` is not a known section type.
+    """
+    denominators = YEAR_DENOMINATORS[year_group]
+    developing = level == 'developing'
+    simple = [d for d in denominators if d <= 8] if developing else denominators
+    exercise = {'visual_hint': None, 'diagram': None}
+
+    if kind in ('shade', 'identify'):
+        n, d = _pick(rng, simple, unit=year_group in ('Year 1', 'Year 2') and rng.random() < 0.5)
+        exercise['diagram'] = {'shaded': n, 'total': d}
+        if kind == 'shade':
+            exercise['question'] = f'Shade {n}/{d} of the shape.'
+            exercise['visual_hint'] = f'The shape has {d} equal parts. Shade {n} of them.'
+        else:
+            exercise['question'] = 'What fraction is shaded? ___'
+            exercise['visual_hint'] = 'Count the shaded parts, then count all the parts.'
+        exercise['answer'] = f'{n}/{d}'
+
+    elif kind == 'compare':
+        (an, ad), (bn, bd) = _pick(rng, simple), _pick(rng, simple)
+        if developing:
+            bn, bd = rng.randint(1, ad - 1), ad
+            exercise['visual_hint'] = 'Same denominator: compare the numerators.'
+        a, b = Fraction(an, ad), Fraction(bn, bd)
+        exercise['question'] = f'{an}/{ad} ___ {bn}/{bd}'
+        exercise['answer'] = '<' if a < b else '>' if a > b else '='
+
+    elif kind == 'equivalent':
+        frac = Fraction(*_pick(rng, [d for d in denominators if d <= 6]))
+        scale = rng.randint(2, 5)
+        big_n, big_d = frac.numerator * scale, frac.denominator * scale
+        if level == 'greater_depth' and rng.random() < 0.5:
+            exercise['question'] = f'Simplify {big_n}/{big_d} = ___'
+            exercise['answer'] = format_fraction(frac)
+        elif rng.random() < 0.5:
+            exercise['question'] = f'{frac.numerator}/{frac.denominator} = ___/{big_d}'
+            exercise['answer'] = str(big_n)
+        else:
+            exercise['question'] = f'{frac.numerator}/{frac.denominator} = {big_n}/___'
+            exercise['answer'] = str(big_d)
+
+    elif kind == 'calculate':
+        if level == 'greater_depth':
+            (an, ad), (bn, bd) = _pick(rng, denominators), _pick(rng, denominators)
+            op = rng.choice(['+', '-', '\u00d7'])
+        else:
+            ad = bd = rng.choice(denominators)
+            an, bn = rng.randint(1, ad - 1), rng.randint(1, bd - 1)
+            op = rng.choice(['+', '-'])
+        a, b = Fraction(an, ad), Fraction(bn, bd)
+        if op == '-' and a < b:
+            (an, ad, a), (bn, bd, b) = (bn, bd, b), (an, ad, a)
+        result = a + b if op == '+' else a - b if op == '-' else a * b
+        exercise['question'] = f'{an}/{ad} {op} {bn}/{bd} = ___'
+        exercise['answer'] = format_fraction(result, mixed=True)
+
+    elif kind == 'fraction_of':
+        frac = Fraction(*_pick(rng, [d for d in denominators if d <= 10]))
+        amount = frac.denominator * rng.randint(2, 12)
+        exercise['question'] = f'{frac.numerator}/{frac.denominator} of {amount} = ___'
+        exercise['answer'] = str(int(frac * amount))
+
+    elif kind == 'convert':
+        d = rng.choice([d for d in denominators if d > 2])
+        value = Fraction(rng.randint(1, 4) * d + rng.randint(1, d - 1), d)
+        if rng.random() < 0.5:
+            exercise['question'] = f'Write {format_fraction(value)} as a mixed number. ___'
+            exercise['answer'] = format_fraction(value, mixed=True)
+        else:
+            exercise['question'] = f'Write {format_fraction(value, mixed=True)} as an improper fraction. ___'
+            exercise['answer'] = format_fraction(value)
+
+    elif kind == 'order':
+        values = set()
+        while len(values) < 3:
+            values.add(Fraction(*_pick(rng, denominators)))
+        shown = list(values)
+        rng.shuffle(shown)
+        exercise['question'] = 'Order: ' + ', '.join(format_fraction(v) for v in shown)
+        exercise['answer'] = ', '.join(format_fraction(v) for v in sorted(values))
+
+    else:
+        raise ValueError(f"Unknown fraction section type: '{kind}'. Valid types are: {list(SECTION_TEXT)}")
+
+    return exercise
+
+
+def section_types_for(topic: str, level: str) -> List[str]:
+    """Return the level's section types, those the topic asks for first."""
+    allowed = LEVEL_SETTINGS[level]['types']
+    topic = (topic or '').lower()
+    preferred = []
+    for keyword, kinds in TOPIC_TYPES:
+        if keyword in topic:
+            preferred += [k for k in kinds if k in allowed and k not in preferred]
+    return preferred + [k for k in allowed if k not in preferred]
+
+
+def generate_fraction_practice_content(
+    year_group: str,
+    level: str = 'expected',
+    topic: str = '',
+    theme_key: str = 'classic',
+    section_types: Optional[Iterable[str]] = None,
+    exercise_count: Optional[int] = None,
+    seed=None,
+) -> dict:
+    """
+    Build fraction practice content for one level without calling Claude.
+
+    Args:
+        year_group: e.g. "Year 4"; chooses the denominators used.
+        level: Differentiation level; chooses section types and counts.
+        topic: Curriculum topic; section types it names come first.
+        theme_key: Visual theme key, used for the title.
+        section_types: Explicit section types, overriding the topic.
+        exercise_count: Exercises per section, overriding the level default.
+        seed: Any hashable seed for repeatable output.
+
+    Returns:
+        Content in the schema ``generate_fraction_practice_worksheet`` consumes.
+
+    Raises:
+        ValueError: If the year group, level or a section type is not recognised.
+    """
+    if year_group not in YEAR_DENOMINATORS:
+        raise ValueError(f"Unknown year group: '{year_group}'. Valid year groups are: {list(YEAR_DENOMINATORS)}")
+    if level not in LEVEL_SETTINGS:
+        raise ValueError(f"Unknown level: '{level}'. Valid levels are: {list(DIFF_LEVELS)}")
+
+    settings = LEVEL_SETTINGS[level]
+    rng = random.Random(f'{seed}:{level}' if seed is not None else None)
+    kinds = list(section_types or section_types_for(topic, level))[:settings['sections']]
+    count = exercise_count or settings['exercises']
+
+    sections = []
+    for kind in kinds:
+        title, instructions = SECTION_TEXT.get(kind, (kind.title(), ''))
+        sections.append({
+            'title': title,
+            'instructions': instructions,
+            'type': kind,
+            'exercises': [make_exercise(kind, year_group, level, rng) for _ in range(count)],
+        })
+
+    challenge = None
+    if settings['challenge']:
+        a, b = (Fraction(*_pick(rng, YEAR_DENOMINATORS[year_group])) for _ in range(2))
+        challenge = {
+            'title': 'Fraction Brain Buster!',
+            'instructions': (
+                f'Is {format_fraction(a)} or {format_fraction(b)} bigger? Explain how you know.'
+                if settings['challenge']['questions'] == 1 else
+                f'Find two different fractions that add up to {format_fraction(a + b, mixed=True)}. '
+                f'How many pairs can you find? Explain your method.'
+            ),
+            'lines': settings['challenge']['lines'],
+        }
+
+    return {
+        'title': f"{THEMES[theme_key]['name']} Fractions",
+        'sections': sections,
+        'challenge': challenge,
+        'success_criteria': [SUCCESS_CRITERIA[k] for k in kinds],
+    }
+
+
+def generate_fraction_practice_set(
+    year_group: str,
+    levels: Optional[Iterable[str]] = None,
+    seed=None,
+    **kwargs,
+) -> Dict[str, dict]:
+    """Build content for several levels at once, keyed by level."""
+    return {
+        level: generate_fraction_practice_content(year_group, level, seed=seed, **kwargs)
+        for level in (levels or DIFF_LEVELS)
+    }
@@ -0,0 +1,262 @@
+"""
+Local times tables content engine.
+
+Builds the same ``{title, sections, speed_challenge, success_criteria}``
+dict that Claude returns for the times_tables worksheet type, computed
+exactly and instantly. Output is fully determined by the seed, so a pack
+can be regenerated identically.
+"""
+
+import re
+import random
+from typing import Dict, Iterable, List, Optional
+
+from generators.styles import DIFF_LEVELS, THEMES
+
+# Core tables per year group (UK National Curriculum expectations)
+YEAR_TABLES = {
+    'Year 1': [2, 5, 10],
+    'Year 2': [2, 5, 10],
+    'Year 3': [3, 4, 8, 2, 5, 10],
+    'Year 4': [6, 7, 9, 11, 12, 3, 4, 8],
+    'Year 5': [6, 7, 8, 9, 11, 12, 3, 4],
+    'Year 6': [6, 7, 8, 9, 11, 12, 3, 4],
+}
+
+# Largest multiplier used for each year group
+YEAR_MAX_FACTOR = {'Year 1': 10, 'Year 2': 12}
+DEFAULT_MAX_FACTOR = 12
+
+# Fact formats: standard "7 x 4 = ___", missing "? x 4 = 28",
+# division "28 \u00f7 4 = ___", derived "70 x 4 = ___"
+FACT_FORMATS = ('standard', 'missing', 'division', 'derived')
+
+# Formats each year group is ready for: Year 1 counts in steps, Year 2 adds
+# division facts, and deriving facts like 30 x 4 from 3 x 4 starts in Year 3
+YEAR_FORMATS = {
+    'Year 1': ('standard', 'missing'),
+    'Year 2': ('standard', 'missing', 'division'),
+}
+
+LEVEL_SETTINGS = {
+    'developing': {
+        'sections': 2,
+        'tables_per_section': 1,
+        'facts': 10,
+        'formats': ('standard',),
+        'speed_challenge': None,
+    },
+    'expected': {
+        'sections': 3,
+        'tables_per_section': 2,
+        'facts': 12,
+        'formats': ('standard', 'missing'),
+        'speed_challenge': {'facts': 10, 'seconds': 60},
+    },
+    'greater_depth': {
+        'sections': 4,
+        'tables_per_section': 2,
+        'facts': 15,
+        'formats': FACT_FORMATS,
+        'speed_challenge': {'facts': 15, 'seconds': 90},
+    },
+}
+
+_INSTRUCTIONS = {
+    'standard': 'Write the answer to each fact.',
+    'missing': 'Write the answer or the missing number.',
+    'division': 'Multiply or divide. Use the facts you know!',
+    'derived': 'Multiply or divide. Use the facts you know to help with bigger numbers!',
+}
+
+
+def tables_from_text(text: str) -> List[int]:
+    """
+    Pick out the times tables named in a topic or objective.
+
+    "3, 4 and 8 Times Tables" gives [3, 4, 8]; "Counting in 2s, 5s and
+    10s" gives [2, 5, 10]. Numbers outside 2-12 are ignored.
+    """
+    tables = []
+    for number in re.findall(r'\b(\d{1,2})s?\b', text or ''):
+        value = int(number)
+        if 2 <= value <= 12 and value not in tables:
+            tables.append(value)
+    return tables
+
+
+def make_fact(table: int, factor: int, fmt: str, rng: random.Random) -> dict:
+    """Return one ``{question, answer}`` fact for ``table x factor`` in ``fmt``."""
+    product = table * factor
+    if fmt == 'missing':
+        if rng.random() < 0.5:
+            return {'question': f'? x {table} = {product}', 'answer': str(factor)}
+        return {'question': f'{table} x ? = {product}', 'answer': str(factor)}
+    if fmt == 'division':
+        return {'question': f'{product} \u00f7 {table} = ___', 'answer': str(factor)}
+    if fmt == 'derived':
+        return {'question': f'{factor * 10} x {table} = ___', 'answer': str(product * 10)}
+    if rng.random() < 0.5:
+        return {'question': f'{factor} x {table} = ___', 'answer': str(product)}
+    return {'question': f'{table} x {factor} = ___', 'answer': str(product)}
+
+
+def make_facts(
+    tables: Iterable[int],
+    count: int,
+    formats: Iterable[str] = ('standard',),
+    max_factor: int = DEFAULT_MAX_FACTOR,
+    rng: Optional[random.Random] = None,
+) -> List[dict]:
+    """
+    Build ``count`` distinct facts drawn from ``tables`` in shuffled order.
+
+    Args:
+        tables: Times tables to draw from.
+        count: Number of facts wanted. Fewer are returned only if the
+            tables and formats cannot make that many distinct facts.
+        formats: Fact formats to mix, from FACT_FORMATS.
+        max_factor: Largest multiplier.
+        rng: Random source; a fresh unseeded one if omitted.
+
+    Raises:
+        ValueError: If a format is not recognised or no tables are given.
+    """
+    rng = rng or random.Random()
+    tables, formats = list(tables), list(formats)
+    unknown = [f for f in formats if f not in FACT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown fact formats {unknown}. Valid formats are: {list(FACT_FORMATS)}")
+    if not tables:
+        raise ValueError("At least one times table is required.")
+
+    pools = {f: [(t, n) for t in tables for n in range(1, max_factor + 1)] for f in formats}
+    for pool in pools.values():
+        rng.shuffle(pool)
+
+    # Take from each format in turn so every format is represented
+    facts = []
+    while len(facts) < count and any(pools.values()):
+        for fmt in formats:
+            if pools[fmt] and len(facts) < count:
+                table, factor = pools[fmt].pop()
+                facts.append(make_fact(table, factor, fmt, rng))
+    rng.shuffle(facts)
+    return facts
+
+
+def _table_label(tables: List[int]) -> str:
+    if len(tables) == 1:
+        return f'{tables[0]} times table'
+    return f"{', '.join(str(t) for t in tables[:-1])} and {tables[-1]} times tables"
+
+
+def generate_times_tables_content(
+    year_group: str,
+    level: str = 'expected',
+    topic: str = '',
+    theme_key: str = 'classic',
+    tables: Optional[List[int]] = None,
+    fact_count: Optional[int] = None,
+    formats: Optional[Iterable[str]] = None,
+    seed=None,
+) -> dict:
+    """
+    Build times tables drill content for one level without calling Claude.
+
+    Args:
+        year_group: e.g. "Year 3"; chooses default tables and factor range.
+        level: Differentiation level; chooses sections, facts and formats.
+            Formats beyond the year group (see YEAR_FORMATS) are dropped.
+        topic: Curriculum topic; tables it names are used first.
+        theme_key: Visual theme key, used for the title.
+        tables: Explicit tables to practise, overriding the topic and year.
+        fact_count: Facts per section, overriding the level default.
+        formats: Fact formats to mix, overriding the level and year
+            defaults.
+        seed: Any hashable seed for repeatable output.
+
+    Returns:
+        Content in the schema ``generate_times_tables_worksheet`` consumes.
+
+    Raises:
+        ValueError: If the year group or level is not recognised.
+    """
+    if year_group not in YEAR_TABLES:
+        raise ValueError(f"Unknown year group: '{year_group}'. Valid year groups are: {list(YEAR_TABLES)}")
+    if level not in LEVEL_SETTINGS:
+        raise ValueError(f"Unknown level: '{level}'. Valid levels are: {list(DIFF_LEVELS)}")
+
+    settings = LEVEL_SETTINGS[level]
+    rng = random.Random(f'{seed}:{level}' if seed is not None else None)
+    if not formats:
+        year_formats = YEAR_FORMATS.get(year_group, FACT_FORMATS)
+        formats = [f for f in settings['formats'] if f in year_formats]
+    formats = list(formats)
+    fact_count = fact_count or settings['facts']
+    max_factor = YEAR_MAX_FACTOR.get(year_group, DEFAULT_MAX_FACTOR)
+
+    if tables:
+        pool = list(dict.fromkeys(tables))
+    else:
+        # Tables named in the topic come first, then the year's other tables
+        pool = tables_from_text(topic)
+        pool += [t for t in YEAR_TABLES[year_group] if t not in pool]
+    per_section = settings['tables_per_section']
+
+    sections = []
+    for i in range(settings['sections']):
+        start = (i * per_section) % len(pool)
+        section_tables = list(dict.fromkeys((pool * 2)[start:start + per_section]))
+        if level == 'greater_depth' and i == settings['sections'] - 1:
+            # Final greater depth section mixes everything
+            section_tables = pool
+        label = _table_label(section_tables)
+        sections.append({
+            'title': f"The {label.replace('times table', 'Times Table')}" if len(section_tables) <= 3 else 'Mixed Tables',
+            'instructions': _INSTRUCTIONS[formats[-1]],
+            'tables_focus': label,
+            'facts': make_facts(section_tables, fact_count, formats, max_factor, rng),
+        })
+
+    speed_challenge = None
+    if settings['speed_challenge']:
+        speed = settings['speed_challenge']
+        speed_challenge = {
+            'title': 'Speed Challenge',
+            'instructions': f"How many can you answer in {speed['seconds']} seconds?",
+            'time_limit_seconds': speed['seconds'],
+            'facts': make_facts(pool, speed['facts'], formats, max_factor, rng),
+        }
+
+    focus = _table_label(pool[:3])
+    criteria = [
+        f'I can recall facts from the {focus}.',
+        'I can answer times tables facts quickly and accurately.',
+    ]
+    if 'missing' in formats:
+        criteria.append('I can find a missing number in a multiplication fact.')
+    if 'division' in formats:
+        criteria.append('I can use multiplication facts to solve division facts.')
+    if 'derived' in formats:
+        criteria.append('I can use facts I know to work out bigger facts.')
+
+    return {
+        'title': f"{THEMES[theme_key]['name']} Times Tables",
+        'sections': sections,
+        'speed_challenge': speed_challenge,
+        'success_criteria': criteria,
+    }
+
+
+def generate_times_tables_set(
+    year_group: str,
+    levels: Optional[Iterable[str]] = None,
+    seed=None,
+    **kwargs,
+) -> Dict[str, dict]:
+    """Build content for several levels at once, keyed by level."""
+    return {
+        level: generate_times_tables_content(year_group, level, seed=seed, **kwargs)
+        for level in (levels or DIFF_LEVELS)
+    }
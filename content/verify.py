@@ -0,0 +1,406 @@
+"""
+Answer verification for maths worksheet content.
+
+Claude writes both the questions and the answer key, and occasionally
+gets an answer wrong. ``verify_content`` re-reads every question with a
+small exact-arithmetic parser, recomputes the answer with
+``fractions.Fraction`` and corrects the answer key in place, so one wrong
+answer no longer means regenerating a whole level.
+
+The parser understands integers, decimals, fractions (3/4), mixed numbers
+(2 1/3), + - x × * ÷ /, "of", brackets and a single blank
+(___, ? or □) anywhere in the calculation. Questions it cannot read,
+such as word problems, are left unchecked.
+"""
+
+import re
+import logging
+from fractions import Fraction
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Where each worksheet type keeps its answerable items: (container path, list key)
+ITEM_LISTS = {
+    'calculation_practice': [('sections', 'calculations')],
+    'fraction_practice': [('sections', 'exercises')],
+    'times_tables': [('sections', 'facts'), ('speed_challenge', 'facts')],
+}
+
+COMPARISONS = ('<', '>', '=')
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<mixed>\d+\s+\d+/\d+(?![\d.]))
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<blank>_+|\?|\u25a1)
+      | (?P<op>[-+*/()\u00d7\u00f7\u2212xX=<>]|of\b)
+    )""", re.VERBOSE)
+
+_THOUSANDS = re.compile(r'(?<=\d),(?=\d{3}\b)')
+_REMAINDER = re.compile(r'^\s*(\d+)\s*r\s*(\d+)\s*$', re.IGNORECASE)
+_INT_DIVISION = re.compile(r'^\s*(\d+)\s*\u00f7\s*(\d+)\s*$')
+_WORD = re.compile(r'[A-Za-z]+')
+
+# Words that may appear in a checkable calculation
+OPERATOR_WORDS = frozenset({'of', 'x', 'X'})
+
+# Questions or section instructions asking for an approximate answer
+_APPROXIMATE = re.compile(r'estimat|round|approx|nearest|\u2248', re.IGNORECASE)
+
+
+class Unreadable(ValueError):
+    """Raised when a question or answer is not a calculation the parser can check."""
+
+
+# ─── Parsing ──────────────────────────────────────────────────────────────────
+
+def parse_number(text: str) -> Fraction:
+    """
+    Parse "7", "-2.5", "3/4" or "2 1/3" exactly.
+
+    Raises:
+        Unreadable: If ``text`` is not a single number.
+    """
+    text = _THOUSANDS.sub('', text.strip().rstrip('.')).replace('\u2212', '-')
+    negative = text.startswith('-')
+    text = text.lstrip('-').strip()
+    try:
+        if ' ' in text:
+            whole, rest = text.split(None, 1)
+            value = int(whole) + Fraction(rest)
+            if '/' not in rest:
+                raise Unreadable(text)
+        else:
+            value = Fraction(text)
+    except (ValueError, ZeroDivisionError):
+        raise Unreadable(text) from None
+    return -value if negative else value
+
+
+def _tokenise(text: str) -> List[Tuple[str, object]]:
+    text = _THOUSANDS.sub('', text)
+    tokens, pos = [], 0
+    while pos < len(text):
+        if text[pos:].strip() == '':
+            break
+        match = _TOKEN.match(text, pos)
+        if not match:
+            raise Unreadable(text)
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ('mixed', 'number'):
+            tokens.append(('num', parse_number(value)))
+        elif kind == 'blank':
+            tokens.append(('blank', None))
+        else:
+            # A slash written without spaces is a fraction bar and binds tightest
+            if value == '/':
+                tight = match.start(kind) > 0 and not text[match.start(kind) - 1].isspace()
+                value = '//' if tight else '\u00f7'
+            tokens.append(('op', {'x': '\u00d7', 'X': '\u00d7', '*': '\u00d7', 'of': '\u00d7',
+                                  '\u2212': '-'}.get(value, value)))
+        pos = match.end()
+    return tokens
+
+
+# Values are (numerator, denominator) pairs of linear forms (constant, coefficient)
+# in the single unknown. With one blank, every product has a constant side.
+_ZERO, _ONE = Fraction(0), Fraction(1)
+_BLANK = ((_ZERO, _ONE), (_ONE, _ZERO))
+
+def _lin_mul(a, b):
+    if a[1] and b[1]:
+        raise Unreadable('unknown appears twice')
+    return (a[0] * b[0], a[0] * b[1] + a[1] * b[0])
+
+
+def _const(value: Fraction):
+    return ((value, _ZERO), (_ONE, _ZERO))
+
+
+def _combine(op: str, left, right):
+    (ln, ld), (rn, rd) = left, right
+    if op in ('+', '-'):
+        cross = _lin_mul(rn, ld)
+        if op == '-':
+            cross = (-cross[0], -cross[1])
+        first = _lin_mul(ln, rd)
+        return (first[0] + cross[0], first[1] + cross[1]), _lin_mul(ld, rd)
+    if op == '\u00d7':
+        return _lin_mul(ln, rn), _lin_mul(ld, rd)
+    # Division
+    if rn == (0, 0):
+        raise Unreadable('division by zero')
+    return _lin_mul(ln, rd), _lin_mul(ld, rn)
+
+
+class _Parser:
+    """Recursive-descent parser for one side of a question."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.blanks = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        value = self.expression()
+        if self.pos != len(self.tokens):
+            raise Unreadable('trailing tokens')
+        return value
+
+    def expression(self):
+        value = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            value = _combine(self.take()[1], value, self.term())
+        return value
+
+    def term(self):
+        value = self.fraction()
+        while self.peek() in (('op', '\u00d7'), ('op', '\u00f7')):
+            value = _combine(self.take()[1], value, self.fraction())
+        return value
+
+    def fraction(self):
+        value = self.atom()
+        while self.peek() == ('op', '//'):
+            self.take()
+            value = _combine('\u00f7', value, self.atom())
+        return value
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == 'num':
+            return _const(value)
+        if kind == 'blank':
+            self.blanks += 1
+            return _BLANK
+        if (kind, value) == ('op', '-'):
+            (n, d) = self.atom()
+            return (-n[0], -n[1]), d
+        if (kind, value) == ('op', '('):
+            inner = self.expression()
+            if self.take() != ('op', ')'):
+                raise Unreadable('unbalanced brackets')
+            return inner
+        raise Unreadable(f'unexpected token {value!r}')
+
+
+def _side(tokens):
+    parser = _Parser(tokens)
+    return parser.parse(), parser.blanks
+
+
+def _maths_part(question: str) -> str:
+    """
+    Return the calculation in ``question``, without a trailing full stop.
+
+    Raises:
+        Unreadable: If the question has any words besides OPERATOR_WORDS,
+            e.g. "Estimate 398 + 204 = ___" or a word problem.
+    """
+    if any(word not in OPERATOR_WORDS for word in _WORD.findall(question)):
+        raise Unreadable(question)
+    match = re.search(r'[\d(_?\u25a1\u2212-]', question)
+    if not match:
+        raise Unreadable(question)
+    return question[match.start():].strip().rstrip('.')
+
+
+def solve(question: str) -> Fraction:
+    """
+    Return the exact value that fills the blank in ``question``.
+
+    "345 + 278 = ___" gives 623, "? x 4 = 28" gives 7 and
+    "3/4 = ___/20" gives 15.
+
+    Raises:
+        Unreadable: If the question is not a single-blank calculation.
+    """
+    tokens = _tokenise(_maths_part(question))
+    sides = [[]]
+    for token in tokens:
+        if token == ('op', '='):
+            sides.append([])
+        else:
+            sides[-1].append(token)
+    if len(sides) != 2 or not all(sides):
+        raise Unreadable(question)
+
+    (ln, ld), left_blanks = _side(sides[0])
+    (rn, rd), right_blanks = _side(sides[1])
+    if left_blanks + right_blanks != 1:
+        raise Unreadable('expected exactly one blank')
+
+    # ln/ld = rn/rd  ->  ln*rd - rn*ld = 0, linear in the blank
+    a, b = _lin_mul(ln, rd), _lin_mul(rn, ld)
+    constant, coefficient = a[0] - b[0], a[1] - b[1]
+    if not coefficient:
+        raise Unreadable('blank does not affect the result')
+    answer = -constant / coefficient
+    denominators = (ld[0] + ld[1] * answer, rd[0] + rd[1] * answer)
+    if not all(denominators):
+        raise Unreadable('division by zero')
+    return answer
+
+
+def compare(question: str) -> str:
+    """
+    Return "<", ">" or "=" for a comparison such as "3/4 ___ 1/2".
+
+    Raises:
+        Unreadable: If the question is not two calculations around one blank.
+    """
+    tokens = _tokenise(_maths_part(question))
+    blanks = [i for i, token in enumerate(tokens) if token[0] == 'blank']
+    if len(blanks) != 1:
+        raise Unreadable(question)
+    i = blanks[0]
+    (ln, ld), left_blanks = _side(tokens[:i])
+    (rn, rd), right_blanks = _side(tokens[i + 1:])
+    left, right = ln[0] / ld[0], rn[0] / rd[0]
+    return '<' if left < right else '>' if left > right else '='
+
+
+# ─── Checking ─────────────────────────────────────────────────────────────────
+
+def _decimal(value: Fraction) -> Optional[str]:
+    """Write ``value`` exactly as a decimal, or return None if it does not terminate."""
+    twos = fives = 0
+    denominator = value.denominator
+    while denominator % 2 == 0:
+        denominator //= 2
+        twos += 1
+    while denominator % 5 == 0:
+        denominator //= 5
+        fives += 1
+    if denominator != 1:
+        return None
+    places = max(twos, fives)
+    digits = str(abs(value.numerator) * 10 ** places // value.denominator).rjust(places + 1, '0')
+    sign = '-' if value < 0 else ''
+    return f'{sign}{digits[:-places]}.{digits[-places:]}' if places else f'{sign}{digits}'
+
+
+def format_answer(value: Fraction, like: str = '', decimal: bool = False) -> str:
+    """
+    Write ``value`` in the same style as the answer it replaces.
+
+    Whole numbers are plain; decimals stay decimals, written out exactly,
+    when ``like`` was one (or ``decimal`` is set because the question used
+    decimals) and the value terminates; other fractions are mixed numbers
+    unless ``like`` was written as an improper fraction.
+    """
+    if value.denominator == 1:
+        return str(value.numerator)
+    if decimal or '.' in like:
+        written = _decimal(value)
+        if written is not None:
+            return written
+    improper = re.fullmatch(r'\s*-?\d+/\d+\s*', like or '')
+    if abs(value) > 1 and not improper:
+        whole, rest = divmod(abs(value.numerator), value.denominator)
+        sign = '-' if value < 0 else ''
+        return f'{sign}{whole} {rest}/{value.denominator}'
+    return f'{value.numerator}/{value.denominator}'
+
+
+def check_answer(item: dict, instructions: str = '') -> Optional[str]:
+    """
+    Return the corrected answer for ``item``, or None if it is right or uncheckable.
+
+    ``item`` is a calculation, fact or fraction exercise with ``question``
+    and ``answer`` keys; fraction exercises may also carry a ``diagram``.
+    ``instructions`` is the title and instructions of its section: items
+    in a section about estimating or rounding are never checked.
+    """
+    question = str(item.get('question') or '')
+    given = str(item.get('answer') or '').strip()
+    if not question or not given or _APPROXIMATE.search(f'{question} {instructions}'):
+        return None
+
+    try:
+        if given in COMPARISONS:
+            correct = compare(question)
+            return None if correct == given else correct
+
+        if not re.search(r'\d', question) and isinstance(item.get('diagram'), dict):
+            # "What fraction is shaded?" is answered by the diagram itself
+            diagram = item['diagram']
+            correct = Fraction(int(diagram['shaded']), int(diagram['total']))
+            return None if parse_number(given) == correct else f"{diagram['shaded']}/{diagram['total']}"
+
+        correct = solve(question)
+        remainder = _REMAINDER.match(given)
+        if remainder:
+            division = _INT_DIVISION.match(_maths_part(question).split('=')[0])
+            if not division:
+                return None
+            dividend, divisor = int(division.group(1)), int(division.group(2))
+            quotient, rest = divmod(dividend, divisor)
+            if (int(remainder.group(1)), int(remainder.group(2))) == (quotient, rest):
+                return None
+            return f'{quotient} r {rest}' if rest else str(quotient)
+
+        return None if parse_number(given) == correct else format_answer(
+            correct, given, decimal=bool(re.search(r'\d\.\d', question)))
+    except (Unreadable, KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _section_text(section: dict) -> str:
+    return f"{section.get('title') or ''} {section.get('instructions') or ''}"
+
+
+def _items(worksheet_type: str, content: dict):
+    """Yield ``(path, item, section title and instructions)`` for every answerable item."""
+    for container_key, list_key in ITEM_LISTS.get(worksheet_type, []):
+        container = content.get(container_key)
+        if isinstance(container, dict):
+            for i, item in enumerate(container.get(list_key) or []):
+                yield f'{container_key}.{list_key}[{i}]', item, _section_text(container)
+        elif isinstance(container, list):
+            for s, section in enumerate(container):
+                if not isinstance(section, dict):
+                    continue
+                for i, item in enumerate(section.get(list_key) or []):
+                    yield f'{container_key}[{s}].{list_key}[{i}]', item, _section_text(section)
+
+
+def verify_content(worksheet_type: str, content: dict) -> List[dict]:
+    """
+    Recompute every checkable answer in ``content`` and fix wrong ones in place.
+
+    Each corrected item keeps its original answer under ``corrected_from``.
+    Worksheet types without calculations are returned untouched.
+
+    Returns:
+        One ``{path, question, answer, corrected}`` dict per corrected item,
+        where ``answer`` is the original answer.
+    """
+    corrections = []
+    if not isinstance(content, dict):
+        return corrections
+    for path, item, instructions in _items(worksheet_type, content):
+        if not isinstance(item, dict):
+            continue
+        corrected = check_answer(item, instructions)
+        if corrected is None:
+            continue
+        corrections.append({
+            'path': path,
+            'question': item.get('question'),
+            'answer': item.get('answer'),
+            'corrected': corrected,
+        })
+        item['corrected_from'] = item.get('answer')
+        item['answer'] = corrected
+    return corrections
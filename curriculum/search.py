@@ -0,0 +1,295 @@
+"""
+Ranked full-text search over every topic and objective in SUBJECT_REGISTRY.
+
+The index is built once per process, on the first search, and kept:
+
+- ``postings`` maps each stemmed term to the entries containing it and a
+  weight (topic and strand words count for more than objective words).
+- ``vocab`` is every term, sorted, so the last word of a query can also
+  match as a prefix while it is still being typed.
+- ``trigrams`` maps character trigrams to terms, so a misspelt word is
+  matched to the closest terms in the vocabulary.
+
+Every (subject, year group, strand, topic) and every objective is one
+entry; about 1,900 across all subjects, searched in well under a
+millisecond.
+"""
+
+import re
+import math
+import bisect
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from curriculum import SUBJECT_REGISTRY
+
+
+# Weight of a word by the field it appears in
+FIELD_WEIGHTS = {"text": 2.0, "strand": 1.0, "subject": 0.5}
+
+# Score multipliers for words matched by prefix or by spelling
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.5
+
+# Smallest trigram overlap for a misspelt word to match a term
+MIN_TRIGRAM_SIMILARITY = 0.45
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "for", "from", "how", "in", "into",
+    "is", "it", "its", "of", "on", "or", "that", "the", "their", "they", "this", "to", "use",
+    "using", "what", "when", "which", "who", "with",
+})
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# (suffix, replacement, shortest stem left) in the order they are tried
+_SUFFIXES = (
+    ("ational", "ate", 2), ("ation", "ate", 3), ("ness", "", 3), ("ment", "", 3), ("ies", "y", 2),
+    ("sses", "ss", 2), ("ing", "", 3), ("ed", "", 3), ("ly", "", 3), ("es", "", 3), ("s", "", 3),
+)
+
+
+# ─── Text ──────────────────────────────────────────────────────────────────────
+
+
+@lru_cache(maxsize=None)
+def stem(word: str) -> str:
+    """
+    Reduce a lower-case word to a stem by stripping one common suffix.
+
+    A light suffix stripper rather than a full Porter stemmer: it only
+    has to map "fractions", "fraction" and "fractional" together, and
+    gives the same stem for a word in a query as in the curriculum.
+    """
+    for suffix, replacement, min_stem in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_stem:
+            if suffix == "s" and word.endswith(("ss", "us", "is")):
+                return word
+            word = word[:-len(suffix)] + replacement
+            # "running" -> "runn" -> "run"
+            if suffix in ("ing", "ed") and len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            return word
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Return the lower-case words of ``text``, without stop words."""
+    return [word for word in _WORD_RE.findall(text.lower().replace("'", "")) if word not in STOP_WORDS]
+
+
+def _trigrams(term: str) -> set:
+    padded = f"#{term}#"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ─── Index ─────────────────────────────────────────────────────────────────────
+
+
+def _entries(registry: dict) -> List[dict]:
+    entries = []
+    for subject, config in registry.items():
+        for year_group, strands in config["curriculum"].items():
+            for strand, strand_data in strands.items():
+                for kind in ("topic", "objective"):
+                    for text in strand_data[f"{kind}s"]:
+                        entries.append({
+                            "kind": kind,
+                            "subject": subject,
+                            "year_group": year_group,
+                            "strand": strand,
+                            "topic": text if kind == "topic" else None,
+                            "text": text,
+                        })
+    return entries
+
+
+def build_index(registry: Optional[dict] = None) -> dict:
+    """
+    Build the search index over every topic and objective in ``registry``.
+
+    Args:
+        registry: A registry shaped like SUBJECT_REGISTRY. Defaults to it.
+
+    Returns:
+        Dictionary with ``entries``, ``postings`` (term -> {entry: weight}),
+        ``idf``, ``vocab`` and ``trigrams`` (trigram -> terms).
+    """
+    entries = _entries(SUBJECT_REGISTRY if registry is None else registry)
+    postings: Dict[str, Dict[int, float]] = {}
+    for entry_id, entry in enumerate(entries):
+        for field, field_weight in FIELD_WEIGHTS.items():
+            words = tokenize(entry[field])
+            if not words:
+                continue
+            # Words in a short topic title say more about it than words in a long objective
+            weight = field_weight / math.sqrt(len(words))
+            for term in {stem(word) for word in words}:
+                entry_weights = postings.setdefault(term, {})
+                entry_weights[entry_id] = entry_weights.get(entry_id, 0.0) + weight
+
+    idf = {term: math.log(1 + len(entries) / len(entry_weights)) for term, entry_weights in postings.items()}
+    trigrams: Dict[str, List[str]] = {}
+    for term in postings:
+        for trigram in _trigrams(term):
+            trigrams.setdefault(trigram, []).append(term)
+    return {
+        "entries": entries,
+        "postings": postings,
+        "idf": idf,
+        "vocab": sorted(postings),
+        "trigrams": trigrams,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_index() -> dict:
+    """Return the index over SUBJECT_REGISTRY, building it on first use."""
+    return build_index()
+
+
+def _prefix_terms(index: dict, prefix: str) -> List[str]:
+    vocab = index["vocab"]
+    start = bisect.bisect_left(vocab, prefix)
+    end = bisect.bisect_left(vocab, prefix + "\uffff")
+    return vocab[start:end]
+
+
+def _fuzzy_terms(index: dict, word: str) -> List[tuple]:
+    """Return ``(term, similarity)`` for terms spelt like ``word``."""
+    word_trigrams = _trigrams(word)
+    shared: Dict[str, int] = {}
+    for trigram in word_trigrams:
+        for term in index["trigrams"].get(trigram, ()):
+            shared[term] = shared.get(term, 0) + 1
+    matches = []
+    for term, count in shared.items():
+        # A term padded with "#" at each end has len(term) trigrams
+        similarity = count / (len(word_trigrams) + len(term) - count)
+        if similarity >= MIN_TRIGRAM_SIMILARITY:
+            matches.append((term, similarity))
+    return matches
+
+
+def _word_terms(index: dict, word: str, prefix: bool) -> Dict[str, float]:
+    """Return the terms ``word`` matches, each with its score multiplier."""
+    term = stem(word)
+    terms = {term: 1.0} if term in index["postings"] else {}
+    if prefix and len(word) >= 2:
+        for match in _prefix_terms(index, word):
+            terms.setdefault(match, PREFIX_WEIGHT)
+    if not terms and len(word) >= 4:
+        for match, similarity in _fuzzy_terms(index, term):
+            terms[match] = FUZZY_WEIGHT * similarity
+    return terms
+
+
+# ─── Search ────────────────────────────────────────────────────────────────────
+
+
+def search_curriculum(
+    query: str,
+    subject: Optional[str] = None,
+    year_group: Optional[str] = None,
+    kind: Optional[str] = None,
+    limit: int = 10,
+    prefix: bool = True,
+) -> List[dict]:
+    """
+    Rank curriculum topics and objectives against a free-text query.
+
+    Entries matching more of the query's words always rank above entries
+    matching fewer; within that, rarer words and words in topic titles
+    count for more.
+
+    Args:
+        query: Free text, e.g. "fractions of amounts" or "romans".
+        subject: Only search this subject.
+        year_group: Only search this year group.
+        kind: "topic" or "objective" to search only one kind of entry.
+        limit: Most results to return.
+        prefix: Also match the last word as the start of a longer word,
+            for search-as-you-type.
+
+    Returns:
+        Up to ``limit`` entries, best first. Each is a dict with ``kind``,
+        ``subject``, ``year_group``, ``strand``, ``topic`` (None for an
+        objective), ``text`` and ``score``.
+
+    Raises:
+        ValueError: If ``kind`` is not "topic" or "objective".
+    """
+    if kind not in (None, "topic", "objective"):
+        raise ValueError(f"Unknown kind: '{kind}'. Valid kinds are: ['topic', 'objective']")
+    index = get_index()
+    words = tokenize(query)
+    if not words:
+        return []
+
+    entries = index["entries"]
+    scores: Dict[int, float] = {}
+    matched: Dict[int, int] = {}
+    for position, word in enumerate(words):
+        word_scores: Dict[int, float] = {}
+        last = position == len(words) - 1
+        for term, multiplier in _word_terms(index, word, prefix and last).items():
+            idf = index["idf"][term]
+            for entry_id, weight in index["postings"][term].items():
+                score = multiplier * idf * weight
+                if score > word_scores.get(entry_id, 0.0):
+                    word_scores[entry_id] = score
+        for entry_id, score in word_scores.items():
+            scores[entry_id] = scores.get(entry_id, 0.0) + score
+            matched[entry_id] = matched.get(entry_id, 0) + 1
+
+    results = []
+    for entry_id, score in scores.items():
+        entry = entries[entry_id]
+        if ((subject and entry["subject"] != subject) or (year_group and entry["year_group"] != year_group)
+                or (kind and entry["kind"] != kind)):
+            continue
+        results.append((entry_id, score))
+    # Most query words matched first, then highest score, then curriculum order
+    results.sort(key=lambda result: (-matched[result[0]], -result[1], result[0]))
+    return [{**entries[entry_id], "score": round(score, 3)} for entry_id, score in results[:limit]]
+
+
+def closest_objectives(
+    text: str,
+    subject: Optional[str] = None,
+    year_group: Optional[str] = None,
+    limit: int = 3,
+) -> List[dict]:
+    """
+    Return the curriculum objectives closest to a free-text topic.
+
+    Used to give a custom topic a curriculum objective. An objective can
+    match the text itself, or be the first objective of a strand whose
+    topic matches: "The Great Fire of London" shares no words with any
+    objective but is a Year 2 history topic. Words are matched whole,
+    never as prefixes.
+
+    Args:
+        text: The custom topic, e.g. "The Great Fire of London".
+        subject: Only consider this subject's objectives.
+        year_group: Only consider this year group's objectives.
+        limit: Most objectives to return.
+
+    Returns:
+        Objective entries as returned by ``search_curriculum``, best first.
+    """
+    objectives, seen = [], set()
+    for result in search_curriculum(text, subject=subject, year_group=year_group, limit=limit * 4, prefix=False):
+        if result["kind"] == "topic":
+            strand_objectives = SUBJECT_REGISTRY[result["subject"]]["curriculum"][result["year_group"]][
+                result["strand"]]["objectives"]
+            if not strand_objectives:
+                continue
+            result = {**result, "kind": "objective", "topic": None, "text": strand_objectives[0]}
+        key = (result["subject"], result["year_group"], result["text"])
+        if key not in seen:
+            seen.add(key)
+            objectives.append(result)
+        if len(objectives) == limit:
+            break
+    return objectives
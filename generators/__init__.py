@@ -0,0 +1,65 @@
+"""
+Generator registry for the UK National Curriculum worksheet generator.
+
+Maps each worksheet type key to the function that renders its content
+as a Word document.
+
+Each generator module (and python-docx with it) is imported the first
+time its worksheet type is looked up, so importing this package, or
+``generators.styles`` for the themes and levels, costs nothing until a
+document is actually built.
+"""
+
+import importlib
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, Tuple
+
+
+# Worksheet type key -> (module, function) of its generator
+GENERATOR_PATHS: Dict[str, Tuple[str, str]] = {
+    "cloze": ("generators.cloze", "generate_cloze_worksheet"),
+    "word_bank": ("generators.word_bank", "generate_word_bank_worksheet"),
+    "matching": ("generators.matching", "generate_matching_worksheet"),
+    "sentence_builder": ("generators.sentence_builder", "generate_sentence_builder_worksheet"),
+    "reading_comprehension": ("generators.reading_comprehension", "generate_reading_comprehension_worksheet"),
+    "problem_solving": ("generators.problem_solving", "generate_problem_solving_worksheet"),
+    "calculation_practice": ("generators.calculation_practice", "generate_calculation_practice_worksheet"),
+    "investigation": ("generators.investigation", "generate_investigation_worksheet"),
+    "fraction_practice": ("generators.fraction_practice", "generate_fraction_practice_worksheet"),
+    "times_tables": ("generators.times_tables", "generate_times_tables_worksheet"),
+}
+
+
+class LazyRegistry(Mapping):
+    """
+    Read-only mapping of keys to functions that are imported on first use.
+
+    Keys, ``len`` and ``in`` never import anything; looking a key up
+    imports its module once and keeps the function.
+    """
+
+    def __init__(self, paths: Dict[str, Tuple[str, str]]):
+        self._paths = paths
+        self._loaded: Dict[str, Callable] = {}
+
+    def __getitem__(self, key: str) -> Callable:
+        try:
+            return self._loaded[key]
+        except KeyError:
+            pass
+        module_name, attr = self._paths[key]
+        function = getattr(importlib.import_module(module_name), attr)
+        self._loaded[key] = function
+        return function
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({sorted(self._paths)}, loaded={sorted(self._loaded)})"
+
+
+GENERATOR_MAP = LazyRegistry(GENERATOR_PATHS)
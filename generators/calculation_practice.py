@@ -23,6 +23,7 @@ from generators.components import (
     set_cell_padding,
     set_table_full_width,
     remove_table_borders,
+    save_document,
 )
 from generators.styles import COLOURS, DIFF_LEVELS, FONT_NAME, THEMES
 from generators.fraction_practice import _parse_fraction_from_text
@@ -214,7 +215,4 @@ def generate_calculation_practice_worksheet(
     add_footer(doc, level, 'Calculation Practice')
 
     # 9. Save to BytesIO buffer and return
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
@@ -18,6 +18,7 @@ from generators.components import (
     add_success_criteria,
     add_eal_glossary_space,
     add_footer,
+    save_document,
 )
 
 
@@ -107,7 +108,4 @@ def generate_cloze_worksheet(
     add_footer(doc, level, 'Cloze Passage')
 
     # 10. Save to BytesIO buffer and return
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
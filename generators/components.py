@@ -4,52 +4,164 @@ Extracted and generalised from create_myth_worksheet.py.
 All components are theme-aware and support differentiation levels.
 """
 
+import io
+from copy import deepcopy
+from functools import lru_cache
+
 from docx import Document
 from docx.shared import Pt, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import nsdecls
+from docx.oxml.ns import nsdecls, qn
 from docx.oxml import parse_xml
+from docx.oxml.simpletypes import ST_HexColor, ST_HpsMeasure
 
-from generators.styles import FONT_NAME, COLOURS, WORD_TYPES, THEMES, DIFF_LEVELS
+from generators.styles import FONT_NAME, COLOURS, WORD_TYPES, THEMES, DIFF_LEVELS, NAMED_STYLES
+from telemetry import span
 
 
 # ─── Low-Level Helpers ─────────────────────────────────────────────────────────
 
 
-def set_run_font(run, font_name=FONT_NAME, size=Pt(14), bold=False, italic=False, colour=None):
-    """Apply consistent font formatting to a run."""
-    run.font.name = font_name
-    run.font.size = size
-    run.font.bold = bold
-    run.font.italic = italic
+@lru_cache(maxsize=1024)
+def _parsed_fragment(xml):
+    """Parse an XML fragment once; callers must clone the result."""
+    return parse_xml(xml)
+
+
+def xml_fragment(xml):
+    """Return a fresh copy of a parsed XML fragment (parsed once per distinct string)."""
+    return deepcopy(_parsed_fragment(xml))
+
+
+def _replace_child(parent, tag, element, index=None):
+    """Swap any existing ``tag`` children of ``parent`` for ``element``."""
+    if len(parent):
+        for e in parent.findall(qn(tag)):
+            parent.remove(e)
+    if index is None:
+        parent.append(element)
+    else:
+        parent.insert(index, element)
+
+
+# ─── Character Styles ──────────────────────────────────────────────────────────
+# Runs reference a shared character style instead of carrying their own font,
+# size, bold, italic and colour. Each distinct combination is added to the
+# document's styles part the first time it is used in that document.
+
+_COLOUR_ROLES = {str(rgb): role for role, rgb in COLOURS.items() if not isinstance(rgb, str)}
+
+
+@lru_cache(maxsize=1024)
+def _character_style_xml(style_id, name, font_name, size, bold, italic, colour):
+    """Build a <w:style> element for one character formatting combination."""
+    rpr = [f'<w:rFonts w:ascii="{font_name}" w:hAnsi="{font_name}" w:cs="{font_name}"/>']
+    if bold:
+        rpr.append('<w:b/>')
+    if italic:
+        rpr.append('<w:i/>')
+    if colour:
+        rpr.append(f'<w:color w:val="{ST_HexColor.convert_to_xml(colour)}"/>')
+    if size is not None:
+        rpr.append(f'<w:sz w:val="{ST_HpsMeasure.convert_to_xml(size)}"/>')
+    return (
+        f'<w:style {nsdecls("w")} w:type="character" w:customStyle="1" w:styleId="{style_id}">'
+        f'<w:name w:val="{name}"/><w:basedOn w:val="DefaultParagraphFont"/>'
+        f'<w:rPr>{"".join(rpr)}</w:rPr></w:style>'
+    )
+
+
+@lru_cache(maxsize=1024)
+def _auto_style_name(font_name, size, bold, italic, colour):
+    """Readable style name for an unnamed formatting combination, e.g. 'Hint Text 9pt Italic'."""
+    parts = []
     if colour:
-        run.font.color.rgb = colour
-    rPr = run._element.get_or_add_rPr()
-    rFonts = parse_xml(
-        f'<w:rFonts {nsdecls("w")} w:ascii="{font_name}" w:hAnsi="{font_name}" w:cs="{font_name}"/>'
+        role = _COLOUR_ROLES.get(str(colour))
+        parts.append(role.replace('_', ' ').title() if role else str(colour))
+    else:
+        parts.append('Text')
+    if size is not None:
+        parts.append(f'{size.pt:g}pt')
+    if bold:
+        parts.append('Bold')
+    if italic:
+        parts.append('Italic')
+    if font_name != FONT_NAME:
+        parts.append(font_name)
+    return ' '.join(parts)
+
+
+def _style_id(name):
+    return ''.join(ch for ch in name if ch.isalnum())
+
+
+def _ensure_character_style(part, name, font_name, size, bold, italic, colour):
+    """Add the character style to the run's document once and return its ID."""
+    created = getattr(part, '_worksheet_styles', None)
+    if created is None:
+        # Styles live in the main document part, shared by every story part
+        main = part.package.main_document_part
+        created = getattr(main, '_worksheet_styles', None)
+        if created is None:
+            created = main._worksheet_styles = set()
+        part._worksheet_styles = created
+
+    style_id = _style_id(name)
+    if style_id not in created:
+        styles = part.package.main_document_part.styles.element
+        styles.append(xml_fragment(
+            _character_style_xml(style_id, name, font_name, size, bold, italic, colour)
+        ))
+        created.add(style_id)
+    return style_id
+
+
+def _apply_character_style(run, style_id, replaces_colour):
+    r = run._element
+    if r.rPr is None:
+        r.insert(0, xml_fragment(f'<w:rPr {nsdecls("w")}><w:rStyle w:val="{style_id}"/></w:rPr>'))
+        return
+
+    # Drop direct formatting the style now provides so it cannot override it
+    rPr = r.rPr
+    tags = ('w:rFonts', 'w:b', 'w:i', 'w:sz') + (('w:color',) if replaces_colour else ())
+    for tag in tags:
+        for e in rPr.findall(qn(tag)):
+            rPr.remove(e)
+    _replace_child(rPr, 'w:rStyle', xml_fragment(f'<w:rStyle {nsdecls("w")} w:val="{style_id}"/>'), index=0)
+
+
+def set_run_font(run, font_name=FONT_NAME, size=Pt(14), bold=False, italic=False, colour=None):
+    """Apply consistent font formatting to a run via a shared character style."""
+    name = _auto_style_name(font_name, size, bold, italic, colour)
+    style_id = _ensure_character_style(run.part, name, font_name, size, bold, italic, colour)
+    _apply_character_style(run, style_id, replaces_colour=bool(colour))
+
+
+def set_run_style(run, name):
+    """Format a run with a named style from NAMED_STYLES, e.g. 'WT-verb-expected'."""
+    spec = NAMED_STYLES[name]
+    colour = spec.get('colour')
+    style_id = _ensure_character_style(
+        run.part, name, FONT_NAME, Pt(spec['size']),
+        spec.get('bold', False), spec.get('italic', False), colour,
     )
-    existing = rPr.findall(f'{{{rPr.nsmap["w"]}}}rFonts')
-    for e in existing:
-        rPr.remove(e)
-    rPr.insert(0, rFonts)
+    _apply_character_style(run, style_id, replaces_colour=bool(colour))
 
 
 def set_cell_shading(cell, colour_hex):
     """Set background colour of a table cell."""
     tcPr = cell._tc.get_or_add_tcPr()
-    shading = parse_xml(
+    shading = xml_fragment(
         f'<w:shd {nsdecls("w")} w:fill="{colour_hex}" w:val="clear"/>'
     )
-    existing = tcPr.findall(f'{{{tcPr.nsmap["w"]}}}shd')
-    for e in existing:
-        tcPr.remove(e)
-    tcPr.append(shading)
+    _replace_child(tcPr, 'w:shd', shading)
 
 
 def set_cell_borders(cell, colour_hex, sz=8):
     """Set all borders of a table cell."""
     tcPr = cell._tc.get_or_add_tcPr()
-    borders = parse_xml(
+    borders = xml_fragment(
         f'<w:tcBorders {nsdecls("w")}>'
         f'  <w:top w:val="single" w:sz="{sz}" w:space="0" w:color="{colour_hex}"/>'
         f'  <w:left w:val="single" w:sz="{sz}" w:space="0" w:color="{colour_hex}"/>'
@@ -57,16 +169,13 @@ def set_cell_borders(cell, colour_hex, sz=8):
         f'  <w:right w:val="single" w:sz="{sz}" w:space="0" w:color="{colour_hex}"/>'
         f'</w:tcBorders>'
     )
-    existing = tcPr.findall(f'{{{tcPr.nsmap["w"]}}}tcBorders')
-    for e in existing:
-        tcPr.remove(e)
-    tcPr.append(borders)
+    _replace_child(tcPr, 'w:tcBorders', borders)
 
 
 def set_cell_padding(cell, top=0, bottom=0, left=0, right=0):
     """Set cell padding in twips."""
     tcPr = cell._tc.get_or_add_tcPr()
-    margins = parse_xml(
+    margins = xml_fragment(
         f'<w:tcMar {nsdecls("w")}>'
         f'  <w:top w:w="{top}" w:type="dxa"/>'
         f'  <w:left w:w="{left}" w:type="dxa"/>'
@@ -74,10 +183,7 @@ def set_cell_padding(cell, top=0, bottom=0, left=0, right=0):
         f'  <w:right w:w="{right}" w:type="dxa"/>'
         f'</w:tcMar>'
     )
-    existing = tcPr.findall(f'{{{tcPr.nsmap["w"]}}}tcMar')
-    for e in existing:
-        tcPr.remove(e)
-    tcPr.append(margins)
+    _replace_child(tcPr, 'w:tcMar', margins)
 
 
 def set_table_full_width(table):
@@ -85,13 +191,10 @@ def set_table_full_width(table):
     tbl = table._tbl
     tblPr = tbl.tblPr
     if tblPr is None:
-        tblPr = parse_xml(f'<w:tblPr {nsdecls("w")}/>')
+        tblPr = xml_fragment(f'<w:tblPr {nsdecls("w")}/>')
         tbl.insert(0, tblPr)
-    tblW = parse_xml(f'<w:tblW {nsdecls("w")} w:w="5000" w:type="pct"/>')
-    existing = tblPr.findall(f'{{{tblPr.nsmap["w"]}}}tblW')
-    for e in existing:
-        tblPr.remove(e)
-    tblPr.append(tblW)
+    tblW = xml_fragment(f'<w:tblW {nsdecls("w")} w:w="5000" w:type="pct"/>')
+    _replace_child(tblPr, 'w:tblW', tblW)
 
 
 def remove_table_borders(table):
@@ -99,9 +202,9 @@ def remove_table_borders(table):
     tbl = table._tbl
     tblPr = tbl.tblPr
     if tblPr is None:
-        tblPr = parse_xml(f'<w:tblPr {nsdecls("w")}/>')
+        tblPr = xml_fragment(f'<w:tblPr {nsdecls("w")}/>')
         tbl.insert(0, tblPr)
-    borders = parse_xml(
+    borders = xml_fragment(
         f'<w:tblBorders {nsdecls("w")}>'
         f'  <w:top w:val="none" w:sz="0" w:space="0" w:color="auto"/>'
         f'  <w:left w:val="none" w:sz="0" w:space="0" w:color="auto"/>'
@@ -111,10 +214,7 @@ def remove_table_borders(table):
         f'  <w:insideV w:val="none" w:sz="0" w:space="0" w:color="auto"/>'
         f'</w:tblBorders>'
     )
-    existing = tblPr.findall(f'{{{tblPr.nsmap["w"]}}}tblBorders')
-    for e in existing:
-        tblPr.remove(e)
-    tblPr.append(borders)
+    _replace_child(tblPr, 'w:tblBorders', borders)
 
 
 def set_no_spacing(paragraph):
@@ -126,8 +226,9 @@ def set_no_spacing(paragraph):
 # ─── Document Setup ────────────────────────────────────────────────────────────
 
 
-def create_base_document(extra_spacing=False):
-    """Create a new Document with standard page margins and default font."""
+@lru_cache(maxsize=None)
+def _base_document_bytes(extra_spacing):
+    """Build and serialise the configured blank document for one spacing variant."""
     doc = Document()
 
     for section in doc.sections:
@@ -140,23 +241,50 @@ def create_base_document(extra_spacing=False):
     style.font.name = FONT_NAME
     style.font.size = Pt(14)
     rPr = style.element.get_or_add_rPr()
-    rFonts = parse_xml(
+    rFonts = xml_fragment(
         f'<w:rFonts {nsdecls("w")} w:ascii="{FONT_NAME}" w:hAnsi="{FONT_NAME}" w:cs="{FONT_NAME}"/>'
     )
-    existing = rPr.findall(f'{{{rPr.nsmap["w"]}}}rFonts')
-    for e in existing:
-        rPr.remove(e)
-    rPr.insert(0, rFonts)
+    _replace_child(rPr, 'w:rFonts', rFonts, index=0)
 
     if extra_spacing:
         style.paragraph_format.line_spacing = Pt(36)
 
+    # Drop the template's ~150 unused built-in styles; worksheets only use the
+    # defaults plus the character styles they add themselves
+    styles = doc.styles.element
+    for s in styles.findall(qn('w:style')):
+        if s.get(qn('w:default')) != '1':
+            styles.remove(s)
+
     # Remove the default empty paragraph
     if doc.paragraphs:
         p = doc.paragraphs[0]
         p._element.getparent().remove(p._element)
 
-    return doc
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def create_base_document(extra_spacing=False):
+    """
+    Create a new Document with standard page margins and default font.
+
+    The configured blank document is built once per spacing variant and
+    kept as .docx bytes, so each worksheet starts from that copy instead
+    of re-applying margins and styles to python-docx's default template.
+    """
+    return Document(io.BytesIO(_base_document_bytes(bool(extra_spacing))))
+
+
+def save_document(doc):
+    """Serialise a finished worksheet to an in-memory .docx, rewound for reading."""
+    with span("docx.save") as record:
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        record["attrs"]["bytes"] = buffer.getbuffer().nbytes
+    buffer.seek(0)
+    return buffer
 
 
 # ─── High-Level Components ─────────────────────────────────────────────────────
@@ -367,7 +495,7 @@ def add_word_bank(doc, word_bank_data, level='expected'):
     remove_table_borders(grid)
 
     tblPr = grid._tbl.tblPr
-    cell_spacing = parse_xml(f'<w:tblCellSpacing {nsdecls("w")} w:w="40" w:type="dxa"/>')
+    cell_spacing = xml_fragment(f'<w:tblCellSpacing {nsdecls("w")} w:w="40" w:type="dxa"/>')
     tblPr.append(cell_spacing)
 
     font_size = diff['font_size'] - 2
@@ -440,7 +568,6 @@ def add_cloze_paragraph(cell_or_doc, pieces, level='expected', is_first=False, s
     else:
         p = cell_or_doc.add_paragraph()
 
-    body_size = Pt(diff['font_size'])
     line_height = Pt(diff['line_spacing'])
 
     p.paragraph_format.space_before = Pt(6) if is_dev else Pt(4)
@@ -451,11 +578,13 @@ def add_cloze_paragraph(cell_or_doc, pieces, level='expected', is_first=False, s
         if piece['type'] == 'text':
             if piece.get('text'):
                 run = p.add_run(piece['text'])
-                set_run_font(run, size=body_size, colour=COLOURS['black'])
+                set_run_style(run, f'Body-{level}')
 
         elif piece['type'] == 'blank':
             word_type = piece.get('word_type', 'open')
-            wt = WORD_TYPES.get(word_type, WORD_TYPES['open'])
+            if word_type not in WORD_TYPES:
+                word_type = 'open'
+            wt = WORD_TYPES[word_type]
             choices = piece.get('choices')
             hint = piece.get('hint', '')
 
@@ -463,26 +592,24 @@ def add_cloze_paragraph(cell_or_doc, pieces, level='expected', is_first=False, s
                 # Answer key mode: show the answer word instead of a blank
                 answer_text = piece.get('answer', '[answer not provided]')
                 answer_run = p.add_run(f' [{answer_text}] ')
-                set_run_font(answer_run, size=body_size, bold=True, colour=wt['text'])
+                set_run_style(answer_run, f'WT-{word_type}-{level}')
             else:
                 # Student mode: symbol + blank, all inline so the sentence reads cleanly
                 symbol_run = p.add_run(f' {wt["symbol"]} ')
-                set_run_font(symbol_run, size=body_size, bold=True, colour=wt['text'])
+                set_run_style(symbol_run, f'WT-{word_type}-{level}')
 
                 blank_run = p.add_run('__________ ')
-                set_run_font(blank_run, size=body_size, bold=True, colour=wt['text'])
+                set_run_style(blank_run, f'WT-{word_type}-{level}')
 
                 if is_dev and choices:
                     # Developing: show choices inline in brackets
                     choices_str = ' / '.join(choices)
                     choice_run = p.add_run(f'({choices_str}) ')
-                    hint_size = Pt(diff['font_size'] - 2)
-                    set_run_font(choice_run, size=hint_size, italic=True, colour=wt['text'])
+                    set_run_style(choice_run, f'Choice-{word_type}-{level}')
                 elif hint:
                     # Expected/Greater Depth: show hint inline in brackets
                     hint_run = p.add_run(f'({hint}) ')
-                    hint_size = Pt(diff['font_size'] - 4)
-                    set_run_font(hint_run, size=hint_size, italic=True, colour=wt['text'])
+                    set_run_style(hint_run, f'Hint-{word_type}-{level}')
 
 
 def add_section_body(doc, paragraphs_data, theme_key='classic', level='expected', show_answers=False):
@@ -650,7 +777,7 @@ def _add_word_card_row(doc, parts, font_size):
     remove_table_borders(table)
 
     tblPr = table._tbl.tblPr
-    cell_spacing = parse_xml(f'<w:tblCellSpacing {nsdecls("w")} w:w="30" w:type="dxa"/>')
+    cell_spacing = xml_fragment(f'<w:tblCellSpacing {nsdecls("w")} w:w="30" w:type="dxa"/>')
     tblPr.append(cell_spacing)
 
     for i, part in enumerate(parts):
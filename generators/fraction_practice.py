@@ -24,6 +24,7 @@ from generators.components import (
     set_cell_padding,
     set_table_full_width,
     remove_table_borders,
+    save_document,
 )
 from generators.styles import COLOURS, DIFF_LEVELS, FONT_NAME, THEMES
 from docx.shared import Pt, RGBColor
@@ -394,7 +395,4 @@ def generate_fraction_practice_worksheet(
     add_footer(doc, level, 'Fraction Practice')
 
     # 9. Save to BytesIO buffer and return
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
@@ -27,6 +27,7 @@ from generators.components import (
     set_table_full_width,
     remove_table_borders,
     set_no_spacing,
+    save_document,
 )
 from generators.styles import FONT_NAME, COLOURS, THEMES, DIFF_LEVELS
 
@@ -370,7 +371,4 @@ def generate_investigation_worksheet(
     add_footer(doc, level, 'Investigation Planner')
 
     # 14. Save to BytesIO buffer and return
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
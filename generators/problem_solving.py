@@ -25,6 +25,7 @@ from generators.components import (
     set_cell_borders,
     set_cell_padding,
     set_no_spacing,
+    save_document,
 )
 from generators.styles import COLOURS, DIFF_LEVELS, THEMES
 
@@ -250,7 +251,4 @@ def generate_problem_solving_worksheet(
     add_footer(doc, level, 'Problem Solving')
 
     # 10. Save to BytesIO buffer and return
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
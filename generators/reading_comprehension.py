@@ -17,6 +17,7 @@ from generators.components import (
     add_success_criteria,
     add_eal_glossary_space,
     add_footer,
+    save_document,
 )
 
 
@@ -94,7 +95,4 @@ def generate_reading_comprehension_worksheet(
     add_footer(doc, level, 'Reading Comprehension')
 
     # 10. Save to BytesIO buffer and return
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
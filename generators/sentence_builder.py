@@ -20,6 +20,7 @@ from generators.components import (
     add_footer,
     set_run_font,
     set_no_spacing,
+    save_document,
 )
 from generators.styles import COLOURS, DIFF_LEVELS
 from docx.shared import Pt
@@ -167,7 +168,4 @@ def generate_sentence_builder_worksheet(
     add_footer(doc, level, 'Sentence Builder')
 
     # 10. Save to BytesIO buffer and return
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
@@ -3,7 +3,24 @@ Shared colour constants, font settings, word type definitions, and visual themes
 Extracted and expanded from create_myth_worksheet.py.
 """
 
-from docx.shared import RGBColor
+
+class Colour(tuple):
+    """
+    An (r, g, b) text colour; ``str()`` gives the hex Word uses, e.g. '1B3A5C'.
+
+    Behaves like python-docx's ``RGBColor`` wherever the generators use a
+    colour, without importing python-docx for code that only needs the
+    themes and levels (the app's first page, the local content engines).
+    """
+
+    def __new__(cls, r: int, g: int, b: int):
+        return super().__new__(cls, (r, g, b))
+
+    def __repr__(self):
+        return "Colour(0x%02X, 0x%02X, 0x%02X)" % self
+
+    def __str__(self):
+        return "%02X%02X%02X" % self
 
 
 FONT_NAME = 'Comic Sans MS'
@@ -13,17 +30,17 @@ FONT_NAME = 'Comic Sans MS'
 COLOURS = {
     'title_bg': 'FFF8E1',
     'title_border': 'F9A825',
-    'title_text': RGBColor(0x1B, 0x3A, 0x5C),
+    'title_text': Colour(0x1B, 0x3A, 0x5C),
     'reminder_bg': 'E0F2F1',
     'reminder_border': '0D7377',
-    'reminder_text': RGBColor(0x0D, 0x73, 0x77),
+    'reminder_text': Colour(0x0D, 0x73, 0x77),
     'criteria_bg': 'E8F5E9',
     'criteria_border': '2E7D32',
-    'criteria_text': RGBColor(0x2E, 0x7D, 0x32),
-    'grey_text': RGBColor(0x33, 0x33, 0x33),
-    'hint_text': RGBColor(0x66, 0x66, 0x66),
-    'black': RGBColor(0x00, 0x00, 0x00),
-    'white': RGBColor(0xFF, 0xFF, 0xFF),
+    'criteria_text': Colour(0x2E, 0x7D, 0x32),
+    'grey_text': Colour(0x33, 0x33, 0x33),
+    'hint_text': Colour(0x66, 0x66, 0x66),
+    'black': Colour(0x00, 0x00, 0x00),
+    'white': Colour(0xFF, 0xFF, 0xFF),
 }
 
 # ─── Word Type Colour Coding ──────────────────────────────────────────────────
@@ -34,70 +51,70 @@ WORD_TYPES = {
     'time': {
         'bg': 'FFF9C4',
         'border': 'F57F17',
-        'text': RGBColor(0xE6, 0x5C, 0x00),
+        'text': Colour(0xE6, 0x5C, 0x00),
         'symbol': '\u23F0',   # ⏰
         'label': 'When?',
     },
     'adjective': {
         'bg': 'E8F5E9',
         'border': '388E3C',
-        'text': RGBColor(0x2E, 0x7D, 0x32),
+        'text': Colour(0x2E, 0x7D, 0x32),
         'symbol': '\u2B50',   # ⭐
         'label': 'Describing word',
     },
     'verb': {
         'bg': 'E3F2FD',
         'border': '1565C0',
-        'text': RGBColor(0x15, 0x65, 0xC0),
+        'text': Colour(0x15, 0x65, 0xC0),
         'symbol': '\u26A1',   # ⚡
         'label': 'Doing word',
     },
     'noun': {
         'bg': 'FFF3E0',
         'border': 'E65100',
-        'text': RGBColor(0xBF, 0x36, 0x0C),
+        'text': Colour(0xBF, 0x36, 0x0C),
         'symbol': '\u25CF',   # ●
         'label': 'Naming word',
     },
     'name': {
         'bg': 'FCE4EC',
         'border': 'C62828',
-        'text': RGBColor(0xC6, 0x28, 0x28),
+        'text': Colour(0xC6, 0x28, 0x28),
         'symbol': '\u2605',   # ★
         'label': 'Name',
     },
     'open': {
         'bg': 'F3E5F5',
         'border': '7B1FA2',
-        'text': RGBColor(0x6A, 0x1B, 0x9A),
+        'text': Colour(0x6A, 0x1B, 0x9A),
         'symbol': '\u270D',   # ✍
         'label': 'Your idea',
     },
     'adverb': {
         'bg': 'E0F7FA',
         'border': '00838F',
-        'text': RGBColor(0x00, 0x69, 0x78),
+        'text': Colour(0x00, 0x69, 0x78),
         'symbol': '\u27A1',   # ➡
         'label': 'How word',
     },
     'connective': {
         'bg': 'FFF8E1',
         'border': 'FF8F00',
-        'text': RGBColor(0xE6, 0x6A, 0x00),
+        'text': Colour(0xE6, 0x6A, 0x00),
         'symbol': '\u26D3',   # ⛓
         'label': 'Joining word',
     },
     'preposition': {
         'bg': 'F1F8E9',
         'border': '558B2F',
-        'text': RGBColor(0x33, 0x69, 0x1E),
+        'text': Colour(0x33, 0x69, 0x1E),
         'symbol': '\u2194',   # ↔
         'label': 'Position word',
     },
     'punctuation': {
         'bg': 'ECEFF1',
         'border': '546E7A',
-        'text': RGBColor(0x45, 0x5A, 0x64),
+        'text': Colour(0x45, 0x5A, 0x64),
         'symbol': '\u2702',   # ✂
         'label': 'Punctuation',
     },
@@ -105,35 +122,35 @@ WORD_TYPES = {
     'operation': {
         'bg': 'E3F2FD',
         'border': '1565C0',
-        'text': RGBColor(0x15, 0x65, 0xC0),
+        'text': Colour(0x15, 0x65, 0xC0),
         'symbol': '\u2795',   # ➕
         'label': 'Operation',
     },
     'shape': {
         'bg': 'F3E5F5',
         'border': '7B1FA2',
-        'text': RGBColor(0x6A, 0x1B, 0x9A),
+        'text': Colour(0x6A, 0x1B, 0x9A),
         'symbol': '\u25B3',   # △
         'label': 'Shape',
     },
     'measure': {
         'bg': 'FFF9C4',
         'border': 'F57F17',
-        'text': RGBColor(0xE6, 0x5C, 0x00),
+        'text': Colour(0xE6, 0x5C, 0x00),
         'symbol': '\U0001F4CF',  # 📏
         'label': 'Measurement',
     },
     'number': {
         'bg': 'E8F5E9',
         'border': '388E3C',
-        'text': RGBColor(0x2E, 0x7D, 0x32),
+        'text': Colour(0x2E, 0x7D, 0x32),
         'symbol': '#',
         'label': 'Number',
     },
     'vocabulary': {
         'bg': 'FCE4EC',
         'border': 'C62828',
-        'text': RGBColor(0xC6, 0x28, 0x28),
+        'text': Colour(0xC6, 0x28, 0x28),
         'symbol': '\u2B50',   # ⭐
         'label': 'Key Word',
     },
@@ -141,28 +158,28 @@ WORD_TYPES = {
     'process': {
         'bg': 'E0F7FA',
         'border': '00838F',
-        'text': RGBColor(0x00, 0x69, 0x78),
+        'text': Colour(0x00, 0x69, 0x78),
         'symbol': '\u2699',   # ⚙
         'label': 'Process',
     },
     'equipment': {
         'bg': 'FFF3E0',
         'border': 'E65100',
-        'text': RGBColor(0xBF, 0x36, 0x0C),
+        'text': Colour(0xBF, 0x36, 0x0C),
         'symbol': '\U0001F52C',  # 🔬
         'label': 'Equipment',
     },
     'organism': {
         'bg': 'E8F5E9',
         'border': '2E7D32',
-        'text': RGBColor(0x1B, 0x5E, 0x20),
+        'text': Colour(0x1B, 0x5E, 0x20),
         'symbol': '\U0001F331',  # 🌱
         'label': 'Living Thing',
     },
     'material': {
         'bg': 'ECEFF1',
         'border': '546E7A',
-        'text': RGBColor(0x45, 0x5A, 0x64),
+        'text': Colour(0x45, 0x5A, 0x64),
         'symbol': '\U0001F9F1',  # 🧱
         'label': 'Material',
     },
@@ -170,28 +187,28 @@ WORD_TYPES = {
     'event': {
         'bg': 'FFF8E1',
         'border': 'FF8F00',
-        'text': RGBColor(0xE6, 0x6A, 0x00),
+        'text': Colour(0xE6, 0x6A, 0x00),
         'symbol': '\U0001F4C5',  # 📅
         'label': 'Event',
     },
     'person': {
         'bg': 'E3F2FD',
         'border': '1565C0',
-        'text': RGBColor(0x15, 0x65, 0xC0),
+        'text': Colour(0x15, 0x65, 0xC0),
         'symbol': '\U0001F464',  # 👤
         'label': 'Person',
     },
     'place': {
         'bg': 'F1F8E9',
         'border': '558B2F',
-        'text': RGBColor(0x33, 0x69, 0x1E),
+        'text': Colour(0x33, 0x69, 0x1E),
         'symbol': '\U0001F4CD',  # 📍
         'label': 'Place',
     },
     'date': {
         'bg': 'FFF9C4',
         'border': 'F57F17',
-        'text': RGBColor(0xE6, 0x5C, 0x00),
+        'text': Colour(0xE6, 0x5C, 0x00),
         'symbol': '\u23F3',   # ⏳
         'label': 'Date/Period',
     },
@@ -199,14 +216,14 @@ WORD_TYPES = {
     'feature': {
         'bg': 'E0F2F1',
         'border': '00695C',
-        'text': RGBColor(0x00, 0x4D, 0x40),
+        'text': Colour(0x00, 0x4D, 0x40),
         'symbol': '\u26F0',   # ⛰
         'label': 'Feature',
     },
     'climate': {
         'bg': 'E3F2FD',
         'border': '0277BD',
-        'text': RGBColor(0x01, 0x57, 0x9B),
+        'text': Colour(0x01, 0x57, 0x9B),
         'symbol': '\U0001F321',  # 🌡
         'label': 'Climate/Weather',
     },
@@ -214,28 +231,28 @@ WORD_TYPES = {
     'algorithm': {
         'bg': 'E8EAF6',
         'border': '283593',
-        'text': RGBColor(0x1A, 0x23, 0x7E),
+        'text': Colour(0x1A, 0x23, 0x7E),
         'symbol': '\u2699',   # ⚙
         'label': 'Algorithm',
     },
     'data': {
         'bg': 'E0F7FA',
         'border': '00838F',
-        'text': RGBColor(0x00, 0x69, 0x78),
+        'text': Colour(0x00, 0x69, 0x78),
         'symbol': '\U0001F4CA',  # 📊
         'label': 'Data',
     },
     'hardware': {
         'bg': 'ECEFF1',
         'border': '546E7A',
-        'text': RGBColor(0x45, 0x5A, 0x64),
+        'text': Colour(0x45, 0x5A, 0x64),
         'symbol': '\U0001F5A5',  # 🖥
         'label': 'Hardware',
     },
     'software': {
         'bg': 'F3E5F5',
         'border': '7B1FA2',
-        'text': RGBColor(0x6A, 0x1B, 0x9A),
+        'text': Colour(0x6A, 0x1B, 0x9A),
         'symbol': '\U0001F4BB',  # 💻
         'label': 'Software',
     },
@@ -243,7 +260,7 @@ WORD_TYPES = {
     'phrase': {
         'bg': 'FFF8E1',
         'border': 'FF8F00',
-        'text': RGBColor(0xE6, 0x6A, 0x00),
+        'text': Colour(0xE6, 0x6A, 0x00),
         'symbol': '\U0001F4AC',  # 💬
         'label': 'Phrase',
     },
@@ -251,28 +268,28 @@ WORD_TYPES = {
     'scripture': {
         'bg': 'FFF8E1',
         'border': 'F57F17',
-        'text': RGBColor(0xE6, 0x5C, 0x00),
+        'text': Colour(0xE6, 0x5C, 0x00),
         'symbol': '\U0001F4D6',  # 📖
         'label': 'Scripture',
     },
     'sacrament': {
         'bg': 'E8EAF6',
         'border': '283593',
-        'text': RGBColor(0x1A, 0x23, 0x7E),
+        'text': Colour(0x1A, 0x23, 0x7E),
         'symbol': '\u2721',   # ✡ (sacred symbol)
         'label': 'Sacrament',
     },
     'saint': {
         'bg': 'FCE4EC',
         'border': 'C62828',
-        'text': RGBColor(0xC6, 0x28, 0x28),
+        'text': Colour(0xC6, 0x28, 0x28),
         'symbol': '\u2605',   # ★
         'label': 'Saint / Holy Person',
     },
     'prayer': {
         'bg': 'E0F7FA',
         'border': '00838F',
-        'text': RGBColor(0x00, 0x69, 0x78),
+        'text': Colour(0x00, 0x69, 0x78),
         'symbol': '\U0001F54A',  # 🕊
         'label': 'Prayer / Worship',
     },
@@ -437,3 +454,26 @@ YEAR_AGES = {
     'Year 5': '9-10',
     'Year 6': '10-11',
 }
+
+# ─── Named Character Styles ────────────────────────────────────────────────────
+# Built once from DIFF_LEVELS and WORD_TYPES. Each entry becomes a character
+# style in a worksheet the first time it is used there (see set_run_style).
+#   Body-<level>           body text
+#   WT-<word type>-<level> colour-coded blank, symbol or answer
+#   Choice-<word type>-<level> inline choices after a blank (developing)
+#   Hint-<word type>-<level> inline hint after a blank
+
+
+def _build_named_styles():
+    named = {}
+    for level, diff in DIFF_LEVELS.items():
+        size = diff['font_size']
+        named[f'Body-{level}'] = {'size': size, 'colour': COLOURS['black']}
+        for wt_key, wt in WORD_TYPES.items():
+            named[f'WT-{wt_key}-{level}'] = {'size': size, 'bold': True, 'colour': wt['text']}
+            named[f'Choice-{wt_key}-{level}'] = {'size': size - 2, 'italic': True, 'colour': wt['text']}
+            named[f'Hint-{wt_key}-{level}'] = {'size': size - 4, 'italic': True, 'colour': wt['text']}
+    return named
+
+
+NAMED_STYLES = _build_named_styles()
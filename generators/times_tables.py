@@ -23,6 +23,7 @@ from generators.components import (
     set_cell_padding,
     set_table_full_width,
     remove_table_borders,
+    save_document,
 )
 from generators.styles import COLOURS, DIFF_LEVELS, THEMES
 from docx.shared import Pt, RGBColor
@@ -237,7 +238,4 @@ def generate_times_tables_worksheet(
     add_footer(doc, level, 'Times Tables Drill')
 
     # 9. Save to buffer
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
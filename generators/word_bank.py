@@ -20,6 +20,7 @@ from generators.components import (
     add_footer,
     set_run_font,
     set_no_spacing,
+    save_document,
 )
 from generators.styles import COLOURS, DIFF_LEVELS
 from docx.shared import Pt
@@ -127,7 +128,4 @@ def generate_word_bank_worksheet(
     add_footer(doc, level, 'Word Bank Activity')
 
     # 10. Save to BytesIO buffer and return
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return save_document(doc)
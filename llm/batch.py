@@ -0,0 +1,354 @@
+"""
+Whole-scheme-of-work worksheet generation via the Message Batches API.
+
+Builds one job per (year group, strand, topic, worksheet type, level) from
+SUBJECT_REGISTRY, submits them as a single Message Batch at batch pricing,
+polls until the batch ends, and writes each parsed worksheet into the
+response cache and, optionally, an output directory as JSON.
+
+Progress is recorded in a small JSON state file after every step, so an
+interrupted run picks up where it left off: an already-submitted batch is
+polled again rather than resubmitted, and results that were already
+written are skipped. Once a batch has been collected, running again
+submits a new batch of only the jobs that errored or expired. A response
+cut off at max_tokens is resubmitted with double the budget, up to the
+learned budget's MAX_MAX_TOKENS; a job that is still cut off there is
+given up on rather than resubmitted on every run.
+
+Usage:
+    python -m llm.batch --subject Maths --years "Year 3" --strand "Number - Fractions" \
+        --types fraction_practice --state fractions.state.json --out packs/
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import argparse
+from typing import Dict, Iterable, List, Optional
+
+from curriculum import SUBJECT_REGISTRY
+from generators.styles import DIFF_LEVELS, THEMES, YEAR_AGES
+from llm.budget import MAX_MAX_TOKENS
+from llm.cache import ResponseCache, get_default_cache
+from llm.client import (
+    DEFAULT_MODEL,
+    _get_client,
+    build_request,
+    max_tokens_for,
+    parse_message,
+    request_cache_key,
+)
+from llm.prompts import get_prompt
+
+logger = logging.getLogger(__name__)
+
+# Seconds between batch status checks
+DEFAULT_POLL_INTERVAL = 30.0
+
+
+def build_batch_jobs(
+    subject: str,
+    years: Optional[Iterable[str]] = None,
+    strands: Optional[Iterable[str]] = None,
+    worksheet_types: Optional[Iterable[str]] = None,
+    levels: Optional[Iterable[str]] = None,
+    theme_key: str = "classic",
+) -> List[dict]:
+    """
+    Expand a subject's curriculum into one job per worksheet to generate.
+
+    Args:
+        subject: A key of SUBJECT_REGISTRY, e.g. "Maths".
+        years: Year groups to include. Defaults to every year for the subject.
+        strands: Full strand names to include, e.g. "Number - Fractions".
+            Defaults to every strand.
+        worksheet_types: Worksheet type keys. Defaults to the subject's types.
+        levels: Differentiation levels. Defaults to all three.
+        theme_key: Visual theme key used in the prompt.
+
+    Returns:
+        A list of job dicts with keys subject, year_group, strand, topic,
+        worksheet_type, level and theme_key.
+
+    Raises:
+        ValueError: If the subject, a worksheet type or a strand is not
+            available.
+    """
+    if subject not in SUBJECT_REGISTRY:
+        raise ValueError(f"Unknown subject: '{subject}'. Valid subjects are: {list(SUBJECT_REGISTRY)}")
+    config = SUBJECT_REGISTRY[subject]
+
+    ws_types = list(worksheet_types or config["worksheet_types"])
+    unsupported = [t for t in ws_types if t not in config["worksheet_types"]]
+    if unsupported:
+        raise ValueError(f"Worksheet types {unsupported} are not available for {subject}.")
+
+    year_groups = list(years or config["years"])
+    wanted_strands = set(strands) if strands else None
+    if wanted_strands is not None:
+        valid_strands = sorted({
+            strand for year_group in year_groups for strand in config["curriculum"].get(year_group, {})
+        })
+        unknown = sorted(wanted_strands.difference(valid_strands))
+        if unknown:
+            raise ValueError(f"Unknown strands: {unknown}. Valid strands are: {valid_strands}")
+
+    jobs = []
+    for year_group in year_groups:
+        for strand, strand_data in config["curriculum"].get(year_group, {}).items():
+            if wanted_strands is not None and strand not in wanted_strands:
+                continue
+            for topic in strand_data["topics"]:
+                for ws_type in ws_types:
+                    for level in levels or DIFF_LEVELS:
+                        jobs.append({
+                            "subject": subject,
+                            "year_group": year_group,
+                            "strand": strand,
+                            "topic": topic,
+                            "worksheet_type": ws_type,
+                            "level": level,
+                            "theme_key": theme_key,
+                        })
+    return jobs
+
+
+def job_prompt(job: dict) -> str:
+    """Build the full prompt for a batch job, exactly as the app would."""
+    strand_data = SUBJECT_REGISTRY[job["subject"]]["curriculum"][job["year_group"]][job["strand"]]
+    objectives = strand_data["objectives"]
+    theme = THEMES[job["theme_key"]]
+    return get_prompt(
+        worksheet_type=job["worksheet_type"],
+        year_group=job["year_group"],
+        topic=f"{job['strand']} - {job['topic']}",
+        objective=objectives[0] if objectives else "",
+        age_range=YEAR_AGES[job["year_group"]],
+        theme_name=theme["name"],
+        theme_icon=theme["icon"],
+        level=job["level"],
+        subject=job["subject"],
+    )
+
+
+def job_filename(job: dict) -> str:
+    """Return a filesystem-safe JSON filename for a job's output."""
+    stem = "_".join(
+        job[k] for k in ("subject", "year_group", "strand", "topic", "worksheet_type", "level")
+    )
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", stem).strip("_") + ".json"
+
+
+class BatchRunner:
+    """
+    Submit, poll and collect a Message Batch of worksheet jobs, resumably.
+
+    Each request's ``custom_id`` is its response cache key (a 64-character
+    SHA-256 hex digest), so results land in the cache under exactly the key
+    that ``generate_worksheet_content`` will look up later.
+    """
+
+    def __init__(
+        self,
+        state_path: str,
+        output_dir: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        client=None,
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        self.state_path = state_path
+        self.output_dir = output_dir
+        self.cache = cache if cache is not None else get_default_cache()
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+        self.poll_interval = poll_interval
+        self.state = self._load_state()
+
+    def _load_state(self) -> dict:
+        state = {
+            "batch_id": None, "jobs": {}, "completed": [], "failed": {},
+            "max_tokens": {}, "given_up": [],
+        }
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                state.update(json.load(f))
+        return state
+
+    def _save_state(self) -> None:
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _client(self):
+        if self.client is None:
+            self.client = _get_client()
+        return self.client
+
+    def submit(self, jobs: List[dict]) -> Optional[str]:
+        """
+        Submit ``jobs`` as one Message Batch unless a batch is already recorded.
+
+        Jobs whose response is already cached, or that a previous batch
+        completed, are skipped. Returns the batch ID, or None if there was
+        nothing left to submit.
+        """
+        if self.state["batch_id"]:
+            logger.info("Resuming existing batch %s", self.state["batch_id"])
+            return self.state["batch_id"]
+
+        requests = []
+        for job in jobs:
+            request = build_request(
+                job_prompt(job),
+                model=self.model,
+                max_tokens=max_tokens_for(job["worksheet_type"]),
+                temperature=self.temperature,
+                subject=job["subject"],
+            )
+            custom_id = request_cache_key(request)
+            if custom_id in self.state["jobs"]:
+                continue
+            # The key keeps the default budget, as in generate_worksheet_content,
+            # so a job resubmitted with a larger one still lands under it
+            request["max_tokens"] = self.state["max_tokens"].get(custom_id, request["max_tokens"])
+            cached = self.cache.get(custom_id) if self.cache is not None else None
+            if cached is not None:
+                self._write_output(job, cached)
+                continue
+            self.state["jobs"][custom_id] = job
+            requests.append({"custom_id": custom_id, "params": request})
+
+        if not requests:
+            logger.info("All %d jobs are already cached; nothing to submit", len(jobs))
+            return None
+
+        batch = self._client().messages.batches.create(requests=requests)
+        self.state["batch_id"] = batch.id
+        self._save_state()
+        logger.info("Submitted batch %s with %d requests", batch.id, len(requests))
+        return batch.id
+
+    def wait(self) -> None:
+        """Poll the recorded batch until processing has ended."""
+        batch_id = self.state["batch_id"]
+        while True:
+            batch = self._client().messages.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            logger.info(
+                "Batch %s: %s (processing=%d, succeeded=%d, errored=%d)",
+                batch_id, batch.processing_status,
+                counts.processing, counts.succeeded, counts.errored,
+            )
+            if batch.processing_status == "ended":
+                return
+            time.sleep(self.poll_interval)
+
+    def collect(self) -> Dict[str, int]:
+        """
+        Parse every batch result into the cache and output directory.
+
+        Once every result is read, the batch is forgotten along with the
+        jobs that failed, so the next ``submit`` sends those again (with a
+        larger budget if they were cut off), except jobs given up on.
+
+        Returns:
+            Counts of ``written``, ``skipped`` (already collected) and ``failed``.
+        """
+        completed = set(self.state["completed"])
+        counts = {"written": 0, "skipped": 0, "failed": 0}
+
+        for entry in self._client().messages.batches.results(self.state["batch_id"]):
+            custom_id = entry.custom_id
+            if custom_id in completed:
+                counts["skipped"] += 1
+                continue
+            job = self.state["jobs"].get(custom_id)
+            if job is None:
+                continue
+
+            if entry.result.type != "succeeded":
+                self.state["failed"][custom_id] = entry.result.type
+                counts["failed"] += 1
+                continue
+            message = entry.result.message
+            try:
+                content = parse_message(message)
+            except (ValueError, json.JSONDecodeError) as e:
+                self.state["failed"][custom_id] = str(e)
+                if message.stop_reason == "max_tokens":
+                    self._raise_budget(custom_id, job)
+                counts["failed"] += 1
+                continue
+
+            if self.cache is not None:
+                self.cache.put(custom_id, content)
+            self._write_output(job, content)
+            self.state["failed"].pop(custom_id, None)
+            self.state["completed"].append(custom_id)
+            completed.add(custom_id)
+            counts["written"] += 1
+            self._save_state()
+
+        for custom_id in self.state["failed"]:
+            if custom_id not in self.state["given_up"]:
+                self.state["jobs"].pop(custom_id, None)
+        self.state["batch_id"] = None
+        self._save_state()
+        return counts
+
+    def _raise_budget(self, custom_id: str, job: dict) -> None:
+        """Double a truncated job's max_tokens for its next submission, or give up on it."""
+        sent = self.state["max_tokens"].get(custom_id, max_tokens_for(job["worksheet_type"]))
+        if sent >= MAX_MAX_TOKENS:
+            self.state["failed"][custom_id] = f"Response cut off at the largest budget ({sent} max_tokens)"
+            self.state["given_up"].append(custom_id)
+            logger.warning("Giving up on %s: cut off at %d max_tokens", job_filename(job), sent)
+            return
+        self.state["max_tokens"][custom_id] = min(MAX_MAX_TOKENS, sent * 2)
+
+    def _write_output(self, job: dict, content: dict) -> None:
+        if not self.output_dir:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, job_filename(job))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"job": job, "content": content}, f, indent=2, ensure_ascii=False)
+
+    def run(self, jobs: List[dict]) -> Dict[str, int]:
+        """Submit (or resume), wait for and collect a batch. Safe to re-run after interruption."""
+        if self.submit(jobs) is None:
+            return {"written": 0, "skipped": len(jobs), "failed": 0}
+        self.wait()
+        return self.collect()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a half-term pack with the Message Batches API.")
+    parser.add_argument("--subject", required=True, choices=list(SUBJECT_REGISTRY))
+    parser.add_argument("--years", nargs="*", help="Year groups, e.g. 'Year 3' 'Year 4'")
+    parser.add_argument("--strand", dest="strands", action="append", help="Strand name (repeatable)")
+    parser.add_argument("--types", nargs="*", help="Worksheet type keys")
+    parser.add_argument("--levels", nargs="*", choices=list(DIFF_LEVELS))
+    parser.add_argument("--theme", default="classic", choices=list(THEMES))
+    parser.add_argument("--state", required=True, help="Path of the resumable state file")
+    parser.add_argument("--out", help="Directory to write one JSON file per worksheet")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    jobs = build_batch_jobs(
+        args.subject, args.years, args.strands, args.types, args.levels, args.theme,
+    )
+    runner = BatchRunner(args.state, output_dir=args.out, poll_interval=args.poll_interval)
+    counts = runner.run(jobs)
+    print(f"{len(jobs)} jobs: {counts['written']} written, {counts['skipped']} skipped, {counts['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Learned response budgets for Claude worksheet requests.
+
+Every successful request records how many output tokens it used and how
+long it took, keyed by (worksheet type, level, subject). Once a key has
+enough samples, requests for it get a max_tokens just above the 95th
+percentile of what that kind of worksheet actually needs, and a timeout
+sized to the slowest observed generation speed. Until then the static
+``max_tokens_for`` budget and DEFAULT_TIMEOUT apply. The recorded wall
+times also tell the client when a request is slow enough to hedge.
+
+A budget that turns out too small is not fatal: the client continues a
+truncated response instead of starting over (see ``llm.client``).
+
+Samples are kept in a small JSON file next to the response cache so the
+budgets survive restarts.
+"""
+
+import os
+import json
+import math
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Location of the samples file (override with WORKSHEET_BUDGET_PATH)
+DEFAULT_BUDGET_PATH = os.path.join(".cache", "output_budgets.json")
+
+# Samples needed before a learned budget replaces the static one
+MIN_SAMPLES = 5
+
+# Most recent samples kept per key
+MAX_SAMPLES = 50
+
+# Learned max_tokens = percentile * headroom, rounded up and clamped
+BUDGET_PERCENTILE = 0.95
+BUDGET_HEADROOM = 1.2
+BUDGET_STEP = 256
+MIN_MAX_TOKENS = 1024
+MAX_MAX_TOKENS = 8192
+
+# Learned timeout = fixed allowance + max_tokens at the slowest observed speed * headroom
+TIMEOUT_BASE_SECONDS = 10.0
+TIMEOUT_HEADROOM = 1.5
+MIN_TIMEOUT = 30.0
+MAX_TIMEOUT = 180.0
+
+BudgetKey = Tuple[str, str, str]
+
+
+def _percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class OutputBudget:
+    """
+    Per-key record of output sizes and generation speeds.
+
+    Args:
+        path: JSON file to load from and save to, or None to keep samples
+            in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._samples: Dict[BudgetKey, deque] = {}
+        self._continuations: Dict[BudgetKey, int] = {}
+        if path:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable output budget file %s: %s", self.path, e)
+            return
+        for entry in data.get("keys", []):
+            key = tuple(entry["key"])
+            self._samples[key] = deque(
+                (tuple(sample) for sample in entry["samples"]), maxlen=MAX_SAMPLES
+            )
+            self._continuations[key] = entry.get("continuations", 0)
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        data = {
+            "keys": [
+                {
+                    "key": list(key),
+                    "samples": [list(sample) for sample in samples],
+                    "continuations": self._continuations.get(key, 0),
+                }
+                for key, samples in self._samples.items()
+            ]
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save output budgets to %s: %s", self.path, e)
+
+    def record(self, key: BudgetKey, output_tokens: int, seconds: float, continuations: int = 0) -> None:
+        """Add one completed request's total output tokens and wall time."""
+        if output_tokens <= 0:
+            return
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=MAX_SAMPLES)).append(
+                (int(output_tokens), round(float(seconds), 3))
+            )
+            if continuations:
+                self._continuations[key] = self._continuations.get(key, 0) + continuations
+            self._save()
+
+    def max_tokens(self, key: BudgetKey, default: int) -> int:
+        """Return the learned max_tokens for ``key``, or ``default`` without enough samples."""
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if len(samples) < MIN_SAMPLES:
+            return default
+        needed = _percentile([tokens for tokens, _ in samples], BUDGET_PERCENTILE) * BUDGET_HEADROOM
+        rounded = int(math.ceil(needed / BUDGET_STEP) * BUDGET_STEP)
+        return max(MIN_MAX_TOKENS, min(MAX_MAX_TOKENS, rounded))
+
+    def timeout(self, key: BudgetKey, max_tokens: int, default: float) -> float:
+        """Return a timeout that lets ``max_tokens`` finish at the slowest observed speed."""
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        speeds = [tokens / seconds for tokens, seconds in samples if seconds > 0]
+        if len(speeds) < MIN_SAMPLES:
+            return default
+        slowest = _percentile(speeds, 1 - BUDGET_PERCENTILE)
+        seconds = TIMEOUT_BASE_SECONDS + max_tokens / slowest * TIMEOUT_HEADROOM
+        return max(MIN_TIMEOUT, min(MAX_TIMEOUT, seconds))
+
+    def latency(self, key: BudgetKey, fraction: float) -> Optional[float]:
+        """Return the ``fraction`` percentile of recorded wall times, or None without enough samples."""
+        with self._lock:
+            seconds = [s for _, s in self._samples.get(key, ()) if s > 0]
+        if len(seconds) < MIN_SAMPLES:
+            return None
+        return _percentile(seconds, fraction)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Return per-key statistics, keyed by "worksheet_type/level/subject".
+
+        Each value has ``samples``, ``p50_tokens``, ``p95_tokens`` and
+        ``continuations`` (how many times that key's responses were cut
+        off and had to be continued).
+        """
+        with self._lock:
+            items = {key: list(samples) for key, samples in self._samples.items()}
+            continuations = dict(self._continuations)
+        return {
+            "/".join(key): {
+                "samples": len(samples),
+                "p50_tokens": _percentile([t for t, _ in samples], 0.5),
+                "p95_tokens": _percentile([t for t, _ in samples], BUDGET_PERCENTILE),
+                "continuations": continuations.get(key, 0),
+            }
+            for key, samples in items.items()
+            if samples
+        }
+
+
+_default_budget: Optional[OutputBudget] = None
+_default_budget_lock = threading.Lock()
+
+
+def get_default_budget() -> OutputBudget:
+    """
+    Return the process-wide output budget, loading saved samples on first use.
+
+    Samples are saved to WORKSHEET_BUDGET_PATH (default
+    ``.cache/output_budgets.json``); with WORKSHEET_CACHE_DISABLED=1 they
+    are kept in memory only.
+    """
+    global _default_budget
+    with _default_budget_lock:
+        if _default_budget is None:
+            path = None
+            if os.getenv("WORKSHEET_CACHE_DISABLED", "").lower() not in ("1", "true", "yes"):
+                path = os.getenv("WORKSHEET_BUDGET_PATH", DEFAULT_BUDGET_PATH)
+            _default_budget = OutputBudget(path)
+        return _default_budget
@@ -0,0 +1,177 @@
+"""
+Persistent, content-addressed cache for Claude worksheet responses.
+
+Responses are stored in a local SQLite database keyed by a SHA-256 hash of
+everything that determines the output: the fully formatted prompt, the
+system prompt, model, temperature and max_tokens. Identical requests (the
+same topic, level, theme and worksheet type regenerated term after term)
+are then served from disk in milliseconds instead of a fresh API call.
+
+Entries expire after a TTL and the table is kept below a maximum entry
+count by evicting the least recently used rows.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Location of the cache database (override with WORKSHEET_CACHE_PATH)
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite3")
+
+# Entries older than this are treated as misses (one school year)
+DEFAULT_TTL_SECONDS = 365 * 24 * 60 * 60
+
+# Maximum number of cached responses before LRU eviction kicks in
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def make_cache_key(
+    prompt: str,
+    system: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    Build a stable cache key for a single Claude request.
+
+    Args:
+        prompt: The fully formatted user prompt.
+        system: The system prompt sent alongside it.
+        model: The Claude model identifier.
+        temperature: Sampling temperature.
+        max_tokens: Response token limit.
+
+    Returns:
+        A hex SHA-256 digest identifying the request.
+    """
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "system": system,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU cache of parsed worksheet JSON.
+
+    A single connection is shared across threads and guarded by a lock,
+    so one instance can serve every Streamlit session in the process.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "  key TEXT PRIMARY KEY,"
+            "  content TEXT NOT NULL,"
+            "  created_at REAL NOT NULL,"
+            "  accessed_at REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached content for ``key``, or None on a miss or expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(content)
+
+    def put(self, key: str, content: dict) -> None:
+        """Store ``content`` under ``key`` and evict the oldest entries if over capacity."""
+        now = time.time()
+        serialised = json.dumps(content, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, serialised, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "  SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """
+    Return the process-wide response cache, creating it on first use.
+
+    Set WORKSHEET_CACHE_DISABLED=1 to turn caching off entirely, or
+    WORKSHEET_CACHE_PATH to move the database.
+
+    Returns:
+        The shared ResponseCache, or None if caching is disabled or the
+        database cannot be opened.
+    """
+    global _default_cache
+    if os.getenv("WORKSHEET_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = os.getenv("WORKSHEET_CACHE_PATH", DEFAULT_CACHE_PATH)
+            try:
+                _default_cache = ResponseCache(path)
+            except sqlite3.Error as e:
+                logger.warning("Response cache unavailable at %s: %s", path, e)
+                return None
+        return _default_cache
@@ -8,11 +8,33 @@ structured JSON responses for UK Primary School worksheet generation.
 import os
 import json
 import re
+import queue
+import contextvars
 import logging
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
 from dotenv import load_dotenv
-from anthropic import Anthropic, APIError, APITimeoutError, RateLimitError
+import httpx
+from anthropic import (
+    Anthropic,
+    APIError,
+    APITimeoutError,
+    DefaultHttpxClient,
+    RateLimitError,
+)
+
+from llm.budget import get_default_budget
+from llm.cache import get_default_cache, make_cache_key
+from llm.scheduler import SchedulerBusyError, estimate_tokens, get_default_scheduler
+from llm.streaming import RESET_PATH, IncrementalJSONParser, iter_elements
+from telemetry import annotate, count, current_labels, span
+
+# Callback receiving each streamed top-level element as (path, value)
+ElementCallback = Callable[[tuple, Any], None]
 
 # Load environment variables from .env file
 load_dotenv()
@@ -25,13 +47,52 @@ DEFAULT_MODEL = "claude-haiku-4-5-20251001"
 # Maximum tokens for worksheet content generation
 DEFAULT_MAX_TOKENS = 4096
 
+# Worksheet types whose longer JSON schemas need a bigger response budget
+LONG_FORM_WORKSHEET_TYPES = ("reading_comprehension", "problem_solving", "investigation")
+LONG_FORM_MAX_TOKENS = 6144
+
 # Request timeout in seconds
 DEFAULT_TIMEOUT = 60.0
 
+# Follow-up requests allowed to finish a response cut off at max_tokens
+MAX_CONTINUATIONS = 2
+
+# Hedged requests (opt in with CLAUDE_HEDGE_REQUESTS=1): when a request for one
+# of these worksheet types is still running after the HEDGE_PERCENTILE of its
+# recorded latencies, a duplicate is sent and the first to finish wins. Each
+# duplicate is billed for its prompt and whatever it streamed before being
+# cancelled, so it trades extra tokens for a shorter worst-case wait.
+HEDGED_WORKSHEET_TYPES = ("reading_comprehension", "problem_solving")
+HEDGE_PERCENTILE = 0.9
+
+# At most this share of hedge-eligible requests may be duplicated
+HEDGE_MAX_RATE = 0.1
+
+# Upper bound on simultaneous Claude requests from one concurrent run
+DEFAULT_MAX_CONCURRENCY = 3
+
+
+# Keep-alive settings for the HTTP connection pool behind each shared client.
+# A long expiry keeps TLS sessions warm between a teacher's successive clicks.
+POOL_LIMITS = httpx.Limits(
+    max_connections=50,
+    max_keepalive_connections=20,
+    keepalive_expiry=120.0,
+)
 
-def _get_client() -> Anthropic:
+# Process-wide client registry, keyed by (api_key, timeout)
+_clients: Dict[Tuple[str, float], Anthropic] = {}
+# Copies of the shared clients with different retry settings; they share the
+# original's connection pool, so they are kept out of the pool statistics.
+_client_variants: Dict[Tuple[str, float, int], Anthropic] = {}
+_client_lock = threading.Lock()
+_pool_counters = {"clients_created": 0, "clients_reused": 0, "requests_sent": 0}
+_hedge_counters = {"eligible": 0, "issued": 0, "won": 0, "skipped_rate_cap": 0}
+
+
+def _require_api_key() -> str:
     """
-    Create and return an Anthropic client instance.
+    Return the configured Anthropic API key.
 
     Raises:
         ValueError: If ANTHROPIC_API_KEY is not set in environment or .env file.
@@ -43,7 +104,173 @@ def _get_client() -> Anthropic:
             "environment variables. Example .env entry:\n"
             "ANTHROPIC_API_KEY=sk-ant-api03-..."
         )
-    return Anthropic(api_key=api_key, timeout=DEFAULT_TIMEOUT)
+    return api_key
+
+
+def _count_request(request) -> None:
+    """httpx event hook: count every HTTP request sent through a pooled client."""
+    with _client_lock:
+        _pool_counters["requests_sent"] += 1
+
+
+def _get_client(timeout: Optional[float] = None, max_retries: Optional[int] = None) -> Anthropic:
+    """
+    Return the shared Anthropic client for the configured key and ``timeout``.
+
+    Clients are created once per (api_key, timeout) and reused for the life
+    of the process, so every request shares one keep-alive connection pool
+    and its warm TLS sessions. The SDK client is thread-safe, so a single
+    instance serves all Streamlit sessions and worker threads.
+
+    Args:
+        timeout: Request timeout in seconds. Defaults to DEFAULT_TIMEOUT.
+        max_retries: Override the SDK's automatic retries. Calls made
+            through the request scheduler pass 0, since the scheduler does
+            its own rate-limit-aware retrying. The returned copy shares the
+            same connection pool.
+
+    Raises:
+        ValueError: If ANTHROPIC_API_KEY is not set in environment or .env file.
+    """
+    api_key = _require_api_key()
+    key = (api_key, DEFAULT_TIMEOUT if timeout is None else float(timeout))
+    with _client_lock:
+        client = _clients.get(key)
+        if client is not None:
+            _pool_counters["clients_reused"] += 1
+        else:
+            client = Anthropic(
+                api_key=api_key,
+                timeout=key[1],
+                http_client=DefaultHttpxClient(
+                    limits=POOL_LIMITS,
+                    event_hooks={"request": [_count_request]},
+                ),
+            )
+            _clients[key] = client
+            _pool_counters["clients_created"] += 1
+        if max_retries is None:
+            return client
+        variant = _client_variants.get((*key, max_retries))
+        if variant is None:
+            variant = client.with_options(max_retries=max_retries)
+            _client_variants[(*key, max_retries)] = variant
+        return variant
+
+
+def _connection_counts(client) -> Optional[Tuple[int, int]]:
+    """
+    Return (open, idle) connection counts for a client's HTTP pool.
+
+    httpx has no public API for its pool, so this reads private attributes:
+    the SDK's ``_client`` (an httpx.Client), its ``_transport`` and the
+    httpcore ``_pool`` behind it, as laid out in anthropic 0.40+ with
+    httpx 0.27-0.28 and httpcore 1.x. Recheck it when upgrading them;
+    if the layout changes this returns None rather than a misleading 0.
+    """
+    pool = getattr(getattr(getattr(client, "_client", None), "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return None
+    connections = list(connections)
+    idle = sum(1 for conn in connections if getattr(conn, "is_idle", lambda: False)())
+    return len(connections), idle
+
+
+def get_client_pool_stats() -> dict:
+    """
+    Return connection-reuse statistics for the shared client registry.
+
+    ``requests_sent`` climbing while ``clients_created`` and
+    ``open_connections`` stay flat confirms that requests are reusing
+    pooled keep-alive connections rather than opening new ones.
+
+    Returns:
+        Dictionary with keys ``clients_created``, ``clients_reused``,
+        ``requests_sent``, ``clients``, ``open_connections`` and
+        ``idle_connections``. The connection counts are None if the HTTP
+        pool cannot be inspected (see ``_connection_counts``).
+    """
+    with _client_lock:
+        stats = dict(_pool_counters)
+        clients = list(_clients.values())
+
+    open_total = idle_total = 0
+    for client in clients:
+        counts = _connection_counts(client)
+        if counts is None:
+            logger.warning("HTTP connection pool not visible; the httpx internals it reads may have changed")
+            open_total = idle_total = None
+            break
+        open_total += counts[0]
+        idle_total += counts[1]
+
+    stats.update(
+        clients=len(clients),
+        open_connections=open_total,
+        idle_connections=idle_total,
+    )
+    return stats
+
+
+def _system_prompt(subject: str) -> str:
+    """Return the system prompt used for every worksheet request in ``subject``."""
+    return (
+        f"You are an expert UK primary school teacher and curriculum designer "
+        f"specialising in {subject}. "
+        "You create engaging, age-appropriate educational content aligned to the "
+        "UK National Curriculum. You ALWAYS respond with valid JSON only - no "
+        "additional text, explanations, or markdown formatting outside the JSON. "
+        "Your JSON output must be precise and match the exact schema requested."
+    )
+
+
+def max_tokens_for(worksheet_type: str) -> int:
+    """Return the response token budget for a worksheet type."""
+    if worksheet_type in LONG_FORM_WORKSHEET_TYPES:
+        return LONG_FORM_MAX_TOKENS
+    return DEFAULT_MAX_TOKENS
+
+
+def build_request(
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    temperature: float = 0.7,
+    subject: str = "English",
+) -> dict:
+    """
+    Build the Messages API parameters for a worksheet prompt.
+
+    Shared by the single-call, streaming and batch paths so that identical
+    inputs always produce identical requests (and identical cache keys).
+
+    Returns:
+        A dict of keyword arguments for ``messages.create``.
+    """
+    return dict(
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        messages=[
+            {
+                "role": "user",
+                "content": prompt,
+            }
+        ],
+        system=_system_prompt(subject),
+    )
+
+
+def request_cache_key(request: dict) -> str:
+    """Return the response cache key for a request built by ``build_request``."""
+    return make_cache_key(
+        request["messages"][0]["content"],
+        request["system"],
+        request["model"],
+        request["temperature"],
+        request["max_tokens"],
+    )
 
 
 def _extract_json_from_text(text: str) -> dict:
@@ -72,13 +299,13 @@ def _extract_json_from_text(text: str) -> dict:
         # Try each match (use the first valid one)
         for match in matches:
             try:
-                return json.loads(match.strip())
+                return _extracted(json.loads(match.strip()), "code_block")
             except json.JSONDecodeError:
                 continue
 
     # Strategy 2: Try to parse the entire text as JSON directly
     try:
-        return json.loads(text)
+        return _extracted(json.loads(text), "raw")
     except json.JSONDecodeError:
         pass
 
@@ -89,7 +316,7 @@ def _extract_json_from_text(text: str) -> dict:
     if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
         json_candidate = text[first_brace : last_brace + 1]
         try:
-            return json.loads(json_candidate)
+            return _extracted(json.loads(json_candidate), "object_braces")
         except json.JSONDecodeError:
             pass
 
@@ -99,11 +326,12 @@ def _extract_json_from_text(text: str) -> dict:
     if first_bracket != -1 and last_bracket != -1 and last_bracket > first_bracket:
         json_candidate = text[first_bracket : last_bracket + 1]
         try:
-            return json.loads(json_candidate)
+            return _extracted(json.loads(json_candidate), "array_brackets")
         except json.JSONDecodeError:
             pass
 
     # All strategies failed
+    count("json_extractions", strategy="failed")
     raise json.JSONDecodeError(
         "Could not extract valid JSON from Claude's response. "
         f"Response started with: {text[:200]}...",
@@ -112,6 +340,287 @@ def _extract_json_from_text(text: str) -> dict:
     )
 
 
+def _extracted(value, strategy: str):
+    """Record which extraction strategy produced ``value`` and return it."""
+    annotate(json_strategy=strategy)
+    count("json_extractions", strategy=strategy, **current_labels())
+    return value
+
+
+def _response_text(message) -> str:
+    """Return the concatenated text blocks of a Messages API response."""
+    return "".join(block.text for block in message.content or [] if block.type == "text")
+
+
+def _parse_response_text(response_text: str) -> dict:
+    """
+    Parse worksheet JSON from response text, logging the text on failure.
+
+    Raises:
+        json.JSONDecodeError: If the text cannot be parsed as JSON.
+    """
+    try:
+        with span("claude.parse_json") as record:
+            record["attrs"]["chars"] = len(response_text)
+            return _extract_json_from_text(response_text)
+    except json.JSONDecodeError as e:
+        logger.error(
+            "Failed to parse JSON from Claude's response. First 500 chars: %s",
+            response_text[:500],
+        )
+        raise json.JSONDecodeError(
+            f"Failed to parse worksheet JSON from Claude's response: {e.msg}",
+            e.doc,
+            e.pos,
+        )
+
+
+def parse_message(message) -> dict:
+    """
+    Extract and parse the worksheet JSON from a Messages API response.
+
+    Args:
+        message: An ``anthropic.types.Message`` from ``create``, a stream,
+            or a batch result.
+
+    Returns:
+        The parsed worksheet content.
+
+    Raises:
+        ValueError: If the response has no text content.
+        json.JSONDecodeError: If the response cannot be parsed as JSON.
+    """
+    # Extract text content from the response
+    if not message.content:
+        raise ValueError("Claude returned an empty response with no content blocks.")
+
+    response_text = _response_text(message)
+    if not response_text.strip():
+        raise ValueError("Claude returned a response with no text content.")
+
+    logger.debug(
+        "Received response from Claude (%d chars, stop_reason=%s)",
+        len(response_text),
+        message.stop_reason,
+    )
+    return _parse_response_text(response_text)
+
+
+def continuation_request(request: dict, partial_text: str) -> dict:
+    """
+    Build a request that resumes a response cut off at max_tokens.
+
+    The text so far is sent back as the start of Claude's turn, so the
+    reply carries on from the exact character where the last one stopped
+    and the two can simply be concatenated.
+    """
+    return {
+        **request,
+        "messages": [
+            *request["messages"],
+            {"role": "assistant", "content": partial_text},
+        ],
+    }
+
+
+def _stream_message(client: Anthropic, request: dict, parser: IncrementalJSONParser,
+                    on_element: ElementCallback, cancel: Optional[threading.Event] = None,
+                    **options):
+    """
+    Run ``request`` through the SDK message stream, reporting elements as they close.
+
+    ``parser`` is passed in so a continuation keeps feeding the same parser
+    and elements split across the two responses are still reported.
+
+    Args:
+        cancel: Optional event; once set, the stream is closed at the next
+            chunk and None is returned. Used to drop the losing hedge.
+
+    Returns:
+        The final ``Message``, identical in shape to ``messages.create``,
+        or None if cancelled.
+    """
+    with client.messages.stream(**request, **options) as stream:
+        for text in stream.text_stream:
+            if cancel is not None and cancel.is_set():
+                return None
+            for path, value in parser.feed(text):
+                on_element(path, value)
+        return stream.get_final_message()
+
+
+def _used_tokens(message) -> int:
+    """Return the input plus output tokens a Messages response reports."""
+    return message.usage.input_tokens + message.usage.output_tokens
+
+
+def _record_usage(record: dict, message) -> None:
+    """Add a response's token usage to its span and the token counters."""
+    usage = message.usage
+    tokens = {
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+    }
+    record["attrs"].update(tokens, stop_reason=message.stop_reason)
+    labels = current_labels()
+    for name, value in tokens.items():
+        count(f"claude_{name}", value, **labels)
+
+
+def _send(client: Anthropic, request: dict, parser, on_element, options: dict,
+          cancel: Optional[threading.Event] = None):
+    """Send one request through the shared scheduler, logging any API error."""
+    if on_element is None and cancel is None:
+        send = partial(client.messages.create, **request, **options)
+    else:
+        send = partial(
+            _stream_message, client, request,
+            parser or IncrementalJSONParser(), on_element or (lambda path, value: None),
+            cancel, **options,
+        )
+    try:
+        with span("claude.message", model=request["model"]) as record:
+            message = get_default_scheduler().call(
+                send,
+                tokens=estimate_tokens(request),
+                used_tokens=_used_tokens,
+            )
+            if message is not None:
+                _record_usage(record, message)
+            return message
+    except SchedulerBusyError as e:
+        logger.error("Claude request not sent: %s", e)
+        raise
+    except APITimeoutError as e:
+        logger.error("Claude API request timed out: %s", e)
+        raise
+    except RateLimitError as e:
+        logger.error("Claude API rate limit exceeded: %s", e)
+        raise
+    except APIError as e:
+        logger.error("Claude API error (status=%s): %s", getattr(e, "status_code", "unknown"), e)
+        raise
+
+
+# ─── Hedged Requests ──────────────────────────────────────────────────────────
+
+def _hedging_enabled(worksheet_type: Optional[str], hedge: Optional[bool]) -> bool:
+    if hedge is not None:
+        return hedge
+    if os.getenv("CLAUDE_HEDGE_REQUESTS", "").lower() not in ("1", "true", "yes", "on"):
+        return False
+    return worksheet_type in HEDGED_WORKSHEET_TYPES
+
+
+def _take_hedge() -> bool:
+    """Claim a hedge if the process is still under HEDGE_MAX_RATE."""
+    with _client_lock:
+        if _hedge_counters["issued"] + 1 > _hedge_counters["eligible"] * HEDGE_MAX_RATE:
+            _hedge_counters["skipped_rate_cap"] += 1
+            return False
+        _hedge_counters["issued"] += 1
+    count("claude_hedges", outcome="issued")
+    return True
+
+
+def _send_hedged(client: Anthropic, request: dict, parser, on_element, options: dict, delay: float):
+    """
+    Send ``request``, and a duplicate if it is still running after ``delay`` seconds.
+
+    The first attempt to finish wins and the other is cancelled. The
+    primary's elements go straight to ``on_element``; the duplicate's are
+    held back. If the duplicate wins, the primary stops reporting and
+    ``on_element`` receives ``RESET_PATH`` before the duplicate's elements
+    are replayed, so a preview never mixes the two responses.
+
+    Returns:
+        ``(message, parser)``: the winning response and the parser that read
+        it, for any continuation.
+    """
+    results = queue.Queue()
+    cancels = (threading.Event(), threading.Event())
+    buffered = []
+    parsers = (parser or IncrementalJSONParser(), IncrementalJSONParser())
+    # Cleared when the duplicate wins; held while the primary reports an element
+    primary_live = threading.Event()
+    primary_live.set()
+    primary_lock = threading.Lock()
+    primary_reported = []
+
+    def report_primary(path, value):
+        with primary_lock:
+            if primary_live.is_set():
+                primary_reported.append(path)
+                on_element(path, value)
+
+    callbacks = (
+        report_primary if on_element is not None else None,
+        lambda path, value: buffered.append((path, value)),
+    )
+
+    def attempt(index):
+        try:
+            message = _send(client, request, parsers[index], callbacks[index], options, cancels[index])
+            results.put((index, message, None))
+        except Exception as e:  # noqa: BLE001 - handed to the waiting caller
+            results.put((index, None, e))
+
+    with _client_lock:
+        _hedge_counters["eligible"] += 1
+    # Each attempt runs in a copy of the caller's context so its spans nest under the request
+    threading.Thread(
+        target=contextvars.copy_context().run, args=(attempt, 0), daemon=True, name="worksheet-llm-primary",
+    ).start()
+    running = 1
+    try:
+        first = results.get(timeout=delay)
+    except queue.Empty:
+        first = None
+        if _take_hedge():
+            logger.info("No response after %.1fs; sending a hedged duplicate request", delay)
+            threading.Thread(
+                target=contextvars.copy_context().run, args=(attempt, 1), daemon=True, name="worksheet-llm-hedge",
+            ).start()
+            running = 2
+
+    outcome = first or results.get()
+    # If the first finisher failed, wait for the other attempt
+    if outcome[2] is not None and running == 2:
+        outcome = results.get()
+    index, message, error = outcome
+    for event in cancels:
+        event.set()
+    if error is not None:
+        raise error
+    if index == 1:
+        with _client_lock:
+            _hedge_counters["won"] += 1
+        count("claude_hedges", outcome="won")
+        if on_element is not None:
+            with primary_lock:
+                primary_live.clear()
+                if primary_reported:
+                    on_element(RESET_PATH, None)
+            for path, value in buffered:
+                on_element(path, value)
+    return message, parsers[index]
+
+
+def get_hedge_stats() -> dict:
+    """
+    Return hedged-request counters for the process.
+
+    Returns:
+        Dictionary with ``eligible`` (requests that could have been hedged),
+        ``issued`` (duplicates sent), ``won`` (duplicates that finished
+        first) and ``skipped_rate_cap`` (hedges withheld by HEDGE_MAX_RATE).
+    """
+    with _client_lock:
+        return dict(_hedge_counters)
+
+
 def generate_worksheet_content(
     prompt: str,
     model: str = DEFAULT_MODEL,
@@ -119,6 +628,11 @@ def generate_worksheet_content(
     temperature: float = 0.7,
     timeout: Optional[float] = None,
     subject: str = "English",
+    use_cache: bool = True,
+    on_element: Optional[ElementCallback] = None,
+    worksheet_type: Optional[str] = None,
+    level: Optional[str] = None,
+    hedge: Optional[bool] = None,
 ) -> dict:
     """
     Send a prompt to Claude and return parsed JSON worksheet content.
@@ -126,6 +640,11 @@ def generate_worksheet_content(
     This function sends the given prompt to the Claude API, requesting
     structured JSON output suitable for worksheet generation. It handles
     response parsing, including extracting JSON from markdown code blocks.
+    Parsed responses are stored in the persistent response cache, and an
+    identical request is answered from the cache without calling the API.
+    API calls go through the shared request scheduler, which paces them to
+    the account's rate limits and retries 429s and overload errors. A
+    response cut off at max_tokens is continued rather than discarded.
 
     Args:
         prompt: The full prompt string to send to Claude. Should include
@@ -133,6 +652,8 @@ def generate_worksheet_content(
         model: The Claude model to use. Defaults to claude-haiku-4-5-20251001
             for fast, cost-effective generation.
         max_tokens: Maximum number of tokens in the response. Defaults to 4096.
+            With ``worksheet_type`` this is only the starting budget; once
+            enough responses have been seen, a learned budget is used.
         temperature: Controls randomness in generation. 0.0 = deterministic,
             1.0 = maximum randomness. Defaults to 0.7 for creative but
             consistent worksheet content.
@@ -140,6 +661,22 @@ def generate_worksheet_content(
             client default (60s).
         subject: The curriculum subject (e.g. "English", "Maths", "Science").
             Used to tailor the system prompt for better subject-specific output.
+        use_cache: If True, return a cached response for an identical request
+            when one exists. If False, always call Claude (e.g. Regenerate);
+            the fresh response still replaces the cached one.
+        on_element: Optional callback for streaming mode. When given, the
+            response is streamed and the callback receives ``(path, value)``
+            for each top-level element as soon as it is complete (e.g.
+            ``("title",)`` or ``("sections", 0)``). Cache hits replay their
+            elements through the same callback.
+        worksheet_type: Worksheet type key. When given, output sizes are
+            recorded and used to learn max_tokens and the timeout for this
+            worksheet type, ``level`` and ``subject``.
+        level: Differentiation level, part of the learned budget's key.
+        hedge: Send a duplicate request if this one is slower than usual
+            (the HEDGE_PERCENTILE of recorded latencies for its key) and
+            keep whichever finishes first. Defaults to off; with
+            CLAUDE_HEDGE_REQUESTS=1 it is on for HEDGED_WORKSHEET_TYPES.
 
     Returns:
         A dictionary containing the parsed worksheet content matching the
@@ -149,85 +686,145 @@ def generate_worksheet_content(
         ValueError: If the API key is not configured.
         anthropic.APIError: If the API returns an error (auth, server, etc.).
         anthropic.APITimeoutError: If the request times out.
-        anthropic.RateLimitError: If the API rate limit is exceeded.
+        anthropic.RateLimitError: If the API rate limit is still exceeded
+            after the scheduler's retries.
+        SchedulerBusyError: If the request could not get a slot in time.
         json.JSONDecodeError: If the response cannot be parsed as JSON.
     """
-    client = _get_client()
+    request = build_request(prompt, model, max_tokens, temperature, subject)
+    cache = get_default_cache()
+    cache_key = request_cache_key(request)
+    if cache is not None and use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info("Serving worksheet content from cache (subject=%s)", subject)
+            count("claude_cache_hits", worksheet_type=worksheet_type, level=level)
+            if on_element is not None:
+                for path, value in iter_elements(cached):
+                    on_element(path, value)
+            return cached
+
+    # Learned budgets apply to the request sent, not the cache key, so a
+    # changing budget never invalidates cached responses
+    budget_key = (worksheet_type, level or "", subject) if worksheet_type else None
+    budget = get_default_budget() if budget_key else None
+    options = {}
+    if budget is not None:
+        request["max_tokens"] = budget.max_tokens(budget_key, max_tokens)
+        if timeout is None:
+            options["timeout"] = budget.timeout(budget_key, request["max_tokens"], DEFAULT_TIMEOUT)
+
+    client = _get_client(timeout, max_retries=0)
+    parser = IncrementalJSONParser() if on_element is not None else None
 
-    # Override timeout if specified
-    if timeout is not None:
-        client = Anthropic(
-            api_key=os.getenv("ANTHROPIC_API_KEY"),
-            timeout=timeout,
-        )
-
-    logger.info("Sending worksheet generation request to Claude (model=%s, subject=%s)", model, subject)
+    logger.info(
+        "Sending worksheet generation request to Claude (model=%s, subject=%s, max_tokens=%d)",
+        model, subject, request["max_tokens"],
+    )
 
-    try:
-        message = client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                }
-            ],
-            system=(
-                f"You are an expert UK primary school teacher and curriculum designer "
-                f"specialising in {subject}. "
-                "You create engaging, age-appropriate educational content aligned to the "
-                "UK National Curriculum. You ALWAYS respond with valid JSON only - no "
-                "additional text, explanations, or markdown formatting outside the JSON. "
-                "Your JSON output must be precise and match the exact schema requested."
-            ),
+    hedge_after = None
+    if budget is not None and _hedging_enabled(worksheet_type, hedge):
+        hedge_after = budget.latency(budget_key, HEDGE_PERCENTILE)
+
+    started = time.perf_counter()
+    response_text, input_tokens, output_tokens, continuations = "", 0, 0, 0
+    current = request
+    with span("claude.request", worksheet_type=worksheet_type, level=level) as record:
+        while True:
+            if hedge_after is not None and current is request:
+                message, parser = _send_hedged(client, current, parser, on_element, options, hedge_after)
+            else:
+                message = _send(client, current, parser, on_element, options)
+            response_text += _response_text(message)
+            input_tokens += message.usage.input_tokens
+            output_tokens += message.usage.output_tokens
+            if message.stop_reason != "max_tokens" or continuations >= MAX_CONTINUATIONS:
+                break
+            continuations += 1
+            # The API rejects an assistant turn ending in whitespace
+            response_text = response_text.rstrip()
+            logger.warning(
+                "Response cut off at max_tokens=%d; continuing it (%d of %d)",
+                current["max_tokens"], continuations, MAX_CONTINUATIONS,
+            )
+            current = continuation_request(request, response_text)
+        record["attrs"].update(
+            subject=subject, max_tokens=request["max_tokens"], input_tokens=input_tokens,
+            output_tokens=output_tokens, continuations=continuations, chars=len(response_text),
         )
-    except APITimeoutError as e:
-        logger.error("Claude API request timed out: %s", e)
-        raise
-    except RateLimitError as e:
-        logger.error("Claude API rate limit exceeded: %s", e)
-        raise
-    except APIError as e:
-        logger.error("Claude API error (status=%s): %s", getattr(e, "status_code", "unknown"), e)
-        raise
-
-    # Extract text content from the response
-    if not message.content:
-        raise ValueError("Claude returned an empty response with no content blocks.")
-
-    response_text = ""
-    for block in message.content:
-        if block.type == "text":
-            response_text += block.text
 
-    if not response_text.strip():
-        raise ValueError("Claude returned a response with no text content.")
-
-    logger.debug(
-        "Received response from Claude (%d chars, stop_reason=%s)",
-        len(response_text),
-        message.stop_reason,
-    )
+        if not response_text.strip():
+            raise ValueError("Claude returned a response with no text content.")
+        result = _parse_response_text(response_text)
 
-    # Parse the JSON from the response
-    try:
-        result = _extract_json_from_text(response_text)
-    except json.JSONDecodeError as e:
-        logger.error(
-            "Failed to parse JSON from Claude's response. First 500 chars: %s",
-            response_text[:500],
-        )
-        raise json.JSONDecodeError(
-            f"Failed to parse worksheet JSON from Claude's response: {e.msg}",
-            e.doc,
-            e.pos,
-        )
+    if budget is not None:
+        budget.record(budget_key, output_tokens, time.perf_counter() - started, continuations)
 
     logger.info(
         "Successfully generated worksheet content (keys: %s)",
         list(result.keys()),
     )
 
+    if cache is not None:
+        cache.put(cache_key, result)
+
     return result
+
+
+def generate_worksheet_contents_concurrently(
+    prompts: Dict[str, str],
+    max_workers: Optional[int] = None,
+    on_element: Optional[Callable[[str, tuple, Any], None]] = None,
+    **kwargs,
+) -> Iterator[Tuple[str, Optional[dict], Optional[Exception]]]:
+    """
+    Send several prompts to Claude in parallel and yield each result as it lands.
+
+    Each prompt is dispatched to ``generate_worksheet_content`` on a bounded
+    thread pool, so a multi-level run takes roughly as long as its slowest
+    level rather than the sum of all of them. Results are yielded in
+    completion order (not submission order) so callers can update progress
+    as each one finishes. A failure in one prompt never discards the others:
+    the exception is yielded alongside its key instead of being raised.
+
+    Args:
+        prompts: Mapping of a caller-chosen key (e.g. the differentiation
+            level) to the full prompt string for that key.
+        max_workers: Maximum number of requests in flight at once. Defaults
+            to ``min(len(prompts), DEFAULT_MAX_CONCURRENCY)``.
+        on_element: Optional streaming callback receiving
+            ``(key, path, value)`` for each completed top-level element.
+            It is called from worker threads.
+        **kwargs: Passed through to ``generate_worksheet_content``
+            (model, max_tokens, temperature, timeout, subject,
+            worksheet_type). With ``worksheet_type``, each prompt's key is
+            passed as its ``level`` for the learned response budget.
+
+    Yields:
+        ``(key, content, error)`` tuples. Exactly one of ``content`` and
+        ``error`` is not None.
+    """
+    if not prompts:
+        return
+
+    workers = max_workers or min(len(prompts), DEFAULT_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="worksheet-llm") as pool:
+        # Each request runs in a copy of the caller's context so its spans join the caller's trace
+        futures = {
+            pool.submit(
+                contextvars.copy_context().run,
+                generate_worksheet_content,
+                prompt,
+                on_element=partial(on_element, key) if on_element else None,
+                **({"level": key} if kwargs.get("worksheet_type") else {}),
+                **kwargs,
+            ): key
+            for key, prompt in prompts.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                yield key, future.result(), None
+            except Exception as e:  # noqa: BLE001 - surfaced to the caller per key
+                logger.error("Worksheet generation failed for %s: %s", key, e)
+                yield key, None, e
@@ -20,6 +20,8 @@ on the selected subject (English, Maths, Science, History, etc.).
 
 from typing import Dict, Callable
 
+from telemetry import span
+
 
 # =============================================================================
 # SUBJECT-SPECIFIC WORD TYPES AND CONTEXT
@@ -1429,7 +1431,10 @@ def get_prompt(worksheet_type: str, **kwargs) -> str:
 
     # Get and call the prompt function
     prompt_fn = _PROMPT_REGISTRY[canonical]
-    return prompt_fn(**kwargs)
+    with span("prompt.build", worksheet_type=canonical, level=kwargs.get("level")) as record:
+        prompt = prompt_fn(**kwargs)
+        record["attrs"]["chars"] = len(prompt)
+    return prompt
 
 
 def list_worksheet_types() -> list:
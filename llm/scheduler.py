@@ -0,0 +1,411 @@
+"""
+Shared, rate-limit-aware scheduler for Claude requests.
+
+Every Streamlit session and pipeline worker in the process sends its
+Claude calls through one ``RequestScheduler``. Two token buckets keep the
+process under the account's requests-per-minute and tokens-per-minute
+limits. A bounded queue lets concurrent sessions wait their turn for a
+few seconds instead of failing. When the API still answers 429 (or is
+overloaded), the request is retried with exponential backoff and jitter,
+honouring the server's Retry-After; every other queued request pauses for
+the same interval and then resumes at the paced rate rather than all at
+once.
+
+The SDK's own retries are turned off for scheduled calls, so this is the
+only place a request is retried.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Account limits to stay under (override with CLAUDE_REQUESTS_PER_MINUTE / CLAUDE_TOKENS_PER_MINUTE
+# to match the account's tier). Like the API, a request counts its prompt plus
+# its full max_tokens until the real usage is known.
+DEFAULT_REQUESTS_PER_MINUTE = 50
+DEFAULT_TOKENS_PER_MINUTE = 400000
+
+# Request burst allowance, in seconds of budget. The API may enforce a per-minute
+# limit over shorter intervals, so a full minute's requests must not go out at once.
+BURST_SECONDS = 5.0
+
+# Requests allowed to wait for a slot before new ones are turned away
+DEFAULT_MAX_QUEUE = 32
+
+# Requests on the wire at once across the whole process
+DEFAULT_MAX_IN_FLIGHT = 8
+
+# Longest a request may wait in the queue before giving up, in seconds
+DEFAULT_MAX_WAIT = 45.0
+
+# Attempts per request, including the first
+DEFAULT_MAX_ATTEMPTS = 4
+
+# Exponential backoff: BASE * 2**attempt seconds, capped, with jitter
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# Server errors worth retrying (529 is Anthropic's "overloaded")
+RETRYABLE_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504, 529)
+
+
+class SchedulerBusyError(RuntimeError):
+    """Raised when a request cannot get a slot within the scheduler's wait limit."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``rate_per_minute``.
+
+    Reservations may take the bucket into debt; the caller is told how long
+    to wait until its share has refilled, so waiting requests are served in
+    the order they reserved.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` from the bucket and return the seconds to wait before using it."""
+        with self._lock:
+            self._refill()
+            self._level -= min(amount, self.capacity)
+            return 0.0 if self._level >= 0 else -self._level / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Return ``amount`` to the bucket, e.g. when a reservation is abandoned."""
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level + amount)
+
+    def drain(self) -> None:
+        """Empty the bucket so the next reservations are paced at the refill rate."""
+        with self._lock:
+            self._refill()
+            self._level = min(self._level, 0.0)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._level
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Return the server's requested delay from an API error's headers, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# The anthropic SDK is imported when an error needs classifying rather than
+# with this module, which the app imports (for queue stats) before first paint.
+# Any SDK error raised here means the SDK is already loaded.
+
+def is_rate_limit(error: Exception) -> bool:
+    """Return True if ``error`` is the API's 429 response."""
+    from anthropic import RateLimitError
+
+    return isinstance(error, RateLimitError)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return True for rate limits, overload, server errors and dropped connections."""
+    from anthropic import APIConnectionError, APIStatusError, RateLimitError
+
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES
+
+
+class RequestScheduler:
+    """
+    Admit, pace and retry Claude requests for the whole process.
+
+    Args:
+        requests_per_minute: Request budget shared by every caller.
+        tokens_per_minute: Token budget shared by every caller. Each request
+            reserves its estimated tokens and is refunded the difference
+            once the real usage is known.
+        max_queue: Requests allowed to wait at once; more are refused with
+            SchedulerBusyError straight away.
+        max_in_flight: Requests allowed on the wire at once.
+        max_wait: Seconds a request may wait for its turn before giving up.
+        max_attempts: Attempts per request, including the first.
+        clock: Monotonic clock, replaceable in tests.
+        sleep: Sleep function, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.requests = TokenBucket(
+            requests_per_minute, max(1.0, requests_per_minute * BURST_SECONDS / 60), clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._sleep = sleep
+        self._cond = threading.Condition()
+        self._waiting = 0
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._stats = {
+            "requests": 0,
+            "completed": 0,
+            "failed": 0,
+            "refused": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    # ─── Admission ────────────────────────────────────────────────────────────
+
+    def _enter_queue(self) -> float:
+        with self._cond:
+            self._stats["requests"] += 1
+            if self._waiting >= self.max_queue:
+                self._stats["refused"] += 1
+                raise SchedulerBusyError(
+                    f"Claude request queue is full ({self._waiting} waiting). Please try again shortly."
+                )
+            self._waiting += 1
+        return self._clock()
+
+    def _take_slot(self, deadline: float) -> None:
+        with self._cond:
+            try:
+                while self._in_flight >= self.max_in_flight:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        self._stats["refused"] += 1
+                        raise SchedulerBusyError(
+                            f"No free Claude request slot within {self.max_wait:.0f}s. Please try again shortly."
+                        )
+                    self._cond.wait(remaining)
+                self._in_flight += 1
+            finally:
+                self._waiting -= 1
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def _pace(self, tokens: int, deadline: float) -> None:
+        """Reserve one request and ``tokens`` from the buckets, then wait for them."""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        with self._cond:
+            wait = max(wait, self._paused_until - self._clock())
+        if self._clock() + wait > deadline:
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+            with self._cond:
+                self._stats["refused"] += 1
+            raise SchedulerBusyError(
+                f"Claude rate limit would hold this request past the {self.max_wait:.0f}s wait limit. "
+                "Please try again shortly."
+            )
+        if wait > 0:
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request, queued or new, for ``seconds``."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def backoff_seconds(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Return the delay before retry number ``attempt`` (0-based)."""
+        server = retry_after_seconds(error) if error is not None else None
+        if server is not None:
+            return server + random.uniform(0, BACKOFF_BASE_SECONDS)
+        ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
+
+    # ─── Calls ────────────────────────────────────────────────────────────────
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        tokens: int = 0,
+        used_tokens: Optional[Callable[[T], int]] = None,
+    ) -> T:
+        """
+        Run ``fn`` once there is capacity, retrying rate limits and server errors.
+
+        Args:
+            fn: Makes one API call; called again for each retry.
+            tokens: Estimated tokens the call will use (prompt plus max_tokens).
+            used_tokens: Optional function giving the real tokens used from
+                ``fn``'s result; the difference is refunded to the bucket.
+
+        A failed attempt, or one where ``fn`` returns None because it was
+        cancelled, has its token reservation refunded in full.
+
+        Returns:
+            Whatever ``fn`` returns.
+
+        Raises:
+            SchedulerBusyError: If the queue is full or the wait would exceed max_wait.
+            anthropic.APIError: The last error once retries are used up, or
+                any non-retryable error straight away.
+        """
+        enqueued = self._enter_queue()
+        deadline = enqueued + self.max_wait
+        self._take_slot(deadline)
+        attempt = 0
+        try:
+            while True:
+                self._pace(tokens, deadline if attempt == 0 else float("inf"))
+                if attempt == 0:
+                    self._record_wait(self._clock() - enqueued)
+                try:
+                    result = fn()
+                except Exception as e:
+                    # The request still counts against the request budget, but a
+                    # failed attempt used no tokens; the retry reserves its own
+                    self.tokens.refund(tokens)
+                    attempt += 1
+                    if not is_retryable(e) or attempt >= self.max_attempts:
+                        with self._cond:
+                            self._stats["failed"] += 1
+                        raise
+                    delay = self.backoff_seconds(attempt - 1, e)
+                    rate_limited = is_rate_limit(e)
+                    with self._cond:
+                        self._stats["retries"] += 1
+                        if rate_limited:
+                            self._stats["rate_limited"] += 1
+                    if rate_limited:
+                        # Pace everyone out of the pause instead of letting them all retry at once
+                        self.requests.drain()
+                    logger.warning(
+                        "Claude request failed (%s); retrying in %.1fs (attempt %d of %d)",
+                        getattr(e, "status_code", type(e).__name__), delay, attempt + 1, self.max_attempts,
+                    )
+                    self.pause(delay)
+                    continue
+                if result is None:
+                    # Cancelled before a response (e.g. a losing hedge)
+                    self.tokens.refund(tokens)
+                elif used_tokens is not None:
+                    try:
+                        self.tokens.refund(tokens - used_tokens(result))
+                    except Exception:  # noqa: BLE001 - usage is best-effort accounting
+                        pass
+                with self._cond:
+                    self._stats["completed"] += 1
+                return result
+        finally:
+            self._release_slot()
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._cond:
+            self._stats["total_wait_seconds"] += seconds
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], seconds)
+
+    def stats(self) -> dict:
+        """
+        Return queue and rate-limit statistics for dashboards and logs.
+
+        Returns:
+            Dictionary with the live ``queue_depth`` and ``in_flight``, the
+            ``paused_seconds`` left after a 429, remaining bucket capacity,
+            and running counts of requests, completions, failures, refusals,
+            retries, rate limits and queue wait times.
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                queue_depth=self._waiting,
+                in_flight=self._in_flight,
+                paused_seconds=max(0.0, self._paused_until - self._clock()),
+            )
+        started = stats["completed"] + stats["failed"]
+        stats["mean_wait_seconds"] = stats["total_wait_seconds"] / started if started else 0.0
+        stats["requests_available"] = self.requests.available
+        stats["tokens_available"] = self.tokens.available
+        return stats
+
+
+def estimate_tokens(request: dict) -> int:
+    """Estimate a Messages request's token cost: prompt characters / 4 plus max_tokens."""
+    chars = len(request.get("system") or "")
+    for message in request.get("messages", []):
+        content = message.get("content")
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    return chars // 4 + int(request.get("max_tokens", 0))
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> RequestScheduler:
+    """
+    Return the process-wide request scheduler, creating it on first use.
+
+    Limits come from CLAUDE_REQUESTS_PER_MINUTE, CLAUDE_TOKENS_PER_MINUTE,
+    CLAUDE_MAX_QUEUE and CLAUDE_MAX_IN_FLIGHT when set.
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler(
+                requests_per_minute=float(os.getenv("CLAUDE_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE)),
+                tokens_per_minute=float(os.getenv("CLAUDE_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE)),
+                max_queue=int(os.getenv("CLAUDE_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+                max_in_flight=int(os.getenv("CLAUDE_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+            )
+        return _default_scheduler
+
+
+def get_scheduler_stats() -> dict:
+    """Return ``stats()`` for the process-wide scheduler."""
+    return get_default_scheduler().stats()
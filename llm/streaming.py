@@ -0,0 +1,214 @@
+"""
+Incremental JSON parsing for streamed Claude responses.
+
+Claude streams worksheet JSON a few characters at a time. The parser here
+consumes those fragments and reports each top-level element of the
+worksheet object as soon as it closes: scalar and object fields such as
+"title" or "passage", and every item of a top-level array such as
+"sections" or "questions". The UI can then preview finished sections while
+the rest of the worksheet is still being written.
+
+Element paths are tuples: ``("title",)`` for a top-level field and
+``("sections", 2)`` for the third item of a top-level array. The empty
+path ``RESET_PATH`` tells a consumer to discard everything received so
+far, because the elements that follow come from a different response.
+"""
+
+import json
+import logging
+from typing import Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\r\n"
+
+# Path of the element that discards everything streamed before it
+RESET_PATH: tuple = ()
+
+
+class IncrementalJSONParser:
+    """
+    Streaming scanner that emits completed top-level JSON elements.
+
+    Any text before the first ``{`` (such as a markdown code fence) is
+    ignored. The scanner only tracks string, escape and bracket state, so
+    each character is examined once; completed elements are decoded with
+    ``json.loads`` on their exact slice of the buffer.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._started = False
+        self.done = False
+        self.partial: dict = {}
+
+        # Open containers as (char, start_index, role)
+        self._stack: List[Tuple[str, int, Optional[str]]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_role: Optional[str] = None
+        self._scalar_start: Optional[int] = None
+        self._scalar_role: Optional[str] = None
+
+        self._expect_key = False
+        self._expect_value = False
+        self._expect_item = False
+        self._key: Optional[str] = None
+        self._item_index = 0
+
+    def feed(self, text: str) -> List[Tuple[tuple, Any]]:
+        """
+        Consume the next fragment of streamed text.
+
+        Args:
+            text: The newly received characters.
+
+        Returns:
+            A list of ``(path, value)`` pairs for every element that closed
+            within this fragment, in document order.
+        """
+        self._buf += text
+        events: List[Tuple[tuple, Any]] = []
+        buf = self._buf
+
+        while self._pos < len(buf) and not self.done:
+            i = self._pos
+            ch = buf[i]
+            self._pos += 1
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._stack.append(("{", i, None))
+                    self._expect_key = True
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._finish(self._string_role, self._string_start, i + 1, events)
+                continue
+
+            if ch in _WHITESPACE:
+                continue
+
+            if ch in ",}]":
+                if self._scalar_start is not None:
+                    self._finish(self._scalar_role, self._scalar_start, i, events)
+                    self._scalar_start = None
+                if ch == ",":
+                    if len(self._stack) == 1:
+                        self._expect_key = True
+                    elif self._is_top_level_array():
+                        self._expect_item = True
+                    continue
+                opener, start, role = self._stack.pop()
+                self._expect_item = False
+                if not self._stack:
+                    self.done = True
+                else:
+                    self._finish(role, start, i + 1, events)
+                continue
+
+            if ch == ":":
+                if len(self._stack) == 1:
+                    self._expect_value = True
+                continue
+
+            role = self._claim_role(ch)
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_role = role
+            elif ch in "{[":
+                self._stack.append((ch, i, role))
+                if ch == "[" and role == "value":
+                    self._item_index = 0
+                    self._expect_item = True
+            elif self._scalar_start is None:
+                self._scalar_start = i
+                self._scalar_role = role
+
+        return events
+
+    def _is_top_level_array(self) -> bool:
+        return len(self._stack) == 2 and self._stack[1][0] == "[" and self._stack[1][2] == "value"
+
+    def _claim_role(self, ch: str) -> Optional[str]:
+        """Return the role of a value starting at the current position."""
+        if len(self._stack) == 1:
+            if self._expect_key and ch == '"':
+                self._expect_key = False
+                return "key"
+            if self._expect_value:
+                self._expect_value = False
+                return "value"
+        elif self._expect_item and self._is_top_level_array():
+            self._expect_item = False
+            return "item"
+        return None
+
+    def _finish(self, role: Optional[str], start: int, end: int, events: list) -> None:
+        """Decode a completed slice and record it according to its role."""
+        if role is None:
+            return
+        try:
+            value = json.loads(self._buf[start:end])
+        except json.JSONDecodeError:
+            logger.debug("Skipping undecodable streamed element: %r", self._buf[start:end][:80])
+            return
+
+        if role == "key":
+            self._key = value
+            return
+        if role == "value":
+            path = (self._key,)
+        else:
+            path = (self._key, self._item_index)
+            self._item_index += 1
+        apply_stream_element(self.partial, path, value)
+        events.append((path, value))
+
+
+def apply_stream_element(partial: dict, path: tuple, value: Any) -> None:
+    """
+    Merge a streamed element into a partially built worksheet dict.
+
+    Args:
+        partial: The dict being assembled; modified in place.
+        path: ``(key,)`` or ``(key, index)`` as produced by the parser,
+            or ``RESET_PATH`` to empty ``partial``.
+        value: The decoded element.
+    """
+    if path == RESET_PATH:
+        partial.clear()
+        return
+    key = path[0]
+    if len(path) == 1:
+        partial[key] = value
+        return
+    items = partial.get(key)
+    if not isinstance(items, list):
+        items = partial[key] = []
+    if path[1] == len(items):
+        items.append(value)
+
+
+def iter_elements(content: dict) -> Iterator[Tuple[tuple, Any]]:
+    """
+    Yield the elements a parser would have produced for ``content``.
+
+    Used to replay already-complete content (e.g. a cache hit) through the
+    same callback as a live stream.
+    """
+    for key, value in content.items():
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                yield (key, index), item
+        yield (key,), value
@@ -0,0 +1,22 @@
+"""
+Headless worksheet production pipeline.
+
+Importable API used by the Streamlit app and the ``python -m pipeline``
+command line: prompt -> Claude -> generator -> .docx / .zip, without a
+browser session.
+"""
+
+from pipeline.core import (
+    build_documents,
+    build_prompts,
+    build_zip,
+    generate_contents,
+    generate_for_level,
+    make_params,
+    pack_filename,
+    run_job,
+    run_jobs,
+    worksheet_filename,
+    write_zip,
+)
+from pipeline.manifest import job_to_params, load_manifest
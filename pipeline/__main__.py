@@ -0,0 +1,85 @@
+"""
+Command-line entry point for bulk worksheet production.
+
+Usage:
+    python -m pipeline jobs.jsonl --out packs/ --workers 4 --zip [--trace trace.jsonl] [--metrics]
+"""
+
+import sys
+import logging
+import argparse
+
+from pipeline import executor
+from pipeline.core import run_jobs
+from pipeline.manifest import job_to_params, load_manifest
+from telemetry import render_metrics, set_trace_path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m pipeline",
+        description="Generate and build worksheet packs from a JSONL or YAML job manifest.",
+    )
+    parser.add_argument("manifest", help="Path to a .jsonl, .yaml or .yml manifest")
+    parser.add_argument("--out", default="output", help="Directory to write documents into")
+    parser.add_argument("--workers", type=int, default=2, help="Jobs to run in parallel")
+    parser.add_argument("--zip", action="store_true", help="Write one ZIP per job")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="Build content locally without Claude (worksheet types with a local engine only)",
+    )
+    parser.add_argument("--trace", metavar="PATH", help="Append per-phase timing spans to PATH as JSONL")
+    parser.add_argument("--metrics", action="store_true", help="Print Prometheus metrics at the end of the run")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    if args.trace:
+        set_trace_path(args.trace)
+
+    try:
+        manifest = load_manifest(args.manifest)
+    except (ImportError, OSError, ValueError) as e:
+        print(e if isinstance(e, ValueError) else f"{args.manifest}: {e}", file=sys.stderr)
+        return 2
+
+    jobs = []
+    for number, job in enumerate(manifest, start=1):
+        if args.offline:
+            job = {**job, 'offline': True}
+        try:
+            jobs.append(job_to_params(job))
+        except (TypeError, ValueError) as e:
+            print(f"{args.manifest}: job {number}: {e}", file=sys.stderr)
+            return 2
+
+    try:
+        summary = run_jobs(
+            jobs, args.out, workers=args.workers, as_zip=args.zip, use_cache=not args.no_cache,
+        )
+    finally:
+        executor.shutdown()
+
+    for params, report in zip(jobs, summary['reports']):
+        status = "ok" if not report['errors'] else f"errors: {report['errors']}"
+        print(
+            f"{params['subject']} {params['year_group']} {params['ws_type_key']}: "
+            f"{report['documents']} documents ({status})"
+        )
+    print(
+        f"\n{summary['jobs']} jobs, {summary['documents']} documents in "
+        f"{summary['seconds']:.1f}s ({summary['documents_per_minute']:.1f} documents/min), "
+        f"{summary['failed_jobs']} with errors"
+    )
+    if args.metrics:
+        print("\n" + render_metrics(), end="")
+    return 1 if summary['failed_jobs'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,478 @@
+"""
+Headless worksheet pipeline: prompt -> Claude -> generator -> .docx / .zip.
+
+Everything the Streamlit app does between the sidebar and the download
+buttons lives here, so the same code path can run from the app, from the
+``python -m pipeline`` CLI, or from another Python program.
+
+A job is described by a ``params`` dict with the same keys the app keeps
+in ``st.session_state.generation_params`` (see ``make_params``).
+"""
+
+import io
+import os
+import time
+import logging
+import zipfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from content import generate_local_content, has_local_engine, verify_content
+from curriculum import SUBJECT_REGISTRY, WORKSHEET_TYPE_DISPLAY
+from curriculum.search import closest_objectives
+from generators import GENERATOR_MAP
+from generators.styles import DIFF_LEVELS, THEMES, YEAR_AGES
+from llm.prompts import get_prompt
+from llm.streaming import iter_elements
+from pipeline import executor
+from telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# Callback receiving (step, total, label) as each document is built
+ProgressCallback = Callable[[int, int, str], None]
+
+# Pack members that are already compressed, so are stored rather than deflated again
+STORED_EXTENSIONS = (".docx", ".xlsx", ".pptx", ".zip", ".png", ".jpg", ".jpeg")
+
+# Size of a pack build_zip keeps in memory before spilling to a temporary file
+ZIP_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def make_params(
+    subject: str,
+    year_group: str,
+    worksheet_type: str,
+    strand: Optional[str] = None,
+    topic: Optional[str] = None,
+    theme_key: str = "classic",
+    levels: Optional[List[str]] = None,
+    custom_topic: str = "",
+    custom_objective: str = "",
+    extra_spacing: bool = False,
+    eal_glossary: bool = False,
+    include_answer_key: bool = False,
+    offline: bool = False,
+    seed=None,
+) -> dict:
+    """
+    Resolve a worksheet request into the params dict used by every phase.
+
+    Custom topic and objective override the curriculum selection exactly
+    as they do in the app's sidebar. A custom topic without a custom
+    objective is given the closest objective in the subject and year
+    group's curriculum, or the strand's first objective if none matches.
+
+    Args:
+        subject: A key of SUBJECT_REGISTRY, e.g. "English".
+        year_group: e.g. "Year 3".
+        worksheet_type: Worksheet type key, e.g. "cloze".
+        strand: Curriculum strand. Defaults to the first strand for the year.
+        topic: Curriculum topic. Defaults to the first topic in the strand.
+        theme_key: Visual theme key.
+        levels: Differentiation levels. Defaults to all three.
+        custom_topic: Optional free-text topic override.
+        custom_objective: Optional free-text objective override.
+        extra_spacing: Extra-large line spacing for accessibility.
+        eal_glossary: Add an EAL glossary box.
+        include_answer_key: Also build an answer key per level.
+        offline: Build content with the local engine instead of Claude.
+        seed: Seed for repeatable local content.
+
+    Returns:
+        The params dict.
+
+    Raises:
+        ValueError: If the subject, year group, strand, worksheet type or
+            theme is not recognised, the topic is not in the strand (and no
+            custom topic is given), or ``offline`` is set for a worksheet
+            type with no local engine.
+    """
+    if subject not in SUBJECT_REGISTRY:
+        raise ValueError(f"Unknown subject: '{subject}'. Valid subjects are: {list(SUBJECT_REGISTRY)}")
+    subject_config = SUBJECT_REGISTRY[subject]
+    curriculum_data = subject_config["curriculum"]
+    if year_group not in curriculum_data:
+        raise ValueError(f"{subject} has no curriculum for '{year_group}'.")
+    if worksheet_type not in subject_config["worksheet_types"]:
+        raise ValueError(f"Worksheet type '{worksheet_type}' is not available for {subject}.")
+    if theme_key not in THEMES:
+        raise ValueError(f"Unknown theme: '{theme_key}'. Valid themes are: {list(THEMES)}")
+    if offline and not has_local_engine(worksheet_type):
+        raise ValueError(f"Worksheet type '{worksheet_type}' cannot be generated offline.")
+
+    strand = strand or next(iter(curriculum_data[year_group]))
+    if strand not in curriculum_data[year_group]:
+        raise ValueError(f"Unknown strand '{strand}' for {subject} {year_group}.")
+    strand_data = curriculum_data[year_group][strand]
+    custom_topic = custom_topic.strip()
+    custom_objective = custom_objective.strip()
+    topic = topic or strand_data["topics"][0]
+    if not custom_topic and topic not in strand_data["topics"]:
+        raise ValueError(
+            f"Unknown topic: '{topic}'. Valid topics for {subject} {year_group} {strand} "
+            f"are: {strand_data['topics']}"
+        )
+    objectives = strand_data["objectives"]
+    objective_text = objectives[0] if objectives else ""
+
+    if custom_topic and not custom_objective:
+        closest = closest_objectives(custom_topic, subject=subject, year_group=year_group, limit=1)
+        if closest:
+            objective_text = closest[0]["text"]
+    theme = THEMES[theme_key]
+
+    return {
+        'ws_type_key': worksheet_type,
+        'year_group': year_group,
+        'subject': subject,
+        'effective_topic': custom_topic or f"{strand} - {topic}",
+        'effective_objective': custom_objective or objective_text,
+        'topic_for_filename': custom_topic or topic,
+        'age_range': YEAR_AGES[year_group],
+        'theme_key': theme_key,
+        'theme_name': theme['name'],
+        'theme_icon': theme['icon'],
+        'worksheet_type': WORKSHEET_TYPE_DISPLAY[worksheet_type],
+        'extra_spacing': extra_spacing,
+        'eal_glossary': eal_glossary,
+        'include_answer_key': include_answer_key,
+        'levels': list(levels or DIFF_LEVELS),
+        'offline': offline,
+        'seed': seed,
+    }
+
+
+def build_prompts(params: dict) -> Dict[str, str]:
+    """Return the full Claude prompt for each level in ``params``."""
+    return {
+        level: get_prompt(
+            worksheet_type=params['ws_type_key'],
+            year_group=params['year_group'],
+            topic=params['effective_topic'],
+            objective=params['effective_objective'],
+            age_range=params['age_range'],
+            theme_name=params['theme_name'],
+            theme_icon=params['theme_icon'],
+            level=level,
+            subject=params.get('subject', 'English'),
+        )
+        for level in params['levels']
+    }
+
+
+def generate_contents(
+    params: dict,
+    use_cache: bool = True,
+    on_element=None,
+) -> Iterator[Tuple[str, Optional[dict], Optional[Exception]]]:
+    """
+    Generate content for every level in ``params`` concurrently.
+
+    Offline jobs are built by the local content engine instead, with
+    ``on_element`` replayed so previews behave the same. Claude's maths
+    answers are rechecked and corrected by ``verify_content``.
+
+    Yields:
+        ``(level, content, error)`` in completion order, as produced by
+        ``generate_worksheet_contents_concurrently``.
+    """
+    if params.get('offline'):
+        return _generate_locally(params, on_element)
+    # Imported here: the anthropic SDK is the slowest import in the app and
+    # offline jobs, previews and document builds never need it
+    from llm.client import generate_worksheet_contents_concurrently, max_tokens_for
+
+    return _verified(params['ws_type_key'], generate_worksheet_contents_concurrently(
+        build_prompts(params),
+        on_element=on_element,
+        max_tokens=max_tokens_for(params['ws_type_key']),
+        subject=params.get('subject', 'English'),
+        use_cache=use_cache,
+        worksheet_type=params['ws_type_key'],
+    ))
+
+
+def _verified(ws_type_key: str, results):
+    for level, content, error in results:
+        if content:
+            with span("content.verify", worksheet_type=ws_type_key, level=level) as record:
+                fixes = verify_content(ws_type_key, content)
+                record["attrs"]["corrected"] = len(fixes)
+            for fix in fixes:
+                logger.warning(
+                    "Corrected %s answer at %s: %r -> %r (%s)",
+                    level, fix['path'], fix['answer'], fix['corrected'], fix['question'],
+                )
+        yield level, content, error
+
+
+def _generate_locally(params: dict, on_element=None):
+    for level in params['levels']:
+        try:
+            with span("content.local", worksheet_type=params['ws_type_key'], level=level):
+                content = generate_local_content(
+                    params['ws_type_key'], params['year_group'], level,
+                    topic=params['effective_topic'],
+                    theme_key=params['theme_key'],
+                    seed=params.get('seed'),
+                )
+        except ValueError as e:
+            yield level, None, e
+            continue
+        if on_element:
+            for path, value in iter_elements(content):
+                on_element(level, path, value)
+        yield level, content, None
+
+
+def generate_for_level(ws_type_key, content, level, theme_key, objective_text,
+                       extra_spacing, eal_glossary, show_answers=False):
+    """Generate a single worksheet for one differentiation level."""
+    generator = GENERATOR_MAP[ws_type_key]
+    return generator(
+        content=content,
+        theme_key=theme_key,
+        level=level,
+        objective=objective_text,
+        extra_spacing=extra_spacing,
+        eal_glossary=eal_glossary,
+        show_answers=show_answers,
+    )
+
+
+def worksheet_filename(params: dict, level: str, answer_key: bool = False) -> str:
+    """Return the .docx filename for one level's worksheet or answer key."""
+    suffix = "_ANSWER_KEY" if answer_key else ""
+    return (
+        f"{params['year_group']}_{params['topic_for_filename']}"
+        f"_{params['worksheet_type']}_{level}{suffix}.docx"
+    ).replace(" ", "_")
+
+
+def pack_filename(params: dict) -> str:
+    """Return the .zip filename for a job's full set of documents."""
+    return (
+        f"{params['year_group']}_{params['topic_for_filename']}"
+        f"_{params['worksheet_type']}_All.zip"
+    ).replace(" ", "_")
+
+
+def build_documents(
+    params: dict,
+    contents: Dict[str, dict],
+    on_progress: Optional[ProgressCallback] = None,
+) -> Dict[str, dict]:
+    """
+    Render every worksheet (and answer key, if requested) for a job.
+
+    Documents are rendered in parallel on the shared build pool (see
+    ``pipeline.executor``); the result is ordered by level, worksheet
+    before answer key, whatever order they finish in.
+
+    Args:
+        params: The job params.
+        contents: Generated content keyed by level.
+        on_progress: Optional callback called as each document finishes.
+
+    Returns:
+        Ordered mapping of ``level`` / ``level_answer`` to
+        ``{'buffer': BytesIO, 'filename': str, 'label': str, 'seconds': float}``.
+    """
+    specs, meta = [], {}
+    for level, content in contents.items():
+        level_label = DIFF_LEVELS[level]['label']
+        variants = [(False, level, level_label)]
+        if params['include_answer_key']:
+            variants.append((True, f'{level}_answer', f'{level_label} - Answer Key'))
+
+        for show_answers, key, label in variants:
+            specs.append({
+                'key': key,
+                'ws_type_key': params['ws_type_key'],
+                'content': content,
+                'level': level,
+                'theme_key': params['theme_key'],
+                'objective_text': params['effective_objective'],
+                'extra_spacing': params['extra_spacing'],
+                'eal_glossary': params['eal_glossary'],
+                'show_answers': show_answers,
+            })
+            meta[key] = (worksheet_filename(params, level, answer_key=show_answers), label)
+
+    rendered = {}
+    with span("docx.build", worksheet_type=params['ws_type_key']) as record:
+        record["attrs"]["documents"] = len(specs)
+        for step, (key, buffer, seconds) in enumerate(executor.iter_render(specs), start=1):
+            rendered[key] = (buffer, seconds)
+            logger.debug("Built %s in %.2fs", meta[key][0], seconds)
+            if on_progress:
+                on_progress(step, len(specs), meta[key][1])
+
+    generated_files = {}
+    for spec in specs:
+        buffer, seconds = rendered[spec['key']]
+        if buffer.getbuffer().nbytes:
+            filename, label = meta[spec['key']]
+            generated_files[spec['key']] = {
+                'buffer': buffer,
+                'filename': filename,
+                'label': label,
+                'seconds': seconds,
+            }
+    return generated_files
+
+
+def write_zip(files: Iterable[Tuple[str, io.BytesIO]], fileobj: BinaryIO) -> int:
+    """
+    Write documents into a ZIP archive on ``fileobj`` as they arrive.
+
+    Members that are already compressed (a .docx is itself a ZIP) are
+    stored as they are rather than deflated again, and each is written
+    from its buffer without copying it, so a pack of any size only ever
+    holds the document being written.
+
+    Args:
+        files: ``(filename, buffer)`` pairs, e.g. from a generator.
+        fileobj: Binary file opened for writing, e.g. a file on disk.
+
+    Returns:
+        The number of documents written.
+    """
+    with span("zip.build") as record:
+        count = 0
+        start = fileobj.tell()
+        with zipfile.ZipFile(fileobj, 'w') as zf:
+            for filename, buffer in files:
+                compress_type = (
+                    zipfile.ZIP_STORED if filename.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+                )
+                with buffer.getbuffer() as data:
+                    zf.writestr(filename, data, compress_type=compress_type)
+                count += 1
+        record["attrs"].update(files=count, bytes=fileobj.tell() - start)
+    return count
+
+
+def build_zip(generated_files: Dict[str, dict]) -> BinaryIO:
+    """
+    Bundle built documents into a single ZIP archive.
+
+    The archive is kept in memory up to ZIP_SPOOL_BYTES and spills to a
+    temporary file beyond that.
+
+    Returns:
+        A temporary file holding the archive, positioned at the start.
+    """
+    pack = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES)
+    write_zip(((file_info['filename'], file_info['buffer']) for file_info in generated_files.values()), pack)
+    pack.seek(0)
+    return pack
+
+
+def run_job(
+    params: dict,
+    output_dir: str,
+    as_zip: bool = False,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Run one job end to end and write its documents to ``output_dir``.
+
+    Returns:
+        A report dict with ``files`` written, ``documents`` built, per-phase
+        ``generate_seconds`` / ``build_seconds``, and ``errors`` per level.
+    """
+    with span("pipeline.job", worksheet_type=params['ws_type_key']) as record:
+        report = _run_job(params, output_dir, as_zip, use_cache)
+        record["attrs"].update(documents=report['documents'], errors=len(report['errors']))
+    return report
+
+
+def _run_job(params: dict, output_dir: str, as_zip: bool, use_cache: bool) -> dict:
+    started = time.perf_counter()
+    contents, errors = {}, {}
+    for level, content, error in generate_contents(params, use_cache=use_cache):
+        if content:
+            contents[level] = content
+        else:
+            errors[level] = str(error)
+    # Keep document order stable regardless of completion order
+    contents = {level: contents[level] for level in params['levels'] if level in contents}
+    generated = time.perf_counter()
+
+    files = build_documents(params, contents)
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    if as_zip and files:
+        path = os.path.join(output_dir, pack_filename(params))
+        with open(path, 'wb') as f:
+            write_zip(((file_info['filename'], file_info['buffer']) for file_info in files.values()), f)
+        written.append(path)
+    else:
+        for file_info in files.values():
+            path = os.path.join(output_dir, file_info['filename'])
+            with open(path, 'wb') as f:
+                f.write(file_info['buffer'].getbuffer())
+            written.append(path)
+    finished = time.perf_counter()
+
+    return {
+        'files': written,
+        'documents': len(files),
+        'generate_seconds': generated - started,
+        'build_seconds': finished - generated,
+        'errors': errors,
+    }
+
+
+def run_jobs(
+    jobs: List[dict],
+    output_dir: str,
+    workers: int = 2,
+    as_zip: bool = False,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Run many jobs in parallel and report throughput.
+
+    Each job already generates its levels concurrently, so ``workers``
+    bounds how many jobs (not requests) are in flight at once.
+
+    Args:
+        jobs: Params dicts from ``make_params``.
+        output_dir: Directory to write documents into.
+        workers: Maximum number of jobs running at once.
+        as_zip: Write one ZIP per job instead of loose .docx files.
+        use_cache: Serve identical prompts from the response cache.
+
+    Returns:
+        A summary dict with ``jobs``, ``failed_jobs``, ``documents``,
+        ``seconds``, ``documents_per_minute`` and per-job ``reports``.
+    """
+    started = time.perf_counter()
+    reports: List[Optional[dict]] = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="worksheet-job") as pool:
+        futures = {
+            pool.submit(run_job, params, output_dir, as_zip, use_cache): i
+            for i, params in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                reports[i] = future.result()
+            except Exception as e:  # noqa: BLE001 - one bad job must not stop the run
+                logger.error("Job %d failed: %s", i, e)
+                reports[i] = {'files': [], 'documents': 0, 'errors': {'job': str(e)}}
+
+    seconds = time.perf_counter() - started
+    documents = sum(r['documents'] for r in reports)
+    return {
+        'jobs': len(jobs),
+        'failed_jobs': sum(1 for r in reports if r['errors']),
+        'documents': documents,
+        'seconds': seconds,
+        'documents_per_minute': documents / seconds * 60 if seconds else 0.0,
+        'reports': reports,
+    }
@@ -0,0 +1,196 @@
+"""
+Parallel Word document building on a process pool.
+
+python-docx and lxml are CPU-bound and hold the GIL, so rendering a
+level's worksheet and answer key one after another uses a single core.
+The build executor fans each ``GENERATOR_MAP`` call out to a worker
+process and returns the finished .docx bytes as they complete, with the
+time each document took to render.
+
+The pool is created on first use and shared for the life of the process,
+so the cost of starting workers (and importing python-docx in them) is
+paid once rather than per build. Workers are started with the "spawn"
+method, which is safe to use from the Streamlit server's threads. "spawn"
+re-runs a script started as ``__main__`` (app.py under Streamlit) in every
+new worker, so the script is pointed at the empty ``pipeline.worker_main``
+module before workers start (see ``_declare_worker_main``).
+
+Documents already built from the same content and settings are served
+from the render cache instead of being rendered again.
+
+Telemetry spans recorded while a worker renders are sent back with the
+document and recorded in the calling process, under the caller's trace.
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import threading
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional, Tuple
+
+from pipeline.render_cache import get_render_cache, make_render_key
+from telemetry import capture, count, current_context, ingest, span
+
+logger = logging.getLogger(__name__)
+
+# Number of worker processes (override with WORKSHEET_BUILD_WORKERS; 0 builds in-process)
+DEFAULT_BUILD_WORKERS = min(6, os.cpu_count() or 1)
+
+# Module that workers import in place of a script run as __main__
+WORKER_MAIN = "pipeline.worker_main"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def render_document(spec: dict, trace: Optional[dict] = None) -> Tuple[str, bytes, float, List[dict]]:
+    """
+    Render one document described by ``spec``.
+
+    Runs inside a worker process, so it takes and returns only picklable
+    values. ``spec`` holds ``key`` plus the keyword arguments of
+    ``pipeline.core.generate_for_level``.
+
+    Args:
+        spec: The document to render.
+        trace: The caller's ``telemetry.current_context()``, so spans
+            recorded here join its trace.
+
+    Returns:
+        ``(key, docx_bytes, seconds, spans)``, where ``spans`` are the
+        telemetry records to ``ingest`` in the calling process.
+    """
+    from pipeline.core import generate_for_level
+
+    started = time.perf_counter()
+    with capture(trace) as spans:
+        with span(
+            "docx.render", worksheet_type=spec['ws_type_key'], level=spec['level'],
+            answer_key=spec['show_answers'],
+        ) as record:
+            buffer = generate_for_level(
+                spec['ws_type_key'], spec['content'], spec['level'],
+                spec['theme_key'], spec['objective_text'],
+                spec['extra_spacing'], spec['eal_glossary'],
+                show_answers=spec['show_answers'],
+            )
+            data = buffer.getvalue() if buffer else b''
+            record["attrs"]["bytes"] = len(data)
+    return spec['key'], data, time.perf_counter() - started, spans
+
+
+def _build_workers() -> int:
+    value = os.getenv("WORKSHEET_BUILD_WORKERS")
+    return DEFAULT_BUILD_WORKERS if value is None else max(0, int(value))
+
+
+def _declare_worker_main() -> None:
+    """
+    Have new workers import ``pipeline.worker_main`` instead of re-running the script.
+
+    "spawn" prepares each new worker by importing the parent's main module:
+    by name if it has a ``__spec__``, otherwise by running its file again.
+    Under Streamlit the main module is app.py, run as a script without a
+    spec, so every new worker would run the whole app in bare mode before
+    its first render. Giving the script module the spec of the empty
+    ``pipeline.worker_main`` makes spawn import that instead. This changes
+    an attribute of the current script module only; ``sys.modules`` is
+    left alone, and modules run with ``python -m`` keep their own spec.
+
+    Called before every submit, because workers start on demand and each
+    Streamlit rerun installs a fresh script module.
+    """
+    main = sys.modules.get("__main__")
+    if main is not None and getattr(main, "__spec__", None) is None and getattr(main, "__file__", None):
+        main.__spec__ = importlib.util.find_spec(WORKER_MAIN)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def iter_render(specs: List[dict]) -> Iterator[Tuple[str, io.BytesIO, float]]:
+    """
+    Render documents in parallel and yield each one as it completes.
+
+    Documents already in the render cache (see ``pipeline.render_cache``)
+    are yielded first without rendering; the rest are rendered and cached.
+    Falls back to rendering in the calling process when there is only one
+    document to render or when WORKSHEET_BUILD_WORKERS is 0.
+
+    Yields:
+        ``(key, BytesIO, seconds)`` in completion order.
+
+    Raises:
+        Any exception raised by a generator, re-raised in the caller.
+    """
+    cache = get_render_cache()
+    cache_keys, pending = {}, []
+    for spec in specs:
+        if cache is None:
+            pending.append(spec)
+            continue
+        started = time.perf_counter()
+        cache_key = cache_keys[spec['key']] = make_render_key(spec)
+        data = cache.get(cache_key)
+        if data is None:
+            pending.append(spec)
+            continue
+        count("docx_render_cache_hits", worksheet_type=spec['ws_type_key'])
+        yield spec['key'], io.BytesIO(data), time.perf_counter() - started
+
+    for key, data, seconds in _render(pending):
+        if cache is not None and data:
+            cache.put(cache_keys[key], data)
+        yield key, io.BytesIO(data), seconds
+
+
+def _render(specs: List[dict]) -> Iterator[Tuple[str, bytes, float]]:
+    workers = _build_workers()
+    trace = current_context()
+    if workers == 0 or len(specs) <= 1:
+        for spec in specs:
+            key, data, seconds, spans = render_document(spec, trace)
+            ingest(spans)
+            yield key, data, seconds
+        return
+
+    pool = _get_pool(workers)
+    try:
+        # Workers are started on demand by submit()
+        _declare_worker_main()
+        futures = [pool.submit(render_document, spec, trace) for spec in specs]
+        for future in as_completed(futures):
+            key, data, seconds, spans = future.result()
+            ingest(spans)
+            yield key, data, seconds
+    except BrokenProcessPool:
+        logger.error("Document build pool died; it will be restarted on the next build")
+        _reset_pool()
+        raise
+
+
+def shutdown() -> None:
+    """Stop the shared worker pool (e.g. at the end of a CLI run)."""
+    _reset_pool()
@@ -0,0 +1,71 @@
+"""
+Job manifests for headless bulk worksheet production.
+
+A manifest lists one job per worksheet set, either as JSON Lines (one
+object per line) or YAML (a list of jobs, or a mapping with a ``jobs``
+list). Job fields match the keyword arguments of ``make_params``, with
+two shorthands: ``theme`` for ``theme_key`` and ``answer_key`` for
+``include_answer_key``.
+
+Example (JSONL):
+    {"subject": "Maths", "year_group": "Year 3", "worksheet_type": "times_tables", "theme": "space"}
+    {"subject": "English", "year_group": "Year 4", "strand": "Writing", "worksheet_type": "cloze", "answer_key": true}
+"""
+
+import json
+from typing import List
+
+from pipeline.core import make_params
+
+_ALIASES = {
+    "theme": "theme_key",
+    "answer_key": "include_answer_key",
+}
+
+
+def load_manifest(path: str) -> List[dict]:
+    """
+    Read a JSONL or YAML manifest into a list of raw job dicts.
+
+    Raises:
+        ImportError: If a YAML manifest is given and PyYAML is not installed.
+        ValueError: If the manifest cannot be parsed (naming the line) or
+            is not a list of jobs.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError(
+                "YAML manifests need PyYAML. Install it with 'pip install pyyaml' "
+                "or use a .jsonl manifest."
+            ) from e
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            mark = getattr(e, "problem_mark", None)
+            where = f"line {mark.line + 1}" if mark is not None else "invalid YAML"
+            raise ValueError(f"{path}: {where}: {getattr(e, 'problem', None) or e}") from e
+        jobs = data.get("jobs") if isinstance(data, dict) else data
+    else:
+        jobs = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                jobs.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}: line {number}: {e.msg} (column {e.colno})") from e
+
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError(f"Manifest {path} must contain a list of job objects.")
+    return jobs
+
+
+def job_to_params(job: dict) -> dict:
+    """Resolve a raw manifest job into a params dict via ``make_params``."""
+    kwargs = {_ALIASES.get(key, key): value for key, value in job.items()}
+    return make_params(**kwargs)
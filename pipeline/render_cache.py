@@ -0,0 +1,234 @@
+"""
+Cache of rendered Word documents.
+
+Building the same content again (pressing Build Documents twice, adding
+answer keys to a build, or another teacher building a pack that is
+already cached) is served from here instead of re-running python-docx.
+
+Documents are keyed by a SHA-256 hash of everything passed to
+``pipeline.core.generate_for_level``: the content JSON, worksheet type,
+level, theme, objective and flags, plus a fingerprint of the generator
+sources and the python-docx version, so changing how documents are
+rendered never serves an old one.
+
+Recently used documents are kept in memory up to a byte budget. Every
+document is also written to a SQLite database next to the response cache,
+kept below a size limit by evicting the least recently used rows, so
+documents evicted from memory, or built by another process or before a
+restart, are read back from disk.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+import importlib.metadata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Location of the cache database (override with WORKSHEET_RENDER_CACHE_PATH)
+DEFAULT_RENDER_CACHE_PATH = os.path.join(".cache", "rendered_documents.sqlite3")
+
+# Bytes of documents kept in memory per process
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+# Bytes of documents kept on disk before LRU eviction kicks in
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+# Keyword arguments of generate_for_level that determine the document
+RENDER_FIELDS = (
+    "ws_type_key", "content", "level", "theme_key", "objective_text",
+    "extra_spacing", "eal_glossary", "show_answers",
+)
+
+GENERATORS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "generators")
+
+
+@lru_cache(maxsize=None)
+def generator_fingerprint() -> str:
+    """
+    Return a hash of the generator sources and the python-docx version.
+
+    It changes whenever a generator module or python-docx changes, which
+    is what invalidates cached documents.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(GENERATORS_DIR)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8"))
+            with open(os.path.join(GENERATORS_DIR, name), "rb") as f:
+                digest.update(f.read())
+    try:
+        digest.update(importlib.metadata.version("python-docx").encode("utf-8"))
+    except importlib.metadata.PackageNotFoundError:
+        pass
+    return digest.hexdigest()
+
+
+def make_render_key(spec: dict) -> str:
+    """
+    Build a stable cache key for one document.
+
+    Args:
+        spec: A build spec as used by ``pipeline.executor``: the
+            keyword arguments of ``generate_for_level`` (other keys are
+            ignored).
+
+    Returns:
+        A hex SHA-256 digest identifying the document.
+    """
+    payload = json.dumps(
+        {
+            **{field: spec[field] for field in RENDER_FIELDS},
+            "generator": generator_fingerprint(),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    In-memory LRU of .docx bytes in front of a SQLite store.
+
+    One instance is shared by every Streamlit session and build thread in
+    the process; all access is guarded by a lock.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_RENDER_CACHE_PATH,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+    ):
+        """
+        Args:
+            path: SQLite database file, or None to keep documents in
+                memory only.
+            memory_bytes: Bytes of documents kept in memory.
+            max_disk_bytes: Bytes of documents kept in the database.
+        """
+        self.path = path
+        self.memory_bytes = memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._conn = None
+        if path is None:
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "  key TEXT PRIMARY KEY,"
+            "  data BLOB NOT NULL,"
+            "  size INTEGER NOT NULL,"
+            "  accessed_at REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS documents_accessed_at ON documents (accessed_at)"
+        )
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = data
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached document for ``key``, or None on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT data FROM documents WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE documents SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            data = bytes(row[0])
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key`` and evict the oldest documents if over either budget."""
+        with self._lock:
+            self._remember(key, data)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (key, data, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM documents WHERE key IN ("
+                "  SELECT key FROM ("
+                "    SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC) AS total FROM documents"
+                "  ) WHERE total > ?"
+                ")",
+                (self.max_disk_bytes,),
+            )
+
+    def clear(self) -> None:
+        """Remove every cached document."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM documents")
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._conn is None:
+                return len(self._memory)
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+_render_cache: Optional[RenderCache] = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """
+    Return the process-wide render cache, creating it on first use.
+
+    Set WORKSHEET_CACHE_DISABLED=1 to turn it off along with the response
+    cache, or WORKSHEET_RENDER_CACHE_PATH to move the database. If the
+    database cannot be opened, documents are cached in memory only.
+
+    Returns:
+        The shared RenderCache, or None if caching is disabled.
+    """
+    global _render_cache
+    if os.getenv("WORKSHEET_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _render_cache_lock:
+        if _render_cache is None:
+            path = os.getenv("WORKSHEET_RENDER_CACHE_PATH", DEFAULT_RENDER_CACHE_PATH)
+            try:
+                _render_cache = RenderCache(path)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("Render cache database unavailable at %s, caching in memory only: %s", path, e)
+                _render_cache = RenderCache(None)
+        return _render_cache
@@ -0,0 +1,10 @@
+"""
+Main module of document build workers.
+
+Build workers are started with "spawn", which imports the parent's main
+module again in every new worker. ``pipeline.executor`` gives a script
+run as ``__main__`` this module's spec before starting workers, so they
+import this module instead of running the script (the Streamlit app) a
+second time. Workers only need ``render_document``, which they import by
+name, so this module is deliberately empty.
+"""
@@ -0,0 +1,18 @@
+"""
+Pipeline telemetry: per-phase spans, counters, a JSONL trace file and a
+Prometheus text endpoint.
+"""
+
+from telemetry.tracing import (
+    annotate,
+    capture,
+    count,
+    current_context,
+    current_labels,
+    get_metrics,
+    ingest,
+    reset,
+    set_trace_path,
+    span,
+)
+from telemetry.prometheus import render_metrics, start_metrics_server, start_metrics_server_from_env
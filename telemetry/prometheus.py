@@ -0,0 +1,140 @@
+"""
+Prometheus text exposition of the pipeline's spans and counters.
+
+``render_metrics`` formats the in-memory telemetry as Prometheus text
+(version 0.0.4): one ``worksheet_span_seconds`` histogram labelled by span
+name plus the span's labels, a ``worksheet_span_errors_total`` counter, and
+one ``worksheet_<name>_total`` counter per ``telemetry.count`` name.
+
+``start_metrics_server`` serves that text on ``/metrics`` from a daemon
+thread. The Streamlit app starts it when WORKSHEET_METRICS_PORT is set.
+"""
+
+import os
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from telemetry.tracing import SECONDS_BUCKETS, get_metrics
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "worksheet"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    # Histogram bucket bounds ("le") go last, as in Prometheus' own output
+    ordered = sorted(labels.items(), key=lambda item: (item[0] == "le", item[0]))
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in ordered) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_metrics() -> str:
+    """Return every span histogram and counter in Prometheus text format."""
+    metrics = get_metrics()
+    lines = []
+
+    spans = sorted(metrics["spans"], key=lambda s: (s["name"], sorted(s["labels"].items())))
+    if spans:
+        name = f"{PREFIX}_span_seconds"
+        lines += [f"# HELP {name} Time spent in each pipeline phase.", f"# TYPE {name} histogram"]
+        for stats in spans:
+            labels = {"span": stats["name"], **stats["labels"]}
+            cumulative = 0
+            for bound, bucket in zip(SECONDS_BUCKETS, stats["buckets"]):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _number(bound)})} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {stats['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_number(round(stats['sum'], 6))}")
+            lines.append(f"{name}_count{_format_labels(labels)} {stats['count']}")
+
+        name = f"{PREFIX}_span_errors_total"
+        lines += [f"# HELP {name} Pipeline phases that raised.", f"# TYPE {name} counter"]
+        for stats in spans:
+            lines.append(f"{name}{_format_labels({'span': stats['name'], **stats['labels']})} {stats['errors']}")
+
+    counters = {}
+    for counter in metrics["counters"]:
+        counters.setdefault(counter["name"], []).append(counter)
+    for counter_name in sorted(counters):
+        name = f"{PREFIX}_{counter_name}_total"
+        lines.append(f"# TYPE {name} counter")
+        for counter in sorted(counters[counter_name], key=lambda c: sorted(c["labels"].items())):
+            lines.append(f"{name}{_format_labels(counter['labels'])} {_number(counter['value'])}")
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve ``/metrics`` on ``host:port`` from a daemon thread.
+
+    Only one server is started per process; later calls return it, so this
+    is safe to call on every Streamlit rerun.
+
+    Args:
+        port: TCP port to listen on (0 picks a free one).
+        host: Interface to bind; loopback by default.
+
+    Returns:
+        The running server (``server.server_port`` is the bound port).
+
+    Raises:
+        OSError: If the port cannot be bound.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True, name="worksheet-metrics").start()
+            logger.info("Serving metrics on http://%s:%d/metrics", host, _server.server_port)
+        return _server
+
+
+def start_metrics_server_from_env() -> Optional[ThreadingHTTPServer]:
+    """
+    Start the metrics server if WORKSHEET_METRICS_PORT is set.
+
+    WORKSHEET_METRICS_HOST overrides the loopback bind address. A port that
+    cannot be bound is logged rather than raised, so metrics never stop
+    the app from starting.
+    """
+    port = os.getenv("WORKSHEET_METRICS_PORT")
+    if not port:
+        return None
+    try:
+        return start_metrics_server(int(port), os.getenv("WORKSHEET_METRICS_HOST", "127.0.0.1"))
+    except (OSError, ValueError) as e:
+        logger.warning("Metrics server not started on port %s: %s", port, e)
+        return None
@@ -0,0 +1,268 @@
+"""
+Lightweight spans and counters for the worksheet pipeline.
+
+A span times one phase (building a prompt, a Claude request, JSON
+extraction, rendering or saving a document, zipping a pack) and carries a
+few attributes such as token counts or byte sizes. Counters add up things
+that are not durations, like tokens used or which JSON extraction
+strategy worked.
+
+Spans nest through a context variable: a span opened inside another
+records its parent, shares its trace id and inherits its labels, so a
+Claude message sent for a reading comprehension sheet is labelled with
+that worksheet type without passing it down. Labels are the low-cardinality
+values metrics are grouped by; attributes (see ``annotate``) only go to the
+trace file.
+
+Everything is aggregated in memory for ``telemetry.prometheus``. If
+WORKSHEET_TRACE_PATH is set (or ``set_trace_path`` is called), every
+finished span is also appended to that file as one JSON object per line.
+
+Spans recorded on the document build pool are collected in the worker
+with ``capture`` and replayed into the parent process with ``ingest``.
+"""
+
+import os
+import json
+import time
+import uuid
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the span duration histogram buckets
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_current: ContextVar[Optional[dict]] = ContextVar("telemetry_span", default=None)
+_captured: ContextVar[Optional[list]] = ContextVar("telemetry_capture", default=None)
+
+_lock = threading.Lock()
+_span_stats: Dict[Tuple[str, Labels], dict] = {}
+_counters: Dict[Tuple[str, Labels], float] = {}
+
+_trace_path: Optional[str] = None
+_trace_path_set = False
+_trace_file = None
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+# ─── Recording ─────────────────────────────────────────────────────────────────
+
+@contextmanager
+def span(name: str, **labels) -> Iterator[dict]:
+    """
+    Time the enclosed block as one span.
+
+    Args:
+        name: Dotted phase name, e.g. "claude.request" or "docx.save".
+        **labels: Low-cardinality values to group metrics by (worksheet
+            type, level, model). Added to any labels inherited from the
+            enclosing span; None values are dropped.
+
+    Yields:
+        The span record. Its ``attrs`` dict can be updated directly, or
+        via ``annotate`` from code that does not hold the record.
+    """
+    parent = _current.get()
+    record = {
+        "name": name,
+        "trace": parent["trace"] if parent else _new_id(),
+        "span": _new_id(),
+        "parent": parent["span"] if parent else None,
+        "labels": {**(parent["labels"] if parent else {}), **{k: str(v) for k, v in labels.items() if v is not None}},
+        "attrs": {},
+        "start": time.time(),
+        "pid": os.getpid(),
+    }
+    token = _current.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = type(e).__name__
+        raise
+    else:
+        record["status"] = "ok"
+    finally:
+        record["seconds"] = round(time.perf_counter() - started, 6)
+        _current.reset(token)
+        _finish(record)
+
+
+def annotate(**attrs) -> None:
+    """Add attributes to the innermost open span, if any."""
+    record = _current.get()
+    if record is not None:
+        record["attrs"].update(attrs)
+
+
+def current_labels() -> dict:
+    """Return the labels of the innermost open span (empty outside a span)."""
+    record = _current.get()
+    return dict(record["labels"]) if record is not None else {}
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """
+    Add ``value`` to the counter ``name`` for the given labels.
+
+    Args:
+        name: Counter name without a unit suffix, e.g. "claude_output_tokens".
+        value: Amount to add.
+        **labels: Values to group the counter by; None values are dropped.
+    """
+    if not value:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _finish(record: dict) -> None:
+    captured = _captured.get()
+    if captured is not None:
+        captured.append(record)
+        return
+    _aggregate(record)
+    _write(record)
+
+
+def _aggregate(record: dict) -> None:
+    key = (record["name"], _labels(record["labels"]))
+    seconds = record["seconds"]
+    with _lock:
+        stats = _span_stats.get(key)
+        if stats is None:
+            stats = _span_stats[key] = {
+                "count": 0, "sum": 0.0, "errors": 0, "buckets": [0] * len(SECONDS_BUCKETS),
+            }
+        stats["count"] += 1
+        stats["sum"] += seconds
+        if record["status"] == "error":
+            stats["errors"] += 1
+        index = bisect.bisect_left(SECONDS_BUCKETS, seconds)
+        if index < len(SECONDS_BUCKETS):
+            stats["buckets"][index] += 1
+
+
+# ─── Trace File ────────────────────────────────────────────────────────────────
+
+def set_trace_path(path: Optional[str]) -> None:
+    """Append finished spans to ``path`` as JSONL from now on (None stops writing)."""
+    global _trace_path, _trace_path_set, _trace_file
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = None
+        _trace_path = path
+        _trace_path_set = True
+
+
+def _write(record: dict) -> None:
+    global _trace_path, _trace_path_set, _trace_file
+    with _lock:
+        if not _trace_path_set:
+            _trace_path = os.getenv("WORKSHEET_TRACE_PATH") or None
+            _trace_path_set = True
+        if not _trace_path:
+            return
+        try:
+            if _trace_file is None:
+                os.makedirs(os.path.dirname(_trace_path) or ".", exist_ok=True)
+                _trace_file = open(_trace_path, "a", encoding="utf-8")
+            _trace_file.write(json.dumps(record, default=str) + "\n")
+            _trace_file.flush()
+        except OSError as e:
+            logger.warning("Could not write trace to %s, disabling it: %s", _trace_path, e)
+            _trace_path = None
+
+
+# ─── Cross-Process Spans ───────────────────────────────────────────────────────
+
+def current_context() -> Optional[dict]:
+    """
+    Return the innermost open span's ids and labels, or None outside a span.
+
+    The result is picklable; pass it to ``capture`` in a worker process so
+    spans recorded there join the caller's trace.
+    """
+    record = _current.get()
+    if record is None:
+        return None
+    return {"trace": record["trace"], "span": record["span"], "labels": dict(record["labels"])}
+
+
+@contextmanager
+def capture(parent: Optional[dict] = None) -> Iterator[List[dict]]:
+    """
+    Collect the spans finished inside the block instead of recording them.
+
+    Args:
+        parent: A ``current_context()`` from the calling process to parent
+            the collected spans under.
+
+    Yields:
+        The list the finished span records are appended to, ready to hand
+        back to the parent process for ``ingest``.
+    """
+    records: List[dict] = []
+    capture_token = _captured.set(records)
+    parent_token = _current.set(parent) if parent is not None else None
+    try:
+        yield records
+    finally:
+        if parent_token is not None:
+            _current.reset(parent_token)
+        _captured.reset(capture_token)
+
+
+def ingest(records: List[dict]) -> None:
+    """Record spans collected by ``capture`` (usually in another process)."""
+    for record in records:
+        _aggregate(record)
+        _write(record)
+
+
+# ─── Snapshot ──────────────────────────────────────────────────────────────────
+
+def get_metrics() -> dict:
+    """
+    Return a snapshot of every span histogram and counter.
+
+    Returns:
+        Dictionary with ``spans``, a list of ``{name, labels, count, sum,
+        errors, buckets}`` (bucket counts are per bucket, not cumulative),
+        and ``counters``, a list of ``{name, labels, value}``.
+    """
+    with _lock:
+        spans = [
+            {"name": name, "labels": dict(labels), **{**stats, "buckets": list(stats["buckets"])}}
+            for (name, labels), stats in _span_stats.items()
+        ]
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in _counters.items()
+        ]
+    return {"spans": spans, "counters": counters}
+
+
+def reset() -> None:
+    """Clear all aggregated spans and counters (the trace file is untouched)."""
+    with _lock:
+        _span_stats.clear()
+        _counters.clear()
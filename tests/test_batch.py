@@ -0,0 +1,105 @@
+"""Tests for the resumable Message Batches runner in llm/batch.py."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from llm.batch import BatchRunner, build_batch_jobs
+from llm.budget import MAX_MAX_TOKENS
+from llm.cache import ResponseCache
+
+
+class FakeBatches:
+    """
+    Stands in for ``client.messages.batches``: requests in ``fail`` expire
+    and requests in ``truncate`` are cut off at max_tokens.
+    """
+
+    def __init__(self, fail=(), truncate=()):
+        self.fail = set(fail)
+        self.truncate = set(truncate)
+        self.submitted = []
+        self.max_tokens = []
+
+    def create(self, requests):
+        self.submitted.append([request["custom_id"] for request in requests])
+        self.max_tokens.append({request["custom_id"]: request["params"]["max_tokens"] for request in requests})
+        return SimpleNamespace(id=f"batch_{len(self.submitted)}")
+
+    def retrieve(self, batch_id):
+        counts = SimpleNamespace(processing=0, succeeded=0, errored=0)
+        return SimpleNamespace(processing_status="ended", request_counts=counts)
+
+    def results(self, batch_id):
+        for custom_id in self.submitted[int(batch_id.split("_")[1]) - 1]:
+            if custom_id in self.fail:
+                yield SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="expired"))
+                continue
+            text, stop_reason = json.dumps({"title": custom_id[:8]}), "end_turn"
+            if custom_id in self.truncate:
+                text, stop_reason = text[:10], "max_tokens"
+            message = SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason=stop_reason)
+            yield SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="succeeded", message=message))
+
+
+@pytest.fixture
+def jobs():
+    return build_batch_jobs(
+        "Maths", years=["Year 3"], strands=["Number - Fractions"],
+        worksheet_types=["fraction_practice"], levels=["expected"],
+    )
+
+
+def make_runner(tmp_path, batches):
+    client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    return BatchRunner(str(tmp_path / "state.json"), cache=cache, client=client, poll_interval=0)
+
+
+def test_strand_names_must_match_the_curriculum():
+    with pytest.raises(ValueError, match="Unknown strands"):
+        build_batch_jobs("Maths", years=["Year 3"], strands=["Fractions"])
+
+
+def test_failed_jobs_are_resubmitted_after_collecting(tmp_path, jobs):
+    batches = FakeBatches()
+    runner = make_runner(tmp_path, batches)
+    first = runner.submit(jobs)
+    batches.fail = {batches.submitted[0][0]}
+    runner.wait()
+
+    assert runner.collect() == {"written": len(jobs) - 1, "skipped": 0, "failed": 1}
+
+    # A fresh runner resumes from the state file, as a re-run of the command would
+    batches.fail = set()
+    runner = make_runner(tmp_path, batches)
+    assert runner.submit(jobs) not in (None, first)
+    assert batches.submitted[1] == [batches.submitted[0][0]]
+    assert runner.collect() == {"written": 1, "skipped": 0, "failed": 0}
+    assert runner.state["failed"] == {}
+    assert runner.submit(jobs) is None
+
+
+def test_truncated_jobs_get_a_larger_budget_then_are_given_up(tmp_path, jobs):
+    batches = FakeBatches()
+    runner = make_runner(tmp_path, batches)
+    runner.submit(jobs)
+    cut_off = batches.submitted[0][0]
+    batches.truncate = {cut_off}
+    runner.collect()
+
+    budgets = []
+    for _ in range(5):
+        if runner.submit(jobs) is None:
+            break
+        budgets.append(batches.max_tokens[-1][cut_off])
+        assert runner.collect()["failed"] == 1
+    else:
+        pytest.fail("The truncated job was resubmitted on every run")
+
+    first = batches.max_tokens[0][cut_off]
+    assert budgets == [first * 2 ** n for n in range(1, len(budgets) + 1)]
+    assert budgets[-1] == MAX_MAX_TOKENS
+    assert runner.state["given_up"] == [cut_off]
+    assert "largest budget" in runner.state["failed"][cut_off]
@@ -0,0 +1,59 @@
+"""Tests for the response cache in llm/cache.py."""
+
+import itertools
+
+import pytest
+
+from llm import cache as llm_cache
+from llm.cache import ResponseCache, get_default_cache, make_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Make each call to time.time() one second later than the last."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(llm_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_cache_key_covers_every_request_setting():
+    key = make_cache_key("prompt", "system", "model", 0.7, 4000)
+    assert key == make_cache_key("prompt", "system", "model", 0.7, 4000)
+    assert key != make_cache_key("prompt", "system", "model", 0.7, 8000)
+    assert key != make_cache_key("prompt", "other system", "model", 0.7, 4000)
+    assert len(key) == 64
+
+
+def test_round_trip_survives_a_new_connection(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    content = {"title": "Fractions \u00bd", "questions": [{"q": 1}]}
+    ResponseCache(path).put("key", content)
+
+    assert ResponseCache(path).get("key") == content
+    assert ResponseCache(path).get("missing") is None
+
+
+def test_expired_entries_are_dropped(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl_seconds=5)
+    cache.put("key", {"title": "Old"})
+    for _ in range(10):
+        llm_cache.time.time()
+
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    assert cache.get("a") == {"n": 1}
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("c") == {"n": 3}
+
+
+def test_default_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("WORKSHEET_CACHE_DISABLED", "1")
+    assert get_default_cache() is None
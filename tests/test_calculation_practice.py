@@ -0,0 +1,56 @@
+"""Tests for the local calculation practice engine in content/calculation_practice.py."""
+
+import pytest
+
+from content.calculation_practice import (
+    DEFAULT_SKILLS, generate_calculation_practice_content, skills_for, strand_for_topic,
+)
+from content.verify import verify_content
+from generators.styles import DIFF_LEVELS
+from pipeline import make_params
+from pipeline.core import _generate_locally
+
+
+@pytest.mark.parametrize("topic", [
+    "Place Value in Four-Digit Numbers",
+    "Number - Place Value - Place Value in Four-Digit Numbers",
+    "  place value in four-digit numbers ",
+])
+def test_strand_for_topic_with_or_without_the_strand(topic):
+    assert strand_for_topic("Year 4", topic) == "Number - Place Value"
+
+
+def test_strand_for_topic_unknown():
+    assert strand_for_topic("Year 4", "The Great Fire of London") is None
+    assert strand_for_topic("Year 9", "Place Value in Four-Digit Numbers") is None
+
+
+def test_skills_for_uses_topic_keywords_then_strand():
+    assert skills_for("Year 5", "Number - Place Value - Powers of 10")[0] == "powers_of_ten"
+    assert skills_for("Year 4", "Number - Place Value - Place Value in Four-Digit Numbers")[0] == "powers_of_ten"
+    assert skills_for("Year 4", "Something else entirely") == DEFAULT_SKILLS
+
+
+def test_generated_answers_are_right_and_repeatable():
+    for level in DIFF_LEVELS:
+        content = generate_calculation_practice_content("Year 5", level, topic="Long Multiplication", seed=3)
+        assert verify_content("calculation_practice", content) == []
+        assert content == generate_calculation_practice_content(
+            "Year 5", level, topic="Long Multiplication", seed=3,
+        )
+
+
+def test_unknown_year_group():
+    with pytest.raises(ValueError, match="Unknown year group"):
+        generate_calculation_practice_content("Year 9")
+
+
+def test_pipeline_passes_the_topic_to_the_engine():
+    params = make_params(
+        "Maths", "Year 4", "calculation_practice", strand="Number - Place Value",
+        topic="Place Value in Four-Digit Numbers", levels=["expected"], offline=True, seed=1,
+    )
+    [(level, content, error)] = list(_generate_locally(params))
+
+    assert (level, error) == ("expected", None)
+    assert content["sections"][0]["title"] == "Multiplying and Dividing by 10, 100 and 1000"
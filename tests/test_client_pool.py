@@ -0,0 +1,45 @@
+"""Tests for shared, pooled Anthropic clients in llm/client.py."""
+
+import pytest
+
+from benchmarks.mock_api import MockMessagesAPI
+from llm import client as llm_client
+
+
+@pytest.fixture
+def mock_api(monkeypatch, tmp_path):
+    server = MockMessagesAPI(recordings=str(tmp_path / "recordings")).start()
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", server.base_url)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("WORKSHEET_CACHE_DISABLED", "1")
+    monkeypatch.setattr(llm_client, "_clients", {})
+    monkeypatch.setattr(llm_client, "_client_variants", {})
+    monkeypatch.setattr(llm_client, "_pool_counters", {
+        "clients_created": 0, "clients_reused": 0, "requests_sent": 0,
+    })
+    yield server
+    for client in llm_client._clients.values():
+        client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_one_pooled_connection(mock_api):
+    for _ in range(2):
+        content = llm_client.generate_worksheet_content(
+            "Create a cloze worksheet for Year 3.", max_tokens=4000, use_cache=False,
+        )
+        assert content["title"]
+
+    stats = llm_client.get_client_pool_stats()
+    assert mock_api.counts["requests"] == 2
+    assert (stats["clients_created"], stats["clients"], stats["requests_sent"]) == (1, 1, 2)
+    assert stats["clients_reused"] >= 1
+    assert stats["open_connections"] == 1
+
+
+def test_pool_stats_say_when_the_pool_is_not_visible(monkeypatch):
+    monkeypatch.setattr(llm_client, "_clients", {("key", 60.0): object()})
+    stats = llm_client.get_client_pool_stats()
+    assert stats["open_connections"] is None
+    assert stats["idle_connections"] is None
@@ -0,0 +1,26 @@
+"""Tests for the app's cold-start budget in benchmarks/cold_start.py."""
+
+import pytest
+
+from benchmarks.cold_start import MARKER, deferred_imports, main, parse_importtime
+
+
+def test_parse_importtime_counts_only_the_apps_imports():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 | streamlit",
+        MARKER,
+        "import time:       300 |        900 | curriculum",
+        "import time:        40 |         40 |   curriculum.search",
+    ])
+    assert parse_importtime(stderr) == {"curriculum": (300, 900), "curriculum.search": (40, 40)}
+
+
+def test_deferred_imports_match_submodules():
+    assert deferred_imports(["curriculum", "docx.oxml", "llm.scheduler"]) == ["docx"]
+    assert deferred_imports(["llm.client_helpers"]) == []
+
+
+def test_first_page_is_within_budget_and_defers_heavy_imports():
+    pytest.importorskip("streamlit.testing.v1")
+    assert main(["--runs", "3", "--check"]) == 0
@@ -0,0 +1,31 @@
+"""Tests for the document build executor in pipeline/executor.py."""
+
+import sys
+import types
+from multiprocessing import spawn
+
+from pipeline.executor import WORKER_MAIN, _declare_worker_main
+
+
+def test_workers_import_the_worker_main_instead_of_the_script(monkeypatch):
+    script = types.ModuleType("__main__")
+    script.__file__ = "/srv/class-act/app.py"
+    monkeypatch.setitem(sys.modules, "__main__", script)
+
+    _declare_worker_main()
+    preparation = spawn.get_preparation_data("worker")
+
+    assert sys.modules["__main__"] is script
+    assert preparation["init_main_from_name"] == WORKER_MAIN
+    assert "init_main_from_path" not in preparation
+
+
+def test_modules_run_with_python_m_keep_their_spec(monkeypatch):
+    module = types.ModuleType("__main__")
+    module.__file__ = "/srv/class-act/pipeline/__main__.py"
+    module.__spec__ = spec = types.SimpleNamespace(name="pipeline.__main__")
+    monkeypatch.setitem(sys.modules, "__main__", module)
+
+    _declare_worker_main()
+
+    assert module.__spec__ is spec
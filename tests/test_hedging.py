@@ -0,0 +1,73 @@
+"""Tests for hedged Claude requests in llm/client.py."""
+
+import threading
+
+import pytest
+
+from llm import client as llm_client
+from llm.streaming import apply_stream_element
+
+
+@pytest.fixture
+def hedge_wins(monkeypatch):
+    """Make the primary stream one section then stall until cancelled, while the duplicate finishes."""
+    monkeypatch.setattr(llm_client, "_take_hedge", lambda: True)
+    primary_started = threading.Event()
+
+    def fake_send(client, request, parser, on_element, options, cancel=None):
+        if not primary_started.is_set():
+            primary_started.set()
+            on_element(("title",), "Primary")
+            on_element(("sections", 0), {"title": "From the primary"})
+            cancel.wait(5)
+            on_element(("sections", 1), {"title": "Late from the primary"})
+            return None
+        on_element(("title",), "Hedge")
+        on_element(("sections", 0), {"title": "From the hedge"})
+        return "hedge message"
+
+    monkeypatch.setattr(llm_client, "_send", fake_send)
+
+
+def test_preview_shows_only_the_winning_hedge(hedge_wins):
+    partial = {}
+    lock = threading.Lock()
+
+    def on_element(path, value):
+        with lock:
+            apply_stream_element(partial, path, value)
+
+    message, _ = llm_client._send_hedged(None, {}, None, on_element, {}, delay=0.05)
+
+    assert message == "hedge message"
+    assert partial == {"title": "Hedge", "sections": [{"title": "From the hedge"}]}
+
+
+def test_reset_path_empties_the_partial_worksheet():
+    partial = {"title": "Old", "sections": [{"title": "Old section"}]}
+    apply_stream_element(partial, (), None)
+    apply_stream_element(partial, ("sections", 0), {"title": "New section"})
+
+    assert partial == {"sections": [{"title": "New section"}]}
+
+
+def test_hedging_is_opt_in(monkeypatch):
+    monkeypatch.delenv("CLAUDE_HEDGE_REQUESTS", raising=False)
+    assert not llm_client._hedging_enabled("reading_comprehension", None)
+    monkeypatch.setenv("CLAUDE_HEDGE_REQUESTS", "1")
+    assert llm_client._hedging_enabled("reading_comprehension", None)
+    assert not llm_client._hedging_enabled("cloze", None)
+    assert not llm_client._hedging_enabled("reading_comprehension", False)
+
+
+def test_hedges_stay_under_the_rate_cap(monkeypatch):
+    counters = {"eligible": 0, "issued": 0, "won": 0, "skipped_rate_cap": 0}
+    monkeypatch.setattr(llm_client, "_hedge_counters", counters)
+    taken = []
+    for _ in range(30):
+        counters["eligible"] += 1
+        taken.append(llm_client._take_hedge())
+
+    assert taken[:9] == [False] * 9
+    assert sum(taken) == 3
+    assert counters["issued"] / counters["eligible"] <= llm_client.HEDGE_MAX_RATE
@@ -0,0 +1,104 @@
+"""Tests for params, manifests and bulk runs in pipeline/."""
+
+import json
+import os
+
+import pytest
+
+from pipeline import job_to_params, load_manifest, make_params, run_jobs
+from pipeline.__main__ import main
+
+TIMES_TABLES_JOB = {
+    "subject": "Maths", "year_group": "Year 4", "strand": "Number - Multiplication & Division",
+    "topic": "Times Tables to 12 x 12", "worksheet_type": "times_tables", "theme": "space",
+    "levels": ["expected"], "offline": True, "seed": 1,
+}
+
+
+def write_manifest(tmp_path, lines, name="jobs.jsonl"):
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+# ─── Params ───────────────────────────────────────────────────────────────────
+
+def test_make_params_resolves_the_curriculum_selection():
+    params = make_params("Maths", "Year 4", "times_tables", strand="Number - Multiplication & Division",
+                         topic="Times Tables to 12 x 12")
+
+    assert params["effective_topic"] == "Number - Multiplication & Division - Times Tables to 12 x 12"
+    assert params["topic_for_filename"] == "Times Tables to 12 x 12"
+    assert params["effective_objective"]
+    assert params["levels"] == ["developing", "expected", "greater_depth"]
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"subject": "Latin"}, "Unknown subject"),
+    ({"strand": "Algebra"}, "Unknown strand"),
+    ({"topic": "Times Tables up to 12 x 12"}, "Unknown topic"),
+    ({"theme_key": "neon"}, "Unknown theme"),
+    ({"worksheet_type": "reading_comprehension", "offline": True}, "not available|cannot be generated"),
+])
+def test_make_params_rejects_what_the_curriculum_lacks(kwargs, message):
+    args = {"subject": "Maths", "year_group": "Year 4", "worksheet_type": "times_tables",
+            "strand": "Number - Multiplication & Division", **kwargs}
+    with pytest.raises(ValueError, match=message):
+        make_params(**args)
+
+
+def test_custom_topic_may_be_anything():
+    params = make_params("Maths", "Year 4", "times_tables", topic="Not in the curriculum",
+                         custom_topic="  Times tables in the kitchen ")
+    assert params["effective_topic"] == "Times tables in the kitchen"
+
+
+# ─── Manifests ────────────────────────────────────────────────────────────────
+
+def test_jsonl_manifest_and_aliases(tmp_path):
+    path = write_manifest(tmp_path, [
+        json.dumps(TIMES_TABLES_JOB), "", json.dumps({**TIMES_TABLES_JOB, "answer_key": True}),
+    ])
+    jobs = load_manifest(path)
+
+    assert len(jobs) == 2
+    params = job_to_params(jobs[1])
+    assert (params["theme_key"], params["include_answer_key"]) == ("space", True)
+
+
+def test_yaml_manifest(tmp_path):
+    yaml = pytest.importorskip("yaml")
+    path = tmp_path / "jobs.yaml"
+    path.write_text(yaml.safe_dump({"jobs": [TIMES_TABLES_JOB]}), encoding="utf-8")
+    assert load_manifest(str(path)) == [TIMES_TABLES_JOB]
+
+
+def test_malformed_line_is_reported_with_its_number(tmp_path):
+    path = write_manifest(tmp_path, [json.dumps(TIMES_TABLES_JOB), '{"subject": "Maths",'])
+    with pytest.raises(ValueError, match=r"jobs\.jsonl: line 2: "):
+        load_manifest(path)
+
+
+def test_command_line_reports_manifest_errors(tmp_path, capsys):
+    path = write_manifest(tmp_path, ['{"subject": "Maths",'])
+    assert main([path, "--out", str(tmp_path / "out")]) == 2
+    assert "line 1" in capsys.readouterr().err
+
+    path = write_manifest(tmp_path, [json.dumps({**TIMES_TABLES_JOB, "topic": "Times Tables up to 12 x 12"})])
+    assert main([path, "--out", str(tmp_path / "out")]) == 2
+    assert "job 1: Unknown topic" in capsys.readouterr().err
+
+
+# ─── Runs ─────────────────────────────────────────────────────────────────────
+
+def test_run_jobs_builds_offline_packs(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKSHEET_BUILD_WORKERS", "0")
+    monkeypatch.setenv("WORKSHEET_CACHE_DISABLED", "1")
+    jobs = [job_to_params(TIMES_TABLES_JOB), job_to_params({**TIMES_TABLES_JOB, "answer_key": True})]
+
+    summary = run_jobs(jobs, str(tmp_path), workers=2)
+
+    assert (summary["jobs"], summary["failed_jobs"], summary["documents"]) == (2, 0, 3)
+    for report in summary["reports"]:
+        assert report["errors"] == {}
+        assert all(os.path.getsize(path) > 0 for path in report["files"])
@@ -0,0 +1,92 @@
+"""Tests for the rendered document cache in pipeline/render_cache.py."""
+
+import itertools
+
+import pytest
+
+from pipeline import executor
+from pipeline import render_cache
+from pipeline.render_cache import RenderCache, make_render_key
+
+SPEC = {
+    "key": "expected_worksheet",
+    "ws_type_key": "calculation_practice",
+    "content": {"title": "Column Addition", "sections": []},
+    "level": "expected",
+    "theme_key": "classic",
+    "objective_text": "Add numbers with up to 4 digits",
+    "extra_spacing": False,
+    "eal_glossary": False,
+    "show_answers": False,
+}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Make each call to time.time() one second later than the last."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(render_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_render_key_depends_only_on_what_is_rendered():
+    key = make_render_key(SPEC)
+    assert key == make_render_key({**SPEC, "key": "another_filename"})
+    assert key != make_render_key({**SPEC, "show_answers": True})
+    assert key != make_render_key({**SPEC, "content": {"title": "Column Subtraction", "sections": []}})
+
+
+def test_memory_budget_evicts_least_recently_used():
+    cache = RenderCache(None, memory_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    cache.get("a")
+    cache.put("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+
+
+def test_documents_are_read_back_from_disk(tmp_path):
+    path = str(tmp_path / "documents.sqlite3")
+    RenderCache(path).put("doc", b"docx bytes")
+
+    cache = RenderCache(path, memory_bytes=0)
+    assert cache.get("doc") == b"docx bytes"
+    assert len(cache) == 1
+
+
+def test_disk_budget_evicts_least_recently_used(tmp_path, clock):
+    cache = RenderCache(str(tmp_path / "documents.sqlite3"), memory_bytes=0, max_disk_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    cache.get("a")
+    cache.put("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert len(cache) == 2
+
+
+def test_build_serves_cached_documents_without_rendering(monkeypatch):
+    cache = RenderCache(None)
+    monkeypatch.setattr(executor, "get_render_cache", lambda: cache)
+    monkeypatch.setenv("WORKSHEET_BUILD_WORKERS", "0")
+    rendered = []
+
+    def fake_render(specs):
+        for spec in specs:
+            rendered.append(spec["key"])
+            yield spec["key"], b"rendered " + spec["key"].encode(), 0.1
+
+    monkeypatch.setattr(executor, "_render", fake_render)
+    first = {key: buffer.getvalue() for key, buffer, _ in executor.iter_render([SPEC])}
+    second = {key: buffer.getvalue() for key, buffer, _ in executor.iter_render([SPEC])}
+
+    assert rendered == ["expected_worksheet"]
+    assert first == second == {"expected_worksheet": b"rendered expected_worksheet"}
+
+
+def test_render_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("WORKSHEET_CACHE_DISABLED", "1")
+    assert render_cache.get_render_cache() is None
@@ -0,0 +1,131 @@
+"""Tests for the Claude request scheduler in llm/scheduler.py."""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from anthropic import APIConnectionError
+
+from llm.scheduler import (
+    RequestScheduler, SchedulerBusyError, TokenBucket, estimate_tokens, retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+
+
+def make_scheduler(clock, **kwargs):
+    return RequestScheduler(clock=clock, sleep=clock.sleep, **{
+        "requests_per_minute": 60, "tokens_per_minute": 1000, **kwargs,
+    })
+
+
+def connection_error():
+    return APIConnectionError(request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"))
+
+
+# ─── Token Bucket ─────────────────────────────────────────────────────────────
+
+def test_token_bucket_waits_for_debt_to_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(30) == pytest.approx(30.0)
+    clock.now = 30.0
+    assert bucket.available == pytest.approx(0.0)
+    bucket.refund(100)
+    assert bucket.available == 60
+
+
+# ─── Token Accounting ─────────────────────────────────────────────────────────
+
+def test_reconciles_tokens_with_real_usage():
+    scheduler = make_scheduler(FakeClock())
+    assert scheduler.call(lambda: 100, tokens=600, used_tokens=lambda used: used) == 100
+    assert scheduler.tokens.available == 900
+
+
+def test_failed_attempts_are_refunded_before_retrying(monkeypatch):
+    monkeypatch.setattr("llm.scheduler.random.uniform", lambda low, high: 0.0)
+    scheduler = make_scheduler(FakeClock())
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise connection_error()
+        return 100
+
+    assert scheduler.call(flaky, tokens=600, used_tokens=lambda used: used) == 100
+    assert scheduler.tokens.available == 900
+    assert scheduler.stats()["retries"] == 2
+
+
+def test_cancelled_call_is_refunded_without_reading_usage():
+    scheduler = make_scheduler(FakeClock())
+
+    def used_tokens(result):
+        raise AssertionError("no usage to read from a cancelled call")
+
+    assert scheduler.call(lambda: None, tokens=600, used_tokens=used_tokens) is None
+    assert scheduler.tokens.available == 1000
+
+
+def test_non_retryable_error_is_refunded_and_raised():
+    scheduler = make_scheduler(FakeClock())
+
+    def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call(broken, tokens=600)
+    assert scheduler.tokens.available == 1000
+    assert scheduler.stats()["failed"] == 1
+    assert scheduler.stats()["in_flight"] == 0
+
+
+# ─── Admission ────────────────────────────────────────────────────────────────
+
+def test_full_queue_is_refused():
+    scheduler = make_scheduler(FakeClock(), max_queue=0)
+    with pytest.raises(SchedulerBusyError):
+        scheduler.call(lambda: 1)
+    assert scheduler.stats()["refused"] == 1
+
+
+def test_wait_past_the_limit_is_refused_and_refunded():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_wait=5.0)
+    scheduler.tokens.reserve(1000)
+
+    with pytest.raises(SchedulerBusyError):
+        scheduler.call(lambda: 1, tokens=500)
+    assert scheduler.tokens.available == 0
+    assert clock.slept == []
+
+
+# ─── Helpers ──────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after-ms": "1500"}, 1.5),
+    ({"retry-after": "7"}, 7.0),
+    ({}, None),
+])
+def test_retry_after_seconds(headers, expected):
+    error = SimpleNamespace(response=SimpleNamespace(headers=headers))
+    assert retry_after_seconds(error) == expected
+
+
+def test_estimate_tokens():
+    request = {"system": "x" * 400, "messages": [{"role": "user", "content": "y" * 400}], "max_tokens": 1000}
+    assert estimate_tokens(request) == 1200
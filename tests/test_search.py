@@ -0,0 +1,41 @@
+"""Tests for curriculum search in curriculum/search.py."""
+
+import pytest
+
+from curriculum.search import closest_objectives, search_curriculum, stem, tokenize
+
+
+def test_stem_and_tokenize():
+    assert stem("fractions") == stem("fraction") == "fraction"
+    assert stem("running") == "run"
+    assert stem("class") == "class"
+    assert tokenize("The Romans' roads and villas") == ["romans", "roads", "villas"]
+
+
+def test_entries_matching_more_words_rank_first():
+    results = search_curriculum("roman roads", limit=3)
+    assert results[0]["text"] == "Roman Roads, Towns and Villas"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("multipl", "Multiplication"),
+    ("fracton", "Fractions"),
+    ("multiplcation", "Multiplication"),
+])
+def test_prefixes_and_misspellings_match(query, expected):
+    results = search_curriculum(query, subject="Maths", kind="topic", limit=1)
+    assert expected in results[0]["text"]
+
+
+def test_filters():
+    results = search_curriculum("fractions", year_group="Year 4", kind="objective")
+    assert results and all(r["year_group"] == "Year 4" and r["kind"] == "objective" for r in results)
+    assert search_curriculum("the of and") == []
+    with pytest.raises(ValueError, match="Unknown kind"):
+        search_curriculum("fractions", kind="strand")
+
+
+def test_closest_objectives_uses_the_strand_of_a_matching_topic():
+    [objective] = closest_objectives("The Great Fire of London", subject="History", limit=1)
+    assert (objective["kind"], objective["year_group"]) == ("objective", "Year 2")
+    assert objective["topic"] is None
@@ -0,0 +1,71 @@
+"""Tests for the incremental JSON parser in llm/streaming.py."""
+
+import json
+
+import pytest
+
+from llm.streaming import IncrementalJSONParser, apply_stream_element, iter_elements
+
+WORKSHEET = {
+    "title": "Fractions {of} \"amounts\"",
+    "sections": [
+        {"title": "Warm-Up", "questions": [{"q": "1/2 of 8", "a": 4}]},
+        {"title": "Challenge \\ [hard]", "questions": []},
+    ],
+    "total": 12,
+    "answer_key": True,
+    "notes": None,
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 10000])
+def test_elements_are_the_same_whatever_the_chunk_size(size):
+    parser, events = feed_in_chunks("```json\n" + json.dumps(WORKSHEET, indent=2) + "\n```", size)
+
+    assert parser.done
+    assert parser.partial == WORKSHEET
+    assert events == [
+        (("title",), WORKSHEET["title"]),
+        (("sections", 0), WORKSHEET["sections"][0]),
+        (("sections", 1), WORKSHEET["sections"][1]),
+        (("sections",), WORKSHEET["sections"]),
+        (("total",), 12),
+        (("answer_key",), True),
+        (("notes",), None),
+    ]
+
+
+def test_array_items_are_reported_before_the_array_closes():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "T", "sections": [{"a": 1}, {"b"')
+
+    assert parser.partial == {"title": "T", "sections": [{"a": 1}]}
+    assert not parser.done
+
+
+def test_text_after_the_object_is_ignored():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1} trailing {"b": 2}') == [(("a",), 1)]
+    assert parser.done
+
+
+def test_replayed_elements_rebuild_the_content():
+    partial = {}
+    for path, value in iter_elements(WORKSHEET):
+        apply_stream_element(partial, path, value)
+    assert partial == WORKSHEET
+
+
+def test_out_of_order_items_are_not_appended():
+    partial = {"sections": [{"a": 1}]}
+    apply_stream_element(partial, ("sections", 0), {"a": 1})
+    apply_stream_element(partial, ("sections", 2), {"c": 3})
+    assert partial == {"sections": [{"a": 1}]}
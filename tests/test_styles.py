@@ -0,0 +1,33 @@
+"""Tests for the named character styles in generators/styles.py and their use in generators/components.py."""
+
+from docx import Document
+from docx.shared import Pt
+
+from generators.components import add_cloze_paragraph
+from generators.styles import DIFF_LEVELS, NAMED_STYLES, WORD_TYPES
+
+
+def test_choice_and_hint_sizes_match_the_direct_formatting_they_replaced():
+    for level, diff in DIFF_LEVELS.items():
+        for word_type in WORD_TYPES:
+            assert NAMED_STYLES[f'Choice-{word_type}-{level}']['size'] == diff['font_size'] - 2
+            assert NAMED_STYLES[f'Hint-{word_type}-{level}']['size'] == diff['font_size'] - 4
+
+
+def _run_size(doc, text):
+    run = next(r for r in doc.paragraphs[-1].runs if r.text == text)
+    return doc.styles.get_by_id(run.style.style_id, run.style.type).font.size
+
+
+def test_developing_cloze_hint_without_choices_keeps_the_hint_size():
+    word_type = next(iter(WORD_TYPES))
+    size = DIFF_LEVELS['developing']['font_size']
+    doc = Document()
+    add_cloze_paragraph(doc, [
+        {'type': 'text', 'text': 'The cat '},
+        {'type': 'blank', 'word_type': word_type, 'hint': 'a verb'},
+        {'type': 'blank', 'word_type': word_type, 'choices': ['sat', 'ran']},
+    ], level='developing')
+
+    assert _run_size(doc, '(a verb) ') == Pt(size - 4)
+    assert _run_size(doc, '(sat / ran) ') == Pt(size - 2)
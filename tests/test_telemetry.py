@@ -0,0 +1,131 @@
+"""Tests for spans, counters and Prometheus output in telemetry/."""
+
+import json
+import pickle
+import threading
+import urllib.request
+
+import pytest
+
+from telemetry import (
+    capture, count, current_context, current_labels, get_metrics, ingest, render_metrics, reset,
+    set_trace_path, span, start_metrics_server,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_telemetry():
+    set_trace_path(None)
+    reset()
+    yield
+    set_trace_path(None)
+    reset()
+
+
+def finished_span(name, seconds, **labels):
+    """A span record as ``capture`` would hand back from a worker."""
+    return {
+        "name": name, "trace": "t" * 16, "span": "s" * 16, "parent": None, "labels": labels,
+        "attrs": {}, "start": 0.0, "pid": 1, "status": "ok", "seconds": seconds,
+    }
+
+
+# ─── Spans ────────────────────────────────────────────────────────────────────
+
+def test_nested_spans_share_the_trace_and_inherit_labels():
+    with span("pipeline.job", worksheet_type="cloze") as job:
+        with span("claude.message", model="m", level=None) as message:
+            assert current_labels() == {"worksheet_type": "cloze", "model": "m"}
+    assert current_labels() == {}
+
+    assert message["trace"] == job["trace"]
+    assert message["parent"] == job["span"]
+    assert job["parent"] is None
+    assert message["labels"] == {"worksheet_type": "cloze", "model": "m"}
+
+
+def test_failed_spans_are_counted_as_errors():
+    with pytest.raises(KeyError):
+        with span("docx.render") as record:
+            raise KeyError("theme")
+
+    assert (record["status"], record["error"]) == ("error", "KeyError")
+    [stats] = get_metrics()["spans"]
+    assert (stats["count"], stats["errors"]) == (1, 1)
+
+
+def test_captured_spans_join_the_callers_trace_when_ingested():
+    with span("pipeline.build", worksheet_type="cloze") as build:
+        # The context and records cross a process boundary in the build pool
+        context = pickle.loads(pickle.dumps(current_context()))
+        records = []
+
+        def worker():
+            with capture(context) as captured:
+                with span("docx.render", level="expected"):
+                    pass
+            records.extend(pickle.loads(pickle.dumps(captured)))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert [s["name"] for s in get_metrics()["spans"]] == []
+        ingest(records)
+
+    [record] = records
+    assert (record["trace"], record["parent"]) == (build["trace"], build["span"])
+    assert record["labels"] == {"worksheet_type": "cloze", "level": "expected"}
+    assert sorted(s["name"] for s in get_metrics()["spans"]) == ["docx.render", "pipeline.build"]
+
+
+def test_trace_file_gets_one_line_per_span(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    set_trace_path(str(path))
+    with span("outer"):
+        with span("inner"):
+            pass
+    set_trace_path(None)
+
+    names = [json.loads(line)["name"] for line in path.read_text(encoding="utf-8").splitlines()]
+    assert names == ["inner", "outer"]
+
+
+# ─── Prometheus ───────────────────────────────────────────────────────────────
+
+def test_render_metrics_histogram_and_counters():
+    ingest([
+        finished_span("docx.render", 0.003, level="expected"),
+        finished_span("docx.render", 130.0, level="expected"),
+    ])
+    count("claude_output_tokens", 1200, worksheet_type="cloze")
+    count("claude_output_tokens", 300, worksheet_type="cloze")
+    count("json_extraction", strategy='fenced "json"')
+
+    lines = render_metrics().splitlines()
+    labels = 'level="expected",span="docx.render"'
+
+    assert "# TYPE worksheet_span_seconds histogram" in lines
+    assert f'worksheet_span_seconds_bucket{{{labels},le="0.001"}} 0' in lines
+    assert f'worksheet_span_seconds_bucket{{{labels},le="0.005"}} 1' in lines
+    # A span longer than the largest bound is counted only in +Inf
+    assert f'worksheet_span_seconds_bucket{{{labels},le="120"}} 1' in lines
+    assert f'worksheet_span_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"worksheet_span_seconds_sum{{{labels}}} 130.003" in lines
+    assert f"worksheet_span_seconds_count{{{labels}}} 2" in lines
+    assert f"worksheet_span_errors_total{{{labels}}} 0" in lines
+    assert "# TYPE worksheet_claude_output_tokens_total counter" in lines
+    assert 'worksheet_claude_output_tokens_total{worksheet_type="cloze"} 1500' in lines
+    assert 'worksheet_json_extraction_total{strategy="fenced \\"json\\""} 1' in lines
+
+
+def test_render_metrics_is_empty_without_data():
+    assert render_metrics() == "\n"
+
+
+def test_metrics_endpoint_serves_the_text_format():
+    count("claude_hedges", outcome="issued")
+    server = start_metrics_server(0)
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics", timeout=5) as response:
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert 'worksheet_claude_hedges_total{outcome="issued"} 1' in response.read().decode("utf-8")
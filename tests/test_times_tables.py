@@ -0,0 +1,68 @@
+"""Tests for the local times tables engine in content/times_tables.py."""
+
+import re
+
+import pytest
+
+from content.times_tables import (
+    YEAR_MAX_FACTOR, YEAR_TABLES, generate_times_tables_content, make_facts, tables_from_text,
+)
+from content.verify import verify_content
+from generators.styles import DIFF_LEVELS
+
+YEAR_GROUPS = list(YEAR_TABLES)
+
+
+def all_facts(content):
+    facts = [fact for section in content["sections"] for fact in section["facts"]]
+    return facts + (content["speed_challenge"] or {}).get("facts", [])
+
+
+@pytest.mark.parametrize("year_group", YEAR_GROUPS)
+@pytest.mark.parametrize("level", DIFF_LEVELS)
+def test_content_matches_the_schema_and_checks_out(year_group, level):
+    content = generate_times_tables_content(year_group, level, seed=7)
+
+    assert set(content) == {"title", "sections", "speed_challenge", "success_criteria"}
+    for section in content["sections"]:
+        assert set(section) == {"title", "instructions", "tables_focus", "facts"}
+        assert section["facts"]
+        assert all(set(fact) == {"question", "answer"} for fact in section["facts"])
+    assert verify_content("times_tables", content) == []
+
+
+def test_same_seed_gives_the_same_sheet():
+    first = generate_times_tables_content("Year 4", "greater_depth", seed="pack-1")
+    assert first == generate_times_tables_content("Year 4", "greater_depth", seed="pack-1")
+    assert first != generate_times_tables_content("Year 4", "greater_depth", seed="pack-2")
+
+
+@pytest.mark.parametrize("year_group", ["Year 1", "Year 2"])
+def test_infant_sheets_stay_within_the_year_group(year_group):
+    numbers_allowed = set(YEAR_TABLES[year_group])
+    largest = max(numbers_allowed) * YEAR_MAX_FACTOR[year_group]
+    for seed in range(5):
+        for fact in all_facts(generate_times_tables_content(year_group, "greater_depth", seed=seed)):
+            numbers = [int(n) for n in re.findall(r"\d+", fact["question"])]
+            assert max(numbers) <= largest
+            assert numbers_allowed & set(numbers)
+            if year_group == "Year 1":
+                assert "\u00f7" not in fact["question"]
+
+
+def test_greater_depth_mixes_every_format_from_year_3():
+    questions = [fact["question"] for fact in all_facts(
+        generate_times_tables_content("Year 3", "greater_depth", seed=1))]
+    assert any("\u00f7" in q for q in questions)
+    assert any(re.match(r"\d+0 x ", q) for q in questions)
+
+
+def test_tables_from_text():
+    assert tables_from_text("3, 4 and 8 Times Tables") == [3, 4, 8]
+    assert tables_from_text("Counting in 2s, 5s and 10s") == [2, 5, 10]
+    assert tables_from_text("Times Tables to 12 x 12") == [12]
+
+
+def test_make_facts_rejects_unknown_formats():
+    with pytest.raises(ValueError, match="Unknown fact formats"):
+        make_facts([2], 5, formats=["squared"])
@@ -0,0 +1,129 @@
+"""Tests for the maths answer verifier in content/verify.py."""
+
+from fractions import Fraction
+
+import pytest
+
+from content.verify import Unreadable, check_answer, compare, format_answer, parse_number, solve, verify_content
+
+
+# ─── Parsing ──────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("text, expected", [
+    ("7", Fraction(7)),
+    ("-2.5", Fraction(-5, 2)),
+    ("3/4", Fraction(3, 4)),
+    ("2 1/3", Fraction(7, 3)),
+    ("1,250", Fraction(1250)),
+])
+def test_parse_number(text, expected):
+    assert parse_number(text) == expected
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("345 + 278 = ___", 623),
+    ("? x 4 = 28", 7),
+    ("3/4 = ___/20", 15),
+    ("1/2 of 20 = ___", 10),
+    ("(3 + 4) \u00d7 2 = \u25a1", 14),
+    ("2 1/3 + 1/3 = ___", Fraction(8, 3)),
+    ("72 \u00f7 ___ = 8", 9),
+])
+def test_solve(question, expected):
+    assert solve(question) == expected
+
+
+def test_compare():
+    assert compare("3/4 ___ 1/2") == ">"
+    assert compare("0.5 ___ 1/2") == "="
+
+
+@pytest.mark.parametrize("question", [
+    "Estimate 398 + 204 = ___",
+    "Round 347 to the nearest 10 = ___",
+    "Sam has 12 apples and eats ___. He has 5 left.",
+    "___ + ___ = 10",
+    "12 + 4",
+])
+def test_solve_rejects_what_it_cannot_check(question):
+    with pytest.raises(Unreadable):
+        solve(question)
+
+
+def test_format_answer_keeps_the_given_style():
+    assert format_answer(Fraction(5, 2), like="2.4") == "2.5"
+    assert format_answer(Fraction(5, 2), like="3 1/2") == "2 1/2"
+    assert format_answer(Fraction(5, 2), like="7/2") == "5/2"
+    assert format_answer(Fraction(6)) == "6"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (Fraction(1123531, 100), "11235.31"),
+    (Fraction(2469350, 2), "1234675"),
+    (Fraction(2469135, 2), "1234567.5"),
+    (Fraction(-1, 8), "-0.125"),
+    (Fraction(123456789, 1000), "123456.789"),
+])
+def test_format_answer_writes_decimals_exactly(value, expected):
+    assert format_answer(value, like="0.1") == expected
+
+
+# ─── Checking ─────────────────────────────────────────────────────────────────
+
+def test_check_answer_corrects_wrong_answers():
+    assert check_answer({"question": "345 + 278 = ___", "answer": "633"}) == "623"
+    assert check_answer({"question": "3/4 ___ 1/2", "answer": "<"}) == ">"
+    assert check_answer({"question": "17 \u00f7 5 = ___", "answer": "3 r 1"}) == "3 r 2"
+
+
+@pytest.mark.parametrize("question, answer, corrected", [
+    ("1234.56 + 10000.75 = ___", "11235.3", "11235.31"),
+    ("12345.5 + 1.25 = ___", "12346.8", "12346.75"),
+    ("1234567 + 0.5 = ___", "1234567", "1234567.5"),
+    ("1234.56 + 10000.75 = ___", "11235", "11235.31"),
+])
+def test_check_answer_corrects_long_decimals_exactly(question, answer, corrected):
+    assert check_answer({"question": question, "answer": answer}) == corrected
+
+
+def test_check_answer_accepts_right_answers():
+    assert check_answer({"question": "345 + 278 = ___", "answer": "623"}) is None
+    assert check_answer({"question": "17 \u00f7 5 = ___", "answer": "3 r 2"}) is None
+    assert check_answer({"question": "What fraction is shaded?", "answer": "3/4",
+                         "diagram": {"shaded": 3, "total": 4}}) is None
+
+
+@pytest.mark.parametrize("item, instructions", [
+    ({"question": "Estimate 398 + 204 = ___", "answer": "600"}, ""),
+    ({"question": "398 + 204 \u2248 ___", "answer": "600"}, ""),
+    ({"question": "398 + 204 = ___", "answer": "600"}, "Round each number to the nearest hundred, then add."),
+    ({"question": "398 + 204 = ___", "answer": "600"}, "Estimate the answers"),
+    ({"question": "Work out 12 + 5 = ___", "answer": "18"}, ""),
+])
+def test_check_answer_leaves_approximate_and_worded_questions(item, instructions):
+    assert check_answer(item, instructions) is None
+
+
+def test_verify_content_corrects_in_place_and_skips_estimating_sections():
+    content = {
+        "sections": [
+            {"title": "Warm-Up", "instructions": "Calculate each answer.",
+             "calculations": [{"question": "45 + 27 = ___", "answer": "62"}]},
+            {"title": "Estimating", "instructions": "Round to the nearest hundred, then add.",
+             "calculations": [{"question": "398 + 204 = ___", "answer": "600"}]},
+        ],
+    }
+    corrections = verify_content("calculation_practice", content)
+
+    assert corrections == [{
+        "path": "sections[0].calculations[0]", "question": "45 + 27 = ___", "answer": "62", "corrected": "72",
+    }]
+    assert content["sections"][0]["calculations"][0] == {
+        "question": "45 + 27 = ___", "answer": "72", "corrected_from": "62",
+    }
+    assert content["sections"][1]["calculations"][0]["answer"] == "600"
+
+
+def test_verify_content_ignores_other_worksheet_types():
+    content = {"sections": [{"calculations": [{"question": "1 + 1 = ___", "answer": "3"}]}]}
+    assert verify_content("cloze", content) == []